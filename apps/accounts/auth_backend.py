@@ -1,28 +1,55 @@
 # apps/accounts/auth_backend.py
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.core.exceptions import PermissionDenied
+
+from . import throttle
 
 User = get_user_model()
 
+LOGIN_FIELDS = ("id", "password", "is_active", "is_staff", "is_superuser")
+
+
+def _find_user(identifier: str):
+    """Two single-column lookups (each on its own unique index) instead of an OR."""
+    lookups = ("email", "username") if "@" in identifier else ("username", "email")
+    for field in lookups:
+        user = User.objects.only(*LOGIN_FIELDS).filter(**{field: identifier}).first()
+        if user is not None:
+            return user
+    return None
+
+
 class FastAuthBackend(ModelBackend):
+    """
+    Username-or-email login, throttled before any hashing (see throttle.py).
+
+    A failed attempt raises PermissionDenied rather than returning None:
+    that stops django.contrib.auth from trying ModelBackend next, which
+    would run a second lookup and a second password hash for the same
+    credentials.
+    """
+
     def authenticate(self, request, username=None, password=None, **kwargs):
         if not username or not password:
             return None
 
-        try:
-            user = User.objects.only(
-                "id", "password", "is_active", "is_staff", "is_superuser"
-            ).get(
-                Q(username=username) | Q(email=username)
-            )
-        except User.DoesNotExist:
-            return None
-
-        if not user.is_active:
-            return None
+        if request is not None:
+            wait = throttle.retry_after(request, username)
+            if wait is not None:
+                request.login_retry_after = wait
+                raise PermissionDenied("Too many login attempts")
 
-        if user.check_password(password):
+        user = _find_user(username)
+        if user is None:
+            # Hash anyway so unknown and known usernames take the same time
+            User().set_password(password)
+        elif user.is_active and user.check_password(password):
+            # check_password rehashes in place if PASSWORD_HASHERS changed
+            if request is not None:
+                throttle.record_success(request, username)
             return user
 
-        return None
+        if request is not None:
+            throttle.record_failure(request, username)
+        raise PermissionDenied("Invalid credentials")
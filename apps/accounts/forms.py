@@ -88,6 +88,16 @@ class SignupForm(forms.ModelForm):
         }),
     )
 
+    # The inviter's invitation code; cleaned to the inviting User
+    invited_by = forms.CharField(
+        required=True,
+        max_length=32,
+        widget=forms.TextInput(attrs={
+            "class": "form-control",
+            "placeholder": "Enter invitation code of the person who invited you",
+        }),
+    )
+
     class Meta:
         model = get_user_model()
         fields = [
@@ -112,10 +122,6 @@ class SignupForm(forms.ModelForm):
                 "class": "form-control",
                 "placeholder": "Email address",
             }),
-            "invited_by": forms.TextInput(attrs={
-                "class": "form-control",
-                "placeholder": "Enter invitation code of the person who invited you",
-            }),
         }
 
     # -------------------------------------------------
@@ -154,10 +160,11 @@ class SignupForm(forms.ModelForm):
             raise forms.ValidationError("Invitation code is required.")
 
         User = get_user_model()
-        if not User.objects.filter(invitation_code=code).exists():
+        inviter = User.objects.filter(invitation_code=code.strip()).first()
+        if not inviter:
             raise forms.ValidationError("Invalid invitation code.")
 
-        return code
+        return inviter
 
     def clean(self):
         cleaned_data = super().clean()
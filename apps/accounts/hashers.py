@@ -0,0 +1,18 @@
+# apps/accounts/hashers.py
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 at PASSWORD_PBKDF2_ITERATIONS (default 600,000, the
+    OWASP floor) instead of Django's default.
+
+    It keeps the pbkdf2_sha256 algorithm name, so existing hashes still
+    verify. must_update() compares iteration counts, so check_password
+    rehashes every user to the configured count on their next login.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, "PASSWORD_PBKDF2_ITERATIONS", 600_000)
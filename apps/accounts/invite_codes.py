@@ -0,0 +1,75 @@
+# apps/accounts/invite_codes.py
+"""
+Collision-free invitation codes.
+
+Each code is a bijective encoding of the next value of a database sequence:
+the 30-bit value goes through a keyed Feistel permutation (so consecutive
+signups don't get consecutive-looking codes) and is written as 6 Crockford
+base32 characters behind a "REN-" prefix, e.g. REN-7KQ2XD.
+
+Distinct sequence values always give distinct codes, so allocation is one
+query (nextval on Postgres, one insert elsewhere) with no exists() probing
+and no retry. Codes issued before this scheme are 10 or 12 characters long
+and cannot collide with these.
+
+INVITE_CODE_SECRET keys the permutation. Changing it after codes have been
+issued re-shuffles the mapping and can produce duplicates: treat it as
+fixed for the lifetime of the database.
+"""
+import hashlib
+import hmac
+
+from django.conf import settings
+from django.db import connection
+
+PREFIX = "REN-"
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"  # Crockford base32
+LENGTH = 6
+HALF_BITS = LENGTH * 5 // 2
+HALF_MASK = (1 << HALF_BITS) - 1
+ROUNDS = 4
+CAPACITY = 1 << (HALF_BITS * 2)
+
+
+def _round(value: int, round_no: int) -> int:
+    key = (getattr(settings, "INVITE_CODE_SECRET", "") or "renocorp-invite-codes").encode()
+    digest = hmac.new(key, f"{round_no}:{value}".encode(), hashlib.sha256).digest()
+    return int.from_bytes(digest[:4], "big") & HALF_MASK
+
+
+def permute(n: int) -> int:
+    """Keyed bijection on [0, CAPACITY)."""
+    left, right = n >> HALF_BITS, n & HALF_MASK
+    for round_no in range(ROUNDS):
+        left, right = right, left ^ _round(right, round_no)
+    return (left << HALF_BITS) | right
+
+
+def encode(n: int) -> str:
+    if not 0 <= n < CAPACITY:
+        raise OverflowError("Invitation code space exhausted")
+    value = permute(n)
+    chars = []
+    for _ in range(LENGTH):
+        value, digit = divmod(value, 32)
+        chars.append(ALPHABET[digit])
+    return PREFIX + "".join(reversed(chars))
+
+
+def _next_value() -> int:
+    from .models import InvitationCodeSequence
+
+    if connection.vendor == "postgresql":
+        # Draw from the table's own sequence without inserting a row
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id'))",
+                [InvitationCodeSequence._meta.db_table],
+            )
+            return cursor.fetchone()[0]
+    return InvitationCodeSequence.objects.create().pk
+
+
+def allocate_invite_code() -> str:
+    """A new, never-issued invitation code (one query)."""
+    return encode(_next_value())
@@ -2,7 +2,8 @@
 from django.contrib.auth.models import Group, Permission
 from django.db import models
 from django.contrib.auth.models import AbstractUser
-import uuid
+
+from .invite_codes import allocate_invite_code
 
 # -------------------------------------------
 #  CHOICES
@@ -18,12 +19,6 @@ GENDER_CHOICES = (
     ("other", "Other"),
 )
 
-# -------------------------------------------
-#  HELPERS
-# -------------------------------------------
-def generate_invitation_code():
-    return f"REN-{uuid.uuid4().hex[:8].upper()}"
-
 # -------------------------------------------
 #  USER MODEL
 # -------------------------------------------
@@ -74,6 +69,7 @@ class User(AbstractUser):
             models.Index(fields=["email"]),
             models.Index(fields=["invitation_code"]),
             models.Index(fields=["invites"]),
+            models.Index(fields=["date_joined", "id"]),
         ]
 
     def __str__(self):
@@ -84,7 +80,22 @@ class User(AbstractUser):
 
     def assign_invitation_code(self):
         if not self.invitation_code:
-            code = generate_invitation_code()
-            while User.objects.filter(invitation_code=code).exists():
-                code = generate_invitation_code()
-            self.invitation_code = code
+            self.invitation_code = allocate_invite_code()
+
+    def save(self, *args, **kwargs):
+        # Every creation path (signup, create_user, admin) gets a code
+        # in the same INSERT
+        if self._state.adding:
+            self.assign_invitation_code()
+        super().save(*args, **kwargs)
+
+
+# -------------------------------------------
+#  INVITATION CODE SEQUENCE
+# -------------------------------------------
+class InvitationCodeSequence(models.Model):
+    """
+    Source of invitation code numbers (see invite_codes.py). On Postgres
+    only the id sequence is used and the table stays empty.
+    """
+    id = models.BigAutoField(primary_key=True)
@@ -0,0 +1,86 @@
+# apps/accounts/reauth.py
+"""
+Step-up re-authentication.
+
+Sensitive actions (subscribe, withdraw, manual onboarding) ask for the
+password again. Rather than running PBKDF2 on every such request, one
+successful confirmation stores a signed, timestamped grant in the
+(cache-backed) session; until it is REAUTH_GRANT_SECONDS old, further
+sensitive requests are allowed on an HMAC check alone.
+
+A grant is bound to the user id and to get_session_auth_hash(), which is
+derived from the password hash, so changing the password revokes it.
+Password confirmations go through the login throttle, keyed per user.
+"""
+from django.conf import settings
+from django.contrib.auth import update_session_auth_hash
+from django.core import signing
+from django.utils.crypto import constant_time_compare
+
+from . import throttle
+
+SESSION_KEY = "_reauth_grant"
+SALT = "accounts.reauth"
+
+
+def _max_age() -> int:
+    return getattr(settings, "REAUTH_GRANT_SECONDS", 300)
+
+
+def _throttle_id(user) -> str:
+    return f"reauth:{user.pk}"
+
+
+def grant(request) -> None:
+    user = request.user
+    request.session[SESSION_KEY] = signing.dumps(
+        {"uid": user.pk, "auth": user.get_session_auth_hash()}, salt=SALT
+    )
+
+
+def revoke(request) -> None:
+    request.session.pop(SESSION_KEY, None)
+
+
+def has_grant(request) -> bool:
+    value = request.session.get(SESSION_KEY)
+    if not value:
+        return False
+    try:
+        data = signing.loads(value, salt=SALT, max_age=_max_age())
+    except signing.BadSignature:
+        # Expired (SignatureExpired is a subclass) or tampered
+        revoke(request)
+        return False
+
+    user = request.user
+    return data.get("uid") == user.pk and constant_time_compare(
+        data.get("auth", ""), user.get_session_auth_hash()
+    )
+
+
+def confirm_password(request, password) -> bool:
+    """
+    True if the request holds a live grant, or if `password` is correct
+    (which issues a fresh grant). Only the second case hashes.
+    """
+    if has_grant(request):
+        return True
+    if not password:
+        return False
+
+    user = request.user
+    if throttle.retry_after(request, _throttle_id(user)) is not None:
+        return False
+
+    stored = user.password
+    if user.check_password(password):
+        if user.password != stored:
+            # Rehashed on check (hasher settings changed): keep the session valid
+            update_session_auth_hash(request, user)
+        throttle.record_success(request, _throttle_id(user))
+        grant(request)
+        return True
+
+    throttle.record_failure(request, _throttle_id(user))
+    return False
@@ -0,0 +1,25 @@
+# apps/accounts/signals.py
+import logging
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import User
+from .signup import provision_user
+
+logger = logging.getLogger("accounts.signals")
+
+
+# -------------------------------
+# Provision users created outside the signup service
+# -------------------------------
+@receiver(post_save, sender=User)
+def provision_new_user(sender, instance, created, **kwargs):
+    if not created or getattr(instance, "_profiles_provisioned", False):
+        return
+    try:
+        provision_user(instance)
+    except Exception as e:
+        # Re-raised so the save fails instead of committing a user without profiles
+        logger.exception(f"Failed to provision profiles for user {instance.id}: {e}")
+        raise
@@ -0,0 +1,68 @@
+# apps/accounts/signup.py
+"""
+Single-pass signup.
+
+create_account() writes a new user and everything that hangs off it in one
+transaction, with one INSERT per table and no post_save fan-out:
+
+    User (invitation code allocated in the same INSERT)
+    dashboard UserProfile      \
+    admin_panel UserProfile     > provision_user(), bulk_create
+    dashboard TaskProgress     /
+    ai_core Invite (when invited)
+
+Users created any other way (createsuperuser, admin forms, create_user) are
+provisioned by the post_save receiver in accounts/signals.py. Instances
+saved through here carry _profiles_provisioned so that receiver stays out.
+"""
+from typing import Optional
+
+from django.db import transaction
+
+from .models import User
+
+
+def provision_user(user: User, inviter: Optional[User] = None) -> None:
+    """
+    Create both profiles and the TaskProgress row for a saved user.
+    Every row reuses the user's invitation code so referral links and
+    signup lookups agree. A unique clash raises IntegrityError and rolls
+    the signup back rather than leaving a user without a profile.
+    """
+    from apps.admin_panel.models import UserProfile as AdminProfile
+    from apps.dashboard.models import TaskProgress, UserProfile as DashboardProfile, default_phone_for
+
+    # Profile phones are editable, so another user may already hold this number
+    phone = user.account_number
+    if not phone or DashboardProfile.objects.filter(phone=phone).exists():
+        phone = default_phone_for(user.pk)
+
+    DashboardProfile.objects.bulk_create(
+        [DashboardProfile(user=user, phone=phone, invitation_code=user.invitation_code)]
+    )
+    AdminProfile.objects.bulk_create(
+        [AdminProfile(
+            user=user,
+            invitation_code=user.invitation_code,
+            invited_by=inviter.username if inviter else None,
+            account_number=user.account_number,
+        )]
+    )
+    TaskProgress.objects.bulk_create([TaskProgress(user=user)])
+
+
+def create_account(user: User, password: str, inviter: Optional[User] = None) -> User:
+    """Save an unsaved User with its profiles, progress and Invite link."""
+    from apps.ai_core.models import Invite
+
+    user.set_password(password)
+    user.invited_by = inviter
+    user._profiles_provisioned = True
+
+    with transaction.atomic():
+        user.save()
+        provision_user(user, inviter)
+        if inviter is not None:
+            Invite.objects.bulk_create([Invite(inviter=inviter, invitee=user)])
+
+    return user
@@ -0,0 +1,35 @@
+# apps/accounts/startup.py
+"""Startup hooks for accounts (see core/startup.py)."""
+import logging
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from core.startup import startup_hook
+
+logger = logging.getLogger("accounts.startup")
+
+
+@startup_hook("ensure_admin")
+def ensure_admin():
+    """Create the ADMIN_USERNAME superuser if it is configured and missing."""
+    username = settings.ADMIN_USERNAME
+    password = settings.ADMIN_PASSWORD
+    if not username or not password:
+        return
+
+    User = get_user_model()
+    if User.objects.filter(username=username).exists():
+        return
+
+    admin = User(
+        username=username,
+        email=getattr(settings, "ADMIN_EMAIL", "") or f"{username}@localhost",
+        is_staff=True,
+        is_superuser=True,
+        is_active=True,
+        account_number=getattr(settings, "ADMIN_PHONE", "") or None,
+    )
+    admin.set_password(password)
+    admin.save()
+    logger.info("Admin account %s created", username)
@@ -0,0 +1,123 @@
+# apps/accounts/throttle.py
+"""
+Sliding-window login throttle.
+
+Failed logins are recorded per client IP and per identifier (the
+username/email typed in) in Redis sorted sets scored by timestamp. Before a
+password is hashed, both windows are read in one pipeline; if either holds
+LOGIN_THROTTLE_*_LIMIT failures within LOGIN_THROTTLE_WINDOW seconds, the
+attempt is rejected without touching the database or the hasher.
+
+A successful login clears the identifier's window (not the IP's, so one
+valid account can't be used to reset a stuffing run). Without a Redis cache
+backend the same limits are applied as fixed windows through the cache.
+"""
+import hashlib
+import time
+import uuid
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _window() -> int:
+    return getattr(settings, "LOGIN_THROTTLE_WINDOW", 300)
+
+
+def _limits():
+    return (
+        getattr(settings, "LOGIN_THROTTLE_IP_LIMIT", 20),
+        getattr(settings, "LOGIN_THROTTLE_IDENTIFIER_LIMIT", 5),
+    )
+
+
+def client_ip(request) -> str:
+    """
+    The address the outermost trusted proxy saw. Each of the
+    LOGIN_THROTTLE_PROXY_HOPS proxies appends its peer to X-Forwarded-For,
+    so only the rightmost `hops` entries can be trusted; anything left of
+    them was sent by the client.
+    """
+    hops = getattr(settings, "LOGIN_THROTTLE_PROXY_HOPS", 0)
+    if hops > 0:
+        forwarded = [
+            part.strip() for part in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",")
+            if part.strip()
+        ]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.META.get("REMOTE_ADDR", "") or "unknown"
+
+
+def _keys(request, identifier: str):
+    digest = hashlib.sha256((identifier or "").strip().lower().encode()).hexdigest()[:32]
+    return f"login:fail:ip:{client_ip(request)}", f"login:fail:id:{digest}"
+
+
+def _redis():
+    if not settings.CACHES.get("default", {}).get("BACKEND", "").startswith("django_redis"):
+        return None
+    from django_redis import get_redis_connection
+
+    return get_redis_connection("default")
+
+
+def retry_after(request, identifier: str) -> Optional[int]:
+    """Seconds until another attempt is allowed, or None if it is allowed now."""
+    ip_limit, id_limit = _limits()
+    window = _window()
+    now = time.time()
+
+    redis = _redis()
+    if redis is None:
+        counts = cache.get_many(_keys(request, identifier))
+        blocked = [
+            key for key, limit in zip(_keys(request, identifier), (ip_limit, id_limit))
+            if counts.get(key, 0) >= limit
+        ]
+        return window if blocked else None
+
+    pipe = redis.pipeline()
+    for key in _keys(request, identifier):
+        pipe.zremrangebyscore(key, 0, now - window)
+        pipe.zcard(key)
+        pipe.zrange(key, 0, 0, withscores=True)
+    results = pipe.execute()
+
+    waits = []
+    for (_, count, oldest), limit in zip(
+        (results[i:i + 3] for i in range(0, len(results), 3)), (ip_limit, id_limit)
+    ):
+        if count >= limit and oldest:
+            waits.append(int(oldest[0][1] + window - now) + 1)
+    return max(waits) if waits else None
+
+
+def record_failure(request, identifier: str) -> None:
+    window = _window()
+    redis = _redis()
+    if redis is None:
+        for key in _keys(request, identifier):
+            cache.add(key, 0, window)
+            try:
+                cache.incr(key)
+            except ValueError:
+                pass
+        return
+
+    now = time.time()
+    pipe = redis.pipeline()
+    for key in _keys(request, identifier):
+        pipe.zadd(key, {f"{now}:{uuid.uuid4().hex[:8]}": now})
+        pipe.expire(key, window)
+    pipe.execute()
+
+
+def record_success(request, identifier: str) -> None:
+    _, identifier_key = _keys(request, identifier)
+    redis = _redis()
+    if redis is None:
+        cache.delete(identifier_key)
+    else:
+        redis.delete(identifier_key)
@@ -4,8 +4,8 @@ from django.contrib.auth import authenticate, login
 from django.contrib import messages
 from django.views.decorators.cache import never_cache
 from .forms import LoginForm
-from .models import User
 from .forms import LoginForm, SignupForm
+from .signup import create_account
 
 
 # ---------------------------------------------------
@@ -28,7 +28,11 @@ def login_view(request):
 
                 return redirect("dashboard:home")
 
-        messages.error(request, "Invalid username or password.")
+        wait = getattr(request, "login_retry_after", None)
+        if wait:
+            messages.error(request, f"Too many login attempts. Try again in {(wait + 59) // 60} minute(s).")
+        else:
+            messages.error(request, "Invalid username or password.")
     else:
         form = LoginForm()
 
@@ -52,13 +56,6 @@ def signup_view(request):
 
         if form.is_valid():
 
-            invited_by_code = form.cleaned_data.get("invited_by")
-            invited_by_user = User.objects.filter(invitation_code=invited_by_code).first()
-
-            if not invited_by_user:
-                messages.error(request, "Invalid invitation code.")
-                return redirect("accounts:signup")
-
             # Create user instance (not saved yet)
             user = form.save(commit=False)
 
@@ -70,18 +67,13 @@ def signup_view(request):
                 )
                 return redirect("accounts:signup")
 
-            # Set password & activate account
-            user.set_password(form.cleaned_data["password"])
             user.is_active = True
             user.subscription_status = "inactive"
-            user.invited_by = invited_by_user
-            # generate invitation code BEFORE saving
-            user.assign_invitation_code()
-
-            user.save()
+            # User, both profiles, TaskProgress and the Invite in one transaction
+            create_account(user, form.cleaned_data["password"], inviter=form.cleaned_data["invited_by"])
 
-            # Auto-login user
-            login(request, user)
+            # Auto-login user (two backends are configured, so name one)
+            login(request, user, backend="apps.accounts.auth_backend.FastAuthBackend")
 
             messages.success(request, "Account created successfully.")
             return redirect("accounts:success")
@@ -0,0 +1,109 @@
+# apps/admin_panel/exports.py
+"""
+Constant-memory exports for finance reconciliation.
+
+Rows are read with .values_list().iterator(chunk_size=...) in primary-key order
+and encoded one line at a time, so neither the ORM nor the response ever holds
+the whole table. Used by the export_view endpoint and the
+export_transactions management command.
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+from typing import Iterator, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from apps.ai_core.models import Transaction as AITransaction
+from apps.dashboard.models import LedgerEntry, Transaction as DashboardTransaction
+from .models import TransactionLog, PayrollEntry
+
+EXPORT_CHUNK_SIZE = 2000
+
+# source -> (model, date field, type field, columns)
+EXPORT_SOURCES = {
+    "transaction_log": (
+        TransactionLog, "created_at", "txn_type",
+        ["id", "created_at", "user_id", "user__username", "actor", "txn_type",
+         "amount", "status", "details", "processed_at"],
+    ),
+    "dashboard_transactions": (
+        DashboardTransaction, "created_at", "transaction_type",
+        ["id", "created_at", "user_id", "user__username", "transaction_type",
+         "amount", "status", "reference", "provider_reference", "confirmed_at"],
+    ),
+    "ai_transactions": (
+        AITransaction, "created_at", "tx_type",
+        ["id", "created_at", "user_id", "user__username", "tx_type",
+         "amount_ugx", "status", "tx_ref", "provider_reference", "sent_at"],
+    ),
+    "ledger": (
+        LedgerEntry, "created_at", "entry_type",
+        ["id", "created_at", "user_id", "user__username", "entry_type",
+         "amount", "reason", "reference"],
+    ),
+    "payroll": (
+        PayrollEntry, "created_at", None,
+        ["id", "created_at", "name", "account_number", "amount",
+         "auto_withdraw", "enabled"],
+    ),
+}
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _day_start(day) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def export_rows(source: str, start=None, end=None, txn_type: Optional[str] = None,
+                chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[tuple]:
+    """
+    Stream rows of a source as tuples (see export_columns()).
+    start / end are dates; end is inclusive.
+    """
+    model, date_field, type_field, columns = EXPORT_SOURCES[source]
+
+    qs = model.objects.all()
+    if start:
+        qs = qs.filter(**{f"{date_field}__gte": _day_start(start)})
+    if end:
+        qs = qs.filter(**{f"{date_field}__lt": _day_start(end + timedelta(days=1))})
+    if txn_type and type_field:
+        qs = qs.filter(**{type_field: txn_type})
+
+    return qs.order_by("pk").values_list(*columns).iterator(chunk_size=chunk_size)
+
+
+def export_columns(source: str) -> list:
+    return [c.replace("__", "_") for c in EXPORT_SOURCES[source][3]]
+
+
+class _Echo:
+    """File-like object whose write() just returns the line."""
+
+    def write(self, value):
+        return value
+
+
+def encode_csv(source: str, rows) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow(export_columns(source))
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def encode_ndjson(source: str, rows) -> Iterator[str]:
+    columns = export_columns(source)
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+def encode(fmt: str, source: str, rows) -> Iterator[str]:
+    if fmt == "ndjson":
+        return encode_ndjson(source, rows)
+    return encode_csv(source, rows)
@@ -0,0 +1,14 @@
+# apps/admin_panel/management/commands/backfill_log_partitions.py
+from django.core.management.base import BaseCommand
+
+from apps.ai_core.partitions import PARTITIONED_LOGS, backfill_partitions
+
+
+class Command(BaseCommand):
+    help = "Recompute the month partition of every log row from its timestamp."
+
+    def handle(self, *args, **options):
+        for model in PARTITIONED_LOGS:
+            changed = backfill_partitions(model)
+            self.stdout.write(f"{model._meta.db_table}: {changed} rows moved")
+        self.stdout.write(self.style.SUCCESS("Log partitions backfilled"))
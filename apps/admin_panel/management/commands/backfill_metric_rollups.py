@@ -0,0 +1,26 @@
+# apps/admin_panel/management/commands/backfill_metric_rollups.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.admin_panel.rollups import floor_hour, roll_up
+
+
+class Command(BaseCommand):
+    help = "Backfill hourly MetricRollup rows, one day at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=365)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        start = floor_hour(now - timedelta(days=options["days"]))
+
+        total = 0
+        while start < now:
+            end = min(start + timedelta(days=1), now)
+            total += roll_up(start, end)
+            start = end
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {total} hourly buckets"))
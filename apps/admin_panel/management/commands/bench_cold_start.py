@@ -0,0 +1,79 @@
+# apps/admin_panel/management/commands/bench_cold_start.py
+import json
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter: counts every SQL statement issued while
+# importing the WSGI module (and, optionally, while running the hooks).
+PROBE = r"""
+import json, os, sys, time
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+from django.db.backends import utils as db_utils
+
+queries = []
+_execute = db_utils.CursorWrapper._execute_with_wrappers
+
+def _counting(self, sql, params, many, executor):
+    queries.append(sql)
+    return _execute(self, sql, params, many, executor)
+
+db_utils.CursorWrapper._execute_with_wrappers = _counting
+
+started = time.perf_counter()
+import core.wsgi  # noqa: F401
+result = {"import_s": time.perf_counter() - started, "import_queries": len(queries)}
+
+if sys.argv[1] == "1":
+    from core.startup import run_startup_hooks
+    del queries[:]
+    started = time.perf_counter()
+    run_startup_hooks(force=True)
+    result.update(hooks_s=time.perf_counter() - started, hooks_queries=len(queries))
+
+print(json.dumps(result))
+"""
+
+
+class Command(BaseCommand):
+    help = "Measure WSGI cold start (import time and queries) in fresh interpreters."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument(
+            "--with-hooks", action="store_true",
+            help="Also time the startup hooks (what every worker paid before).",
+        )
+
+    def handle(self, *args, **options):
+        samples = []
+        for _ in range(options["runs"]):
+            proc = subprocess.run(
+                [sys.executable, "-c", PROBE, "1" if options["with_hooks"] else "0"],
+                cwd=settings.BASE_DIR, capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                raise CommandError(proc.stderr.strip() or "probe failed")
+            samples.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+        def report(label, seconds_key, queries_key):
+            seconds = [s[seconds_key] * 1000 for s in samples]
+            queries = max(s[queries_key] for s in samples)
+            self.stdout.write(
+                f"{label}: median {statistics.median(seconds):.1f} ms, "
+                f"min {min(seconds):.1f} ms, max {max(seconds):.1f} ms, queries {queries}"
+            )
+            return queries
+
+        import_queries = report("wsgi import", "import_s", "import_queries")
+        if options["with_hooks"]:
+            report("startup hooks", "hooks_s", "hooks_queries")
+
+        if import_queries:
+            self.stdout.write(self.style.WARNING(f"WSGI import issued {import_queries} queries"))
+        else:
+            self.stdout.write(self.style.SUCCESS("WSGI import issued no queries"))
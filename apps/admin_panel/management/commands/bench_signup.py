@@ -0,0 +1,70 @@
+# apps/admin_panel/management/commands/bench_signup.py
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.accounts.models import User
+from apps.accounts.signup import create_account
+
+
+def _new_user() -> User:
+    tag = uuid.uuid4().hex[:10]
+    return User(
+        username=f"bench-{tag}",
+        email=f"bench-{tag}@example.invalid",
+        account_number=f"+2569{int(tag, 16) % 10 ** 8:08d}",
+        gender="other",
+    )
+
+
+def _service(inviter):
+    create_account(_new_user(), "bench-password", inviter=inviter)
+
+
+def _receivers(inviter):
+    # A user saved directly, provisioned by the accounts post_save receiver
+    user = _new_user()
+    user.set_password("bench-password")
+    user.invited_by = inviter
+    user.save()
+
+
+SCENARIOS = {"service": _service, "receivers": _receivers}
+
+
+class Command(BaseCommand):
+    help = "Count queries and time per signup. Every signup is rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=20)
+        parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append")
+        parser.add_argument("--show-sql", action="store_true", help="Print the statements of the last run.")
+
+    def handle(self, *args, **options):
+        inviter = User.objects.order_by("id").first()
+
+        for name in options["scenario"] or list(SCENARIOS):
+            scenario = SCENARIOS[name]
+            counts, timings = [], []
+            captured = None
+
+            for _ in range(options["runs"]):
+                with transaction.atomic():
+                    with CaptureQueriesContext(connection) as captured:
+                        started = time.perf_counter()
+                        scenario(inviter)
+                        timings.append((time.perf_counter() - started) * 1000)
+                    counts.append(len(captured))
+                    transaction.set_rollback(True)
+
+            self.stdout.write(
+                f"{name}: {statistics.median(counts):.0f} queries/signup "
+                f"(max {max(counts)}), median {statistics.median(timings):.1f} ms"
+            )
+            if options["show_sql"] and captured is not None:
+                for query in captured.captured_queries:
+                    self.stdout.write(f"    {query['sql'][:160]}")
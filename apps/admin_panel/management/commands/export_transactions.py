@@ -0,0 +1,46 @@
+# apps/admin_panel/management/commands/export_transactions.py
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from apps.admin_panel.exports import (
+    EXPORT_FORMATS,
+    EXPORT_SOURCES,
+    encode,
+    export_rows,
+)
+
+
+class Command(BaseCommand):
+    help = "Stream a transaction / ledger / payroll export as CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", choices=sorted(EXPORT_SOURCES))
+        parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="csv")
+        parser.add_argument("--start", help="YYYY-MM-DD (inclusive)")
+        parser.add_argument("--end", help="YYYY-MM-DD (inclusive)")
+        parser.add_argument("--type", dest="txn_type", help="Filter on the transaction / entry type")
+        parser.add_argument("--output", help="File path (default: stdout)")
+
+    def handle(self, *args, **options):
+        start = self._date(options["start"])
+        end = self._date(options["end"])
+
+        rows = export_rows(options["source"], start, end, options["txn_type"])
+        lines = encode(options["format"], options["source"], rows)
+
+        if options["output"]:
+            with open(options["output"], "w", newline="", encoding="utf-8") as fh:
+                fh.writelines(lines)
+            self.stderr.write(self.style.SUCCESS(f"Export written to {options['output']}"))
+        else:
+            sys.stdout.writelines(lines)
+
+    def _date(self, value):
+        if not value:
+            return None
+        parsed = parse_date(value)
+        if not parsed:
+            raise CommandError(f"Invalid date: {value}")
+        return parsed
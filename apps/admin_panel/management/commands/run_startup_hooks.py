@@ -0,0 +1,31 @@
+# apps/admin_panel/management/commands/run_startup_hooks.py
+from django.core.management.base import BaseCommand, CommandError
+
+from core.startup import registered_hooks, run_startup_hooks
+
+
+class Command(BaseCommand):
+    help = "Run one-shot startup hooks (admin account, APIConfig seeding, cache warm-ups) for this deploy."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--only", nargs="+", metavar="HOOK", help="Run just these hooks.")
+        parser.add_argument("--force", action="store_true", help="Run even if this deploy already did.")
+        parser.add_argument("--list", action="store_true", help="List registered hooks and exit.")
+
+    def handle(self, *args, **options):
+        if options["list"]:
+            for name in registered_hooks():
+                self.stdout.write(name)
+            return
+
+        try:
+            timings = run_startup_hooks(only=options["only"], force=options["force"])
+        except KeyError as exc:
+            raise CommandError(exc.args[0])
+
+        if not timings:
+            self.stdout.write("Startup hooks already ran for this deploy (use --force to rerun)")
+            return
+        for name, seconds in timings.items():
+            self.stdout.write(f"{name}: {seconds * 1000:.1f} ms")
+        self.stdout.write(self.style.SUCCESS(f"Ran {len(timings)} startup hooks"))
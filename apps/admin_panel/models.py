@@ -5,8 +5,6 @@ from django.conf import settings
 from django.utils import timezone
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
-from django.dispatch import receiver
-from django.db.models.signals import post_save
 from datetime import timedelta
 import uuid
 User = get_user_model()
@@ -138,12 +136,6 @@ class UserProfile(models.Model):
         return f"Profile({self.user})"
 
 
-@receiver(post_save)
-def create_profile(sender, instance, created, **kwargs):
-    User = get_user_model()
-    if sender == User and created:
-        UserProfile.objects.get_or_create(user=instance)
-
 # ============================================================
 # REWARD LEDGER (SOURCE OF TRUTH)
 # ============================================================
@@ -366,3 +358,78 @@ class PayrollEntry(models.Model):
 
     def __str__(self):
         return f"{self.name} ({self.account_number}) - {self.amount}"
+
+# ============================================================
+# PAYROLL RUNS
+# ============================================================
+class PayrollRun(models.Model):
+    """
+    One payroll batch per date. Its transactions use deterministic tx_refs
+    (PAY-<YYYYMMDD>-<entry id>), so re-running a crashed run never creates
+    or sends a second transfer for the same entry.
+    """
+
+    STATUS_CHOICES = (
+        ("running", "Running"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    )
+
+    run_date = models.DateField(unique=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="running", db_index=True)
+
+    total_entries = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    dispatched_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-run_date"]
+
+    def __str__(self):
+        return f"Payroll {self.run_date} ({self.status})"
+
+    @property
+    def tx_ref_prefix(self) -> str:
+        return f"PAY-{self.run_date:%Y%m%d}-"
+
+
+# ============================================================
+# HOURLY METRIC ROLLUPS (ANALYTICS)
+# ============================================================
+class MetricRollup(models.Model):
+    """
+    Pre-aggregated hourly counters for the analytics graphs.
+    Maintained by the rollup_metrics Celery beat task.
+    """
+
+    SIGNUPS = "signups"
+    REFERRED_SIGNUPS = "referred_signups"
+    REWARDS = "rewards"
+    WITHDRAWALS = "withdrawals"
+
+    METRIC_CHOICES = (
+        (SIGNUPS, "Signups"),
+        (REFERRED_SIGNUPS, "Referred Signups"),
+        (REWARDS, "Rewards Credited"),
+        (WITHDRAWALS, "Withdrawals"),
+    )
+
+    metric = models.CharField(max_length=32, choices=METRIC_CHOICES)
+    bucket = models.DateTimeField(help_text="Start of the hour (UTC)")
+    count = models.PositiveIntegerField(default=0)
+    amount = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("metric", "bucket")
+        ordering = ["metric", "bucket"]
+
+    def __str__(self):
+        return f"{self.metric}@{self.bucket:%Y-%m-%d %H:00} = {self.count}"
@@ -0,0 +1,226 @@
+# apps/admin_panel/payroll.py
+"""
+Payroll batch engine.
+
+run_payroll() works in two resumable phases on a PayrollRun:
+
+1. materialise: enabled auto-withdraw PayrollEntry rows are turned into
+   pending payroll Transactions in chunks, via bulk_create(ignore_conflicts)
+   on deterministic tx_refs. Re-running inserts nothing twice.
+2. dispatch: pending transactions of the run are locked in chunks, flipped
+   to "queued" and handed to celery_process_withdrawal with countdowns from
+   a shared token bucket, so the transfer rate stays under Flutterwave's
+   limit without any worker sleeping. Each row gets dispatched_at as soon
+   as its task is enqueued.
+
+A crashed run is resumed by calling run_payroll() again for the same date.
+Rows still "pending", and rows left "queued" without dispatched_at (the
+crash hit between the flip and the enqueue), are dispatched again. The
+deterministic tx_ref makes a repeated send safe: Flutterwave rejects a
+second transfer with the same reference, and the worker skips rows that
+have already moved past "queued".
+
+Only one process runs a given date at a time (cache lock). The run's
+dispatched / failed counters are recomputed from its transactions, and
+transfer failures reported later by the worker or the reconciler update
+them through note_transfer_result().
+"""
+import logging
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.ai_core.models import Transaction
+from apps.ai_core.ratelimit import TokenBucket
+from .models import PayrollEntry, PayrollRun
+
+logger = logging.getLogger("admin_panel.payroll")
+
+PAYROLL_CHUNK_SIZE = 200
+PAYROLL_LOCK_TTL = 60 * 60
+
+
+def transfer_bucket() -> TokenBucket:
+    """Shared by everything that sends Flutterwave transfers."""
+    return TokenBucket(
+        "flutterwave_transfers",
+        rate=getattr(settings, "FLUTTERWAVE_TRANSFERS_PER_SECOND", 2),
+        burst=getattr(settings, "FLUTTERWAVE_TRANSFER_BURST", 5),
+    )
+
+
+def _entry_id(tx_ref: str, prefix: str) -> int:
+    return int(tx_ref[len(prefix):])
+
+
+# =====================================================
+# PHASE 1: MATERIALISE
+# =====================================================
+def materialise_run(run: PayrollRun) -> int:
+    prefix = run.tx_ref_prefix
+    entries = PayrollEntry.objects.filter(enabled=True, auto_withdraw=True, amount__gt=0)
+    last_id = 0
+
+    while True:
+        chunk = list(entries.filter(id__gt=last_id).order_by("id")[:PAYROLL_CHUNK_SIZE])
+        if not chunk:
+            break
+        last_id = chunk[-1].id
+
+        Transaction.objects.bulk_create(
+            [
+                Transaction(
+                    user=None,
+                    tx_type="payroll",
+                    amount_ugx=int(entry.amount),
+                    status="pending",
+                    tx_ref=f"{prefix}{entry.id}",
+                )
+                for entry in chunk
+            ],
+            ignore_conflicts=True,
+        )
+
+    totals = Transaction.objects.filter(tx_type="payroll", tx_ref__startswith=prefix).aggregate(
+        count=Count("id"), amount=Sum("amount_ugx")
+    )
+    PayrollRun.objects.filter(pk=run.pk).update(
+        total_entries=totals["count"],
+        total_amount=Decimal(totals["amount"] or 0),
+        created_count=totals["count"],
+    )
+    return totals["count"]
+
+
+# =====================================================
+# PHASE 2: DISPATCH
+# =====================================================
+def _run_transactions(prefix: str):
+    return Transaction.objects.filter(tx_type="payroll", tx_ref__startswith=prefix)
+
+
+def refresh_run_counts(run: PayrollRun) -> None:
+    counts = _run_transactions(run.tx_ref_prefix).aggregate(
+        dispatched=Count("id", filter=Q(dispatched_at__isnull=False)),
+        failed=Count("id", filter=Q(status="failed")),
+    )
+    PayrollRun.objects.filter(pk=run.pk).update(
+        dispatched_count=counts["dispatched"], failed_count=counts["failed"]
+    )
+
+
+def note_transfer_result(tx_ref: str) -> None:
+    """Called when a payroll transfer reaches a final status outside the run."""
+    if not (tx_ref or "").startswith("PAY-"):
+        return
+    try:
+        run_date = datetime.strptime(tx_ref.split("-")[1], "%Y%m%d").date()
+    except (IndexError, ValueError):
+        return
+    run = PayrollRun.objects.filter(run_date=run_date).first()
+    if run:
+        refresh_run_counts(run)
+
+
+def requeue_undispatched(run: PayrollRun) -> int:
+    """Rows flipped to queued whose task was never enqueued go back to pending."""
+    return _run_transactions(run.tx_ref_prefix).filter(
+        status="queued", dispatched_at__isnull=True
+    ).update(status="pending")
+
+
+def _dispatch_chunk(run: PayrollRun, bucket: TokenBucket) -> int:
+    from apps.ai_core.transactions import celery_process_withdrawal
+
+    prefix = run.tx_ref_prefix
+    account_bank = getattr(settings, "PAYROLL_ACCOUNT_BANK", "MPS")
+
+    with transaction.atomic():
+        txs = list(
+            _run_transactions(prefix)
+            .select_for_update(skip_locked=True)
+            .filter(status="pending")
+            .order_by("id")
+            .only("id", "tx_ref", "amount_ugx")[:PAYROLL_CHUNK_SIZE]
+        )
+        if not txs:
+            return 0
+
+        accounts = dict(
+            PayrollEntry.objects
+            .filter(id__in=[_entry_id(tx.tx_ref, prefix) for tx in txs])
+            .values_list("id", "account_number")
+        )
+        Transaction.objects.filter(pk__in=[tx.pk for tx in txs]).update(status="queued")
+
+    for tx, delay in zip(txs, bucket.reserve(len(txs))):
+        account_number = accounts.get(_entry_id(tx.tx_ref, prefix))
+        try:
+            if not account_number:
+                raise ValueError("payroll entry no longer exists")
+            celery_process_withdrawal.apply_async(
+                (tx.id, account_bank, account_number, tx.amount_ugx),
+                countdown=delay,
+            )
+        except Exception as exc:
+            logger.exception("Payroll dispatch failed for %s", tx.tx_ref)
+            Transaction.objects.filter(pk=tx.pk, status="queued").update(
+                status="failed", failure_reason=f"Dispatch failed: {exc}"[:1000]
+            )
+            PayrollRun.objects.filter(pk=run.pk).update(last_error=f"{tx.tx_ref}: {exc}"[:2000])
+            continue
+        # Per row, straight after the enqueue: a crash can re-send at most this one
+        Transaction.objects.filter(pk=tx.pk).update(dispatched_at=timezone.now())
+
+    refresh_run_counts(run)
+    return len(txs)
+
+
+def dispatch_run(run: PayrollRun) -> None:
+    requeue_undispatched(run)
+    bucket = transfer_bucket()
+    while _dispatch_chunk(run, bucket):
+        pass
+
+
+# =====================================================
+# ENTRY POINT
+# =====================================================
+def run_payroll(run_date=None) -> Optional[PayrollRun]:
+    run_date = run_date or timezone.localdate()
+    run, _ = PayrollRun.objects.get_or_create(run_date=run_date)
+
+    if run.status == "completed":
+        logger.info("Payroll for %s already completed", run_date)
+        return run
+
+    # requeue_undispatched() is only safe while no other dispatcher runs this date
+    lock_key = f"payroll:run:{run_date:%Y%m%d}"
+    if not cache.add(lock_key, 1, PAYROLL_LOCK_TTL):
+        logger.warning("Payroll for %s is already running elsewhere", run_date)
+        return run
+
+    PayrollRun.objects.filter(pk=run.pk).update(status="running")
+    try:
+        materialise_run(run)
+        dispatch_run(run)
+    except Exception as exc:
+        logger.exception("Payroll run %s failed", run_date)
+        PayrollRun.objects.filter(pk=run.pk).update(status="failed", last_error=str(exc)[:2000])
+        raise
+    finally:
+        cache.delete(lock_key)
+
+    PayrollRun.objects.filter(pk=run.pk).update(status="completed", finished_at=timezone.now())
+    run.refresh_from_db()
+    logger.info(
+        "Payroll %s completed: entries=%s dispatched=%s failed=%s amount=%s",
+        run_date, run.total_entries, run.dispatched_count, run.failed_count, run.total_amount,
+    )
+    return run
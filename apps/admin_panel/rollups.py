@@ -0,0 +1,152 @@
+# apps/admin_panel/rollups.py
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db.models import Count, Sum, Value, DecimalField
+from django.db.models.functions import TruncHour, TruncDay, TruncMonth
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.dashboard.models import LedgerEntry, Transaction
+from .models import MetricRollup
+
+logger = logging.getLogger(__name__)
+
+UTC = dt_timezone.utc
+
+# How far back each incremental run re-aggregates (covers slow commits)
+LOOKBACK_HOURS = 2
+
+# Ledger credits that are not task / offer rewards
+NON_REWARD_CREDIT_REASONS = ("deposit", "subscription")
+
+
+# =====================================================
+# SOURCES
+# =====================================================
+def _sources():
+    """
+    metric -> (queryset, timestamp field, amount field or None).
+    Every source is date-bounded by the caller.
+    """
+    return {
+        MetricRollup.SIGNUPS: (User.objects.all(), "date_joined", None),
+        MetricRollup.REFERRED_SIGNUPS: (
+            User.objects.filter(invited_by__isnull=False), "date_joined", None
+        ),
+        MetricRollup.REWARDS: (
+            LedgerEntry.objects.filter(entry_type="credit")
+            .exclude(reason__in=NON_REWARD_CREDIT_REASONS),
+            "created_at",
+            "amount",
+        ),
+        MetricRollup.WITHDRAWALS: (
+            Transaction.objects.filter(transaction_type="withdraw"),
+            "created_at",
+            "amount",
+        ),
+    }
+
+
+def floor_hour(dt: datetime) -> datetime:
+    return dt.astimezone(UTC).replace(minute=0, second=0, microsecond=0)
+
+
+# =====================================================
+# ROLLUP (WRITE SIDE)
+# =====================================================
+def roll_up(start: datetime, end: datetime) -> int:
+    """
+    Recompute hourly buckets in [start, end) for every metric and upsert them.
+    Cost is bounded by the rows inside the window, never the whole table.
+    """
+    start, end = floor_hour(start), end
+    written = 0
+
+    for metric, (qs, ts_field, amount_field) in _sources().items():
+        amount = (
+            Sum(amount_field)
+            if amount_field
+            else Value(Decimal("0"), output_field=DecimalField())
+        )
+        rows = (
+            qs.filter(**{f"{ts_field}__gte": start, f"{ts_field}__lt": end})
+            .order_by()
+            .annotate(bucket=TruncHour(ts_field, tzinfo=UTC))
+            .values("bucket")
+            .annotate(count=Count("pk"), amount=amount)
+        )
+
+        rollups = [
+            MetricRollup(
+                metric=metric,
+                bucket=row["bucket"],
+                count=row["count"],
+                amount=row["amount"] or 0,
+            )
+            for row in rows
+        ]
+        MetricRollup.objects.bulk_create(
+            rollups,
+            update_conflicts=True,
+            unique_fields=["metric", "bucket"],
+            update_fields=["count", "amount", "updated_at"],
+        )
+
+        # Hours that no longer have source rows go back to zero
+        (
+            MetricRollup.objects
+            .filter(metric=metric, bucket__gte=start, bucket__lt=end)
+            .exclude(bucket__in=[r.bucket for r in rollups])
+            .update(count=0, amount=0)
+        )
+        written += len(rollups)
+
+    return written
+
+
+def roll_up_recent() -> int:
+    now = timezone.now()
+    return roll_up(floor_hour(now) - timedelta(hours=LOOKBACK_HOURS), now)
+
+
+# =====================================================
+# SERIES (READ SIDE)
+# =====================================================
+RANGES = {
+    # range -> (window, truncation, label format)
+    "day": (timedelta(days=1), None, "%H:%M"),
+    "week": (timedelta(days=7), TruncDay, "%Y-%m-%d"),
+    "month": (timedelta(days=30), TruncDay, "%Y-%m-%d"),
+    "year": (timedelta(days=365), TruncMonth, "%Y-%m"),
+}
+
+
+def metric_series(metric: str, range_type: str) -> dict:
+    """
+    Chart series for a metric over a range.
+    Reads at most 24 * 365 rollup rows, whatever the size of the source tables.
+    """
+    window, trunc, fmt = RANGES.get(range_type, RANGES["week"])
+    start = floor_hour(timezone.now() - window)
+
+    qs = MetricRollup.objects.filter(metric=metric, bucket__gte=start)
+
+    if trunc is None:
+        rows = qs.order_by("bucket").values("bucket", "count")
+        points = [(r["bucket"], r["count"]) for r in rows]
+    else:
+        rows = (
+            qs.order_by()
+            .annotate(period=trunc("bucket"))
+            .values("period")
+            .annotate(total=Sum("count"))
+            .order_by("period")
+        )
+        points = [(r["period"], r["total"]) for r in rows]
+
+    return {
+        "labels": [timezone.localtime(p).strftime(fmt) for p, _ in points],
+        "values": [v for _, v in points],
+    }
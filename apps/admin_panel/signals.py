@@ -2,7 +2,7 @@
 import logging
 from datetime import timedelta
 
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 from django.contrib.auth import get_user_model
@@ -15,23 +15,6 @@ logger = logging.getLogger("admin_panel.signals")
 User = get_user_model()
 
 
-# --------------------------------------------------
-# Automatically create UserProfile for new users
-# --------------------------------------------------
-@receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
-    if created:
-        try:
-            UserProfile.objects.get_or_create(user=instance)
-            logger.info(
-                f"AdminPanel: UserProfile created for user {instance.id}"
-            )
-        except Exception as e:
-            logger.exception(
-                f"AdminPanel: Failed to create UserProfile for user {instance.id}: {e}"
-            )
-
-
 # --------------------------------------------------
 # Reset trial status if expired
 # --------------------------------------------------
@@ -0,0 +1,43 @@
+# apps/admin_panel/tasks.py
+import logging
+from celery import shared_task
+from django.utils.dateparse import parse_date
+
+from .rollups import roll_up_recent
+from .payroll import run_payroll
+
+logger = logging.getLogger(__name__)
+
+
+# -----------------------------------------------------
+# ANALYTICS ROLLUPS
+# -----------------------------------------------------
+@shared_task(bind=True, ignore_result=True)
+def rollup_metrics(self):
+    """
+    Runs every 10 minutes.
+    Re-aggregates the last couple of hours into MetricRollup.
+    """
+    written = roll_up_recent()
+    logger.info("Metric rollups refreshed: %s buckets", written)
+    return {"buckets": written}
+
+
+# -----------------------------------------------------
+# PAYROLL
+# -----------------------------------------------------
+@shared_task(bind=True)
+def run_sunday_payroll(self, run_date: str = None):
+    """
+    Runs every Sunday at 00:00.
+    Creates (or resumes) the PayrollRun for the date and dispatches its
+    transfers through the shared Flutterwave rate limiter.
+    """
+    run = run_payroll(parse_date(run_date) if run_date else None)
+    return {
+        "run_date": str(run.run_date),
+        "status": run.status,
+        "entries": run.total_entries,
+        "dispatched": run.dispatched_count,
+        "failed": run.failed_count,
+    }
@@ -6,11 +6,13 @@ app_name = "admin_panel"
 
 urlpatterns = [
     path("", views.admin_dashboard, name="dashboard"),
+    path("api/users/", views.users_api, name="users_api"),
 
     path("manual-login/", views.manual_login_view, name="manual_login"),
     path("verify-admin-password/", views.verify_admin_password, name="verify_admin_password"),
     path("graphs/", views.graphs_view, name="graphs"),
     path("transactions/", views.transaction_page, name="transactions"),
+    path("transactions/export/", views.export_view, name="export"),
 
     path("settings/", views.admin_settings_view, name="settings"),
     path("gift-upload/", views.gift_upload_view, name="gift_upload"),
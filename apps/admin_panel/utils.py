@@ -2,7 +2,6 @@
 import logging
 import random
 import string
-import uuid
 from django.conf import settings
 from .models import PendingManualUser
 import logging
@@ -28,11 +27,6 @@ def clear_pending_manual_users():
 # OTP / CODE GENERATORS
 # =====================================================
 
-def generate_invitation_code() -> str:
-    """Generate unique invitation code"""
-    return uuid.uuid4().hex[:10].upper()
-
-
 def generate_temporary_password(length: int = 10) -> str:
     """Generate secure temporary password"""
     chars = string.ascii_letters + string.digits
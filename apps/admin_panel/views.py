@@ -3,6 +3,8 @@ from .utils import clear_pending_manual_users
 from .forms import PayrollEntryForm
 from django.db import transaction
 import re
+import json
+import uuid
 from datetime import timedelta
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
@@ -10,7 +12,12 @@ from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.utils import timezone
-from django.db.models import Sum, Count
+from django.db.models import Sum, Q
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_date, parse_datetime
 from .models import AdminNotification
 from .forms import PendingManualUserForm, GiftOfferForm, AdminSettingsForm
 from django.utils.timezone import now
@@ -23,14 +30,20 @@ from .models import (
     RewardLog,
     TransactionLog,
     AdminLoginAudit,
+    MetricRollup,
 )
+from .rollups import RANGES, metric_series
+from .exports import EXPORT_FORMATS, EXPORT_SOURCES, encode, export_rows
+from apps.dashboard.ledger import post_adjustment
+from apps.dashboard.models import UserProfile as DashboardProfile, default_phone_for
+from apps.dashboard.summary import schedule_summary_refresh
 
-from .utils import (
-    generate_invitation_code,
-    generate_temporary_password,
-)
+from .utils import generate_temporary_password
 from .models import TaskControl
 from apps.accounts.models import User
+from apps.accounts import reauth
+from apps.accounts.invite_codes import allocate_invite_code
+from apps.accounts.forms import normalize_phone
 import resource
 import logging
 from decimal import Decimal
@@ -68,24 +81,128 @@ def admin_logout(request):
 # =====================================================
 # 1️⃣ USERS DASHBOARD
 # =====================================================
-def admin_dashboard(request):
-    users = (
+USERS_PAGE_SIZE = 50
+TRANSACTIONS_PAGE_SIZE = 50
+USERS_SUMMARY_CACHE_KEY = "admin_panel:users_summary"
+USERS_SUMMARY_TTL = 60
+
+
+def users_summary():
+    """Total users + total balance, cached instead of aggregated per page."""
+    def compute():
+        return {
+            "user_count": User.objects.count(),
+            "total_balance": UserProfile.objects.aggregate(total=Sum("balance"))["total"] or 0,
+        }
+    return cache.get_or_set(USERS_SUMMARY_CACHE_KEY, compute, USERS_SUMMARY_TTL)
+
+
+def _encode_cursor(user) -> str:
+    return f"{user.date_joined.isoformat()}|{user.id}"
+
+
+def _decode_cursor(cursor: str):
+    try:
+        joined, user_id = cursor.rsplit("|", 1)
+        joined = parse_datetime(joined)
+        return (joined, int(user_id)) if joined else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _search_filter(q: str) -> Q:
+    """Exact / prefix matches only, so each branch can use its index."""
+    lookup = (
+        Q(username__startswith=q)
+        | Q(email=q)
+        | Q(email=q.lower())
+        | Q(invitation_code=q)
+        | Q(invitation_code=q.upper())
+        | Q(account_number=q)
+    )
+    try:
+        lookup |= Q(account_number=normalize_phone(q))
+    except ValidationError:
+        pass
+    return lookup
+
+
+def user_page(q: str = "", cursor: str = "", limit: int = USERS_PAGE_SIZE):
+    """
+    Keyset page of users, newest first, ordered by (date_joined, id).
+    Returns (rows, next_cursor).
+    """
+    qs = (
         User.objects
-        .select_related("profile")   # for balance, age, etc
+        .select_related("profile")
         .only(
-            "id", "username", "email",
-            "invites", "subscription_status",
-            "date_joined"
+            "id", "username", "email", "first_name", "last_name",
+            "invites", "subscription_status", "date_joined", "balance",
+            "profile__balance", "profile__trial_expiry", "profile__age",
+            "profile__gender", "profile__account_number",
+            "profile__invitation_code", "profile__invited_by",
+            "profile__subscription_status",
         )
+        .order_by("-date_joined", "-id")
     )
 
-    total_balance = UserProfile.objects.aggregate(total=Sum("balance"))["total"] or 0
+    q = (q or "").strip()
+    if q:
+        qs = qs.filter(_search_filter(q))
+
+    position = _decode_cursor(cursor) if cursor else None
+    if position:
+        joined, user_id = position
+        qs = qs.filter(Q(date_joined__lt=joined) | Q(date_joined=joined, id__lt=user_id))
+
+    users = list(qs[:limit + 1])
+    has_more = len(users) > limit
+    users = users[:limit]
+
+    next_cursor = _encode_cursor(users[-1]) if has_more else None
+    return [_serialize_user(u) for u in users], next_cursor
+
+
+def _serialize_user(user) -> dict:
+    profile = getattr(user, "profile", None)
+    return {
+        "id": user.id,
+        "username": user.username,
+        "name": user.get_full_name() or user.username,
+        "email": user.email,
+        "invites": user.invites,
+        "balance": str(safe_profile_value(user, "balance", 0)),
+        "trial_expiry": profile.trial_expiry.strftime("%b %d, %Y") if profile and profile.trial_expiry else "—",
+        "age": getattr(profile, "age", None) or "",
+        "gender": getattr(profile, "gender", None) or "",
+        "account_number": getattr(profile, "account_number", None) or "",
+        "invitation_code": getattr(profile, "invitation_code", None) or "",
+        "invited_by": getattr(profile, "invited_by", None) or "",
+        "subscription_status": getattr(profile, "subscription_status", None) or user.subscription_status,
+    }
+
+
+def admin_dashboard(request):
+    users, next_cursor = user_page(request.GET.get("q", ""))
 
     return render(request, "users.html", {
         "users": users,
-        "total_balance": total_balance,
-        "safe": safe_profile_value,
+        "next_cursor": next_cursor,
+        "search": request.GET.get("q", ""),
+        **users_summary(),
     })
+
+
+@login_required
+@staff_member_required
+def users_api(request):
+    users, next_cursor = user_page(
+        request.GET.get("q", ""),
+        request.GET.get("cursor", ""),
+    )
+    return JsonResponse({"users": users, "next": next_cursor})
+
+
 @login_required
 @staff_member_required
 def update_user(request, user_id):
@@ -141,9 +258,16 @@ def change_balance(request, user_id):
 
     new_amount = Decimal(request.POST.get("balance"))
 
-    old = profile.balance
+    # The wallet is the dashboard profile: move it through the ledger
+    wallet, _ = DashboardProfile.objects.select_for_update().get_or_create(
+        user=user, defaults={"phone": default_phone_for(user.id)}
+    )
+    old = wallet.balance
+    post_adjustment(user.id, new_amount - old, "admin_adjustment", f"admin:{uuid.uuid4().hex}")
+
     profile.balance = new_amount
     profile.save(update_fields=["balance"])
+    schedule_summary_refresh(user.id)
 
     TransactionLog.objects.create(
         user=user,
@@ -161,78 +285,17 @@ def change_balance(request, user_id):
 @login_required
 @staff_member_required
 def graphs_view(request):
-    from django.db.models.functions import TruncHour, TruncDay, TruncMonth
-
     range_type = request.GET.get("range", "week")
-    now = timezone.now()
-
-    # ---------------------------
-    # USER GROWTH (DYNAMIC)
-    # ---------------------------
-    if range_type == "day":
-        start = now - timedelta(days=1)
-        growth_qs = (
-            User.objects.filter(date_joined__gte=start)
-            .annotate(period=TruncHour("date_joined"))
-            .values("period")
-            .annotate(count=Count("id"))
-            .order_by("period")
-        )
+    if range_type not in RANGES:
+        range_type = "week"
 
-    elif range_type == "month":
-        start = now - timedelta(days=30)
-        growth_qs = (
-            User.objects.filter(date_joined__gte=start)
-            .annotate(period=TruncDay("date_joined"))
-            .values("period")
-            .annotate(count=Count("id"))
-            .order_by("period")
-        )
-
-    elif range_type == "year":
-        start = now - timedelta(days=365)
-        growth_qs = (
-            User.objects.filter(date_joined__gte=start)
-            .annotate(period=TruncMonth("date_joined"))
-            .values("period")
-            .annotate(count=Count("id"))
-            .order_by("period")
-        )
-
-    else:  # week (default)
-        start = now - timedelta(days=7)
-        growth_qs = (
-            User.objects.filter(date_joined__gte=start)
-            .annotate(period=TruncDay("date_joined"))
-            .values("period")
-            .annotate(count=Count("id"))
-            .order_by("period")
-        )
-
-    user_growth_data = {
-        "labels": [g["period"].strftime("%Y-%m-%d %H:%M") for g in growth_qs],
-        "values": [g["count"] for g in growth_qs],
-    }
-
-    # ---------------------------
-    # REFERRAL RATE (PER HOUR)
-    # ---------------------------
-    referral_qs = (
-        User.objects.filter(invited_by__isnull=False)
-        .annotate(hour=TruncHour("date_joined"))
-        .values("hour")
-        .annotate(count=Count("id"))
-        .order_by("hour")
-    )
-
-    referral_data = {
-        "labels": [r["hour"].strftime("%H:%M") for r in referral_qs],
-        "values": [r["count"] for r in referral_qs],
-    }
+    # Served from hourly rollups: constant cost whatever the table sizes
+    user_growth_data = metric_series(MetricRollup.SIGNUPS, range_type)
+    referral_data = metric_series(MetricRollup.REFERRED_SIGNUPS, range_type)
 
     return render(request, "graphs.html", {
-        "user_growth_data": user_growth_data,
-        "referral_data": referral_data,
+        "user_growth_data": json.dumps(user_growth_data),
+        "referral_data": json.dumps(referral_data),
         "range_type": range_type,
     })
 
@@ -253,18 +316,57 @@ def transaction_page(request):
     else:
         form = PayrollEntryForm()
 
-    transactions = TransactionLog.objects.select_related("user").all()
-    system_logs = TransactionLog.objects.filter(txn_type="system")
-    payrolls = PayrollEntry.objects.all()
+    # Paginated: full history goes through export_view instead
+    transactions = Paginator(
+        TransactionLog.objects.select_related("user").order_by("-id"),
+        TRANSACTIONS_PAGE_SIZE,
+    ).get_page(request.GET.get("page"))
+    system_logs = Paginator(
+        TransactionLog.objects.filter(txn_type="system").order_by("-id"),
+        TRANSACTIONS_PAGE_SIZE,
+    ).get_page(request.GET.get("logs_page"))
+    payrolls = Paginator(
+        PayrollEntry.objects.order_by("-id"),
+        TRANSACTIONS_PAGE_SIZE,
+    ).get_page(request.GET.get("payroll_page"))
 
     return render(request, "transactions.html", {
         "transactions": transactions,
         "logs": system_logs,
         "payrolls": payrolls,
         "form": form,   # ✅ THIS WAS MISSING
+        "export_sources": sorted(EXPORT_SOURCES),
     })
 
 
+@login_required
+@staff_member_required
+def export_view(request):
+    """
+    Streams an export in constant memory.
+    ?source=ledger&format=csv|ndjson&start=YYYY-MM-DD&end=YYYY-MM-DD&type=...
+    """
+    source = request.GET.get("source", "transaction_log")
+    fmt = request.GET.get("format", "csv")
+    if source not in EXPORT_SOURCES or fmt not in EXPORT_FORMATS:
+        return JsonResponse({"error": "Unknown source or format"}, status=400)
+
+    try:
+        start = parse_date(request.GET.get("start") or "")
+        end = parse_date(request.GET.get("end") or "")
+    except ValueError:
+        return JsonResponse({"error": "Invalid date"}, status=400)
+
+    rows = export_rows(source, start, end, request.GET.get("type") or None)
+    response = StreamingHttpResponse(
+        encode(fmt, source, rows),
+        content_type=EXPORT_FORMATS[fmt],
+    )
+    filename = f"{source}_{timezone.localdate():%Y%m%d}.{fmt}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
 # =====================================================
 # MANUAL USER ONBOARDING
 # =====================================================
@@ -333,9 +435,9 @@ def verify_admin_password(request):
 
     if request.method == "POST":
         password = request.POST.get("password")
-        if not request.user.check_password(password):
+        if not reauth.confirm_password(request, password):
             messages.error(request, "Invalid admin password.")
-            return render(request, "verify_admin_password.html")
+            return render(request, "verify_admin_password.html", {"reauth_active": reauth.has_grant(request)})
 
         with transaction.atomic():
             # Generate a unique username from name
@@ -350,10 +452,7 @@ def verify_admin_password(request):
             if User.objects.filter(account_number=pending.account_number).exists():
                  messages.error(request, "Phone number already exists.")
                  return redirect("admin_panel:manual_login")
-            # Generate unique invitation code
-            invite = generate_invitation_code()
-            while UserProfile.objects.filter(invitation_code=invite).exists():
-                invite = generate_invitation_code()
+            invite = allocate_invite_code()
 
             temp_password = generate_temporary_password()
 
@@ -376,9 +475,8 @@ def verify_admin_password(request):
             profile.subscription_status = "active"
             profile.subscription_expiry = timezone.now() + timedelta(days=30)
             profile.invited_by = request.user.username
-            profile.save()
             profile.invitation_code = user.invitation_code
-            profile.save(update_fields=["invitation_code"])
+            profile.save()
 
             # Log admin notification
             AdminNotification.objects.create(
@@ -410,7 +508,7 @@ def verify_admin_password(request):
 
         return redirect("admin_panel:user_created_success")
 
-    return render(request, "verify_admin_password.html")
+    return render(request, "verify_admin_password.html", {"reauth_active": reauth.has_grant(request)})
 @login_required
 @staff_member_required
 def user_created_success(request):
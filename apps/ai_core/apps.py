@@ -10,4 +10,7 @@ class AiCoreConfig(AppConfig):
 
     def ready(self):
         # Correct relative import
-        from . import signals  # noqa: F401
\ No newline at end of file
+        from . import signals  # noqa: F401
+        from .utils import validate_encryption_key
+
+        validate_encryption_key()
\ No newline at end of file
@@ -0,0 +1,46 @@
+# apps/ai_core/cache_keys.py
+"""
+Versioned cache keys for the task catalogue.
+
+Every catalogue key embeds the current generation number. A refresh bumps
+the generation (one INCR), so new reads miss and rebuild while the old
+entries simply expire on their own TTL. Nothing is ever flushed, so
+sessions and unrelated caches sharing the Redis instance are untouched.
+"""
+import time
+
+from django.core.cache import cache
+
+CATALOGUE_GENERATION_KEY = "catalogue:generation"
+
+
+def _seed() -> int:
+    # Seeded from the clock so that, if the counter is evicted, the new
+    # generation is still greater than any generation used before
+    return int(time.time() * 1000)
+
+
+def catalogue_generation() -> int:
+    generation = cache.get(CATALOGUE_GENERATION_KEY)
+    if generation is None:
+        cache.add(CATALOGUE_GENERATION_KEY, _seed(), None)
+        generation = cache.get(CATALOGUE_GENERATION_KEY) or _seed()
+    return int(generation)
+
+
+def bump_catalogue_generation() -> int:
+    """Invalidate every catalogue key at once."""
+    try:
+        return cache.incr(CATALOGUE_GENERATION_KEY)
+    except ValueError:
+        # Counter missing (never set or evicted)
+        cache.add(CATALOGUE_GENERATION_KEY, _seed(), None)
+        return catalogue_generation()
+
+
+def api_tasks_key(provider=None) -> str:
+    return f"api_tasks:{catalogue_generation()}:{provider or 'all'}"
+
+
+def user_tasks_key(user_id, day) -> str:
+    return f"tasks:{catalogue_generation()}:{user_id}:{day}"
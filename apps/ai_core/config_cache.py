@@ -0,0 +1,155 @@
+# apps/ai_core/config_cache.py
+"""
+Process-local cache of decrypted APIConfig rows.
+
+get_api_config(name) reads and decrypts a row at most once per
+API_CONFIG_CACHE_TTL in each process. A missing or inactive row is
+remembered for API_CONFIG_NEGATIVE_TTL only, so a config added later is
+picked up quickly.
+
+Saving or deleting an APIConfig publishes its name on a Redis channel once
+the transaction commits. A daemon listener thread in every process drops
+the local entry on receipt, so rotated keys are live everywhere within
+seconds; the TTL bounds staleness if a message is ever missed. Only the
+name is broadcast: decrypted secrets never leave the process.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger("ai_core.config_cache")
+
+CHANNEL = "ai_core:apiconfig:invalidate"
+SECRET_FIELDS = ("secret_key", "public_key", "webhook_secret")
+LISTENER_RETRY_SECONDS = 5
+
+# normalised name -> (monotonic expiry, decrypted config or None)
+_entries: Dict[str, Tuple[float, Optional[Dict[str, Any]]]] = {}
+_lock = threading.Lock()
+_listener_pid: Optional[int] = None
+
+
+def _ttl() -> int:
+    return getattr(settings, "API_CONFIG_CACHE_TTL", 300)
+
+
+def _negative_ttl() -> int:
+    return getattr(settings, "API_CONFIG_NEGATIVE_TTL", 30)
+
+
+def _key(name: str) -> str:
+    return (name or "").strip().lower()
+
+
+def _load(name: str) -> Optional[Dict[str, Any]]:
+    from .models import APIConfig
+    from .utils import decrypt_value
+
+    config = APIConfig.objects.filter(name__iexact=name, is_active=True).first()
+    if config is None:
+        return None
+
+    data: Dict[str, Any] = {
+        "name": config.name,
+        "base_url": (config.base_url or "").rstrip("/"),
+        "updated_at": config.updated_at,
+    }
+    for field in SECRET_FIELDS:
+        raw = getattr(config, field)
+        data[field] = decrypt_value(raw) if raw else None
+    return data
+
+
+def get_api_config(name: str) -> Optional[Dict[str, Any]]:
+    """
+    Decrypted config for an active APIConfig row, or None.
+    Database errors propagate and are not cached.
+    """
+    _ensure_listener()
+    key = _key(name)
+
+    entry = _entries.get(key)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+
+    # One load (and decrypt) per process, however many threads miss at once.
+    # invalidate_local() takes the same lock, so an invalidation arriving
+    # mid-load is applied after the entry is stored, never before.
+    with _lock:
+        entry = _entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        value = _load(name)
+        ttl = _ttl() if value else _negative_ttl()
+        _entries[key] = (time.monotonic() + ttl, value)
+    return value
+
+
+def invalidate_local(name: Optional[str] = None) -> None:
+    """Drop one entry (or all of them) from this process only."""
+    with _lock:
+        if name is None:
+            _entries.clear()
+        else:
+            _entries.pop(_key(name), None)
+
+
+def publish_invalidation(name: str) -> None:
+    """Drop the entry here and in every other process."""
+    invalidate_local(name)
+    if not _pubsub_available():
+        return
+    try:
+        from django_redis import get_redis_connection
+
+        get_redis_connection("default").publish(CHANNEL, _key(name))
+    except Exception:
+        logger.warning("Could not publish APIConfig invalidation for %s", name, exc_info=True)
+
+
+# =====================================================
+# LISTENER
+# =====================================================
+
+def _pubsub_available() -> bool:
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+    return backend.startswith("django_redis")
+
+
+def _listen() -> None:
+    from django_redis import get_redis_connection
+
+    while True:
+        try:
+            pubsub = get_redis_connection("default").pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(CHANNEL)
+            # Anything published while disconnected is lost: start clean
+            invalidate_local()
+            for message in pubsub.listen():
+                name = message.get("data")
+                if isinstance(name, bytes):
+                    name = name.decode()
+                invalidate_local(name or None)
+        except Exception:
+            logger.warning("APIConfig invalidation listener disconnected; retrying", exc_info=True)
+            time.sleep(LISTENER_RETRY_SECONDS)
+
+
+def _ensure_listener() -> None:
+    """Start the listener once per process (forked children start their own)."""
+    global _listener_pid
+    pid = os.getpid()
+    if _listener_pid == pid:
+        return
+
+    with _lock:
+        if _listener_pid == pid:
+            return
+        _listener_pid = pid
+        if not _pubsub_available():
+            return
+        threading.Thread(target=_listen, name="apiconfig-invalidation", daemon=True).start()
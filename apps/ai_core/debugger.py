@@ -169,7 +169,7 @@ class SystemDebugger:
 def run_system_diagnostic_task():
     """
     Scheduled Celery task that runs full diagnostic every 6 hours.
-    Add this to CELERY_BEAT_SCHEDULE in settings.py:
+    Add this to app.conf.beat_schedule in core/celery.py:
 
     'run_system_diagnostic_every_6h': {
         'task': 'ai_core.debugger.run_system_diagnostic_task',
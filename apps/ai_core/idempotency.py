@@ -0,0 +1,149 @@
+# apps/ai_core/idempotency.py
+"""
+Two-tier idempotency guard for provider transactions.
+
+1. Redis:  a GET on "idem:<provider>:<transaction_id>" rejects a duplicate
+           without touching Postgres.
+2. DB:     IdempotencyKey's unique (provider, transaction_id) row is the
+           durable source of truth. It is written for every accepted claim
+           and decides the outcome whenever Redis has no key (first
+           delivery, after a flush / eviction, or Redis down).
+
+A Redis key is only ever written for a committed row: after commit for a new
+claim, or straight away for a duplicate (whose row is already committed). A
+worker killed mid-transaction therefore leaves no key behind, and the
+provider's retry is decided by the database again.
+reseed_idempotency_cache() restores recent keys after a Redis flush.
+"""
+import logging
+from datetime import timedelta
+from typing import Dict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+logger = logging.getLogger("ai_core.idempotency")
+
+STATS_PREFIX = "idem:stats:"
+STATS = ("fast_duplicate", "db_duplicate", "accepted", "redis_error")
+# Present while Redis holds a seeded key set; its absence means a flush
+SENTINEL_KEY = "idem:seeded"
+RESEED_BATCH_SIZE = 1000
+
+
+def _ttl() -> int:
+    return getattr(settings, "IDEMPOTENCY_CACHE_TTL", 60 * 60 * 24 * 7)
+
+
+def cache_key(provider: str, transaction_id: str) -> str:
+    return f"idem:{provider}:{transaction_id}"
+
+
+# =====================================================
+# COUNTERS
+# =====================================================
+
+def _count(stat: str) -> None:
+    key = STATS_PREFIX + stat
+    try:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 0, None)
+            cache.incr(key)
+    except Exception:
+        pass
+
+
+def idempotency_stats() -> Dict[str, int]:
+    """Counters plus the fast-path hit rate among duplicates."""
+    try:
+        raw = cache.get_many([STATS_PREFIX + s for s in STATS])
+    except Exception:
+        raw = {}
+    stats = {s: int(raw.get(STATS_PREFIX + s) or 0) for s in STATS}
+    duplicates = stats["fast_duplicate"] + stats["db_duplicate"]
+    stats["duplicates"] = duplicates
+    stats["fast_hit_rate"] = round(stats["fast_duplicate"] / duplicates, 4) if duplicates else None
+    return stats
+
+
+# =====================================================
+# CLAIM / RELEASE
+# =====================================================
+
+def claim(provider: str, transaction_id: str, user) -> bool:
+    """
+    True if this caller owns the transaction id, False for a duplicate.
+    Call inside the transaction that stages the work: the cache key is only
+    written once that transaction commits.
+    """
+    transaction_id = str(transaction_id)
+    key = cache_key(provider, transaction_id)
+
+    try:
+        if cache.get(key):
+            _count("fast_duplicate")
+            return False
+    except Exception:
+        logger.warning("Idempotency cache unavailable, using DB only", exc_info=True)
+        _count("redis_error")
+
+    _, created = IdempotencyKey.acquire(provider, transaction_id, user)
+    if created:
+        _count("accepted")
+        transaction.on_commit(lambda: _remember(key))
+    else:
+        _count("db_duplicate")
+        _remember(key)
+    return created
+
+
+def _remember(key: str) -> None:
+    try:
+        cache.set(key, 1, _ttl())
+    except Exception:
+        _count("redis_error")
+
+
+# =====================================================
+# RESEED (AFTER A FLUSH)
+# =====================================================
+
+def reseed_idempotency_cache(force: bool = False) -> int:
+    """
+    Rewrite Redis keys for every IdempotencyKey younger than the cache TTL.
+    Skipped while the sentinel is present unless force=True.
+    """
+    if not force and cache.get(SENTINEL_KEY):
+        return 0
+
+    ttl = _ttl()
+    since = timezone.now() - timedelta(seconds=ttl)
+    rows = (
+        IdempotencyKey.objects
+        .filter(created_at__gte=since)
+        .order_by("id")
+        .values_list("provider", "transaction_id")
+        .iterator(chunk_size=RESEED_BATCH_SIZE)
+    )
+
+    seeded = 0
+    batch = {}
+    for provider, transaction_id in rows:
+        batch[cache_key(provider, transaction_id)] = 1
+        if len(batch) >= RESEED_BATCH_SIZE:
+            cache.set_many(batch, ttl)
+            seeded += len(batch)
+            batch = {}
+    if batch:
+        cache.set_many(batch, ttl)
+        seeded += len(batch)
+
+    cache.set(SENTINEL_KEY, timezone.now().isoformat(), None)
+    logger.info("Idempotency cache reseeded with %s keys", seeded)
+    return seeded
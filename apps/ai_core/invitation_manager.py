@@ -7,6 +7,7 @@ from django.db.models import F
 from .models import Invite, RewardLog
 from apps.admin_panel.models import TaskCategory, UserProfile
 from .notifications import notify_user, notify_admin  # updated import
+from apps.dashboard.summary import schedule_summary_refresh
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -79,6 +80,7 @@ def reward_for_activation(user: User):
                 balance=F("balance") + reward_ugx,
                 invites=F("invites") + 1
             )
+            schedule_summary_refresh(inviter.id)
 
             RewardLog.objects.create(
                 user_id=inviter.id,
@@ -36,6 +36,7 @@ CONNECTION_STATUS_CHOICES = [
 
 TRANSACTION_STATUS_CHOICES = [
     ("pending", "pending"),
+    ("queued", "queued"),  # handed to the transfer worker
     ("processing", "processing"),
     ("success", "success"),
     ("failed", "failed"),
@@ -44,8 +45,40 @@ TRANSACTION_STATUS_CHOICES = [
 TRANSACTION_TYPE_CHOICES = [
     ("withdrawal", "withdrawal"),
     ("subscription", "subscription"),
+    ("payroll", "payroll"),
 ]
 
+POSTBACK_STATUS_CHOICES = [
+    ("pending", "pending"),
+    ("applied", "applied"),
+    ("failed", "failed"),
+]
+
+# =============================================================
+# MONTHLY LOG PARTITIONS
+# =============================================================
+# High-volume logs carry a month key (YYYYMM). Listings go through
+# `objects`, which only reads the current month; history, exports and
+# retention use `all_partitions`. See partitions.py for archiving.
+
+def current_partition() -> int:
+    now = timezone.now()
+    return now.year * 100 + now.month
+
+
+class PartitionedLogQuerySet(models.QuerySet):
+    def current(self):
+        return self.filter(partition=current_partition())
+
+    def in_partition(self, partition: int):
+        return self.filter(partition=partition)
+
+
+class CurrentPartitionManager(models.Manager.from_queryset(PartitionedLogQuerySet)):
+    def get_queryset(self):
+        return super().get_queryset().current()
+
+
 # =============================================================
 # TASK MODEL (NORMALIZED OFFERS)
 # =============================================================
@@ -68,6 +101,8 @@ class Task(models.Model):
     is_completed = models.BooleanField(default=False, db_index=True)
 
     raw_payload = models.JSONField(null=True, blank=True)
+    # sha256 of the provider-owned fields; offer sync skips unchanged rows
+    content_hash = models.CharField(max_length=64, blank=True, default="")
 
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -111,20 +146,35 @@ class TaskFetchLog(models.Model):
     status = models.CharField(max_length=64)
     message = models.TextField(blank=True)
     fetched_count = models.IntegerField(default=0)
-    deleted_old_count = models.IntegerField(default=0)
+    created_count = models.IntegerField(default=0)
+    updated_count = models.IntegerField(default=0)
+    deleted_old_count = models.IntegerField(default=0)  # deactivated offers
     timestamp = models.DateTimeField(default=timezone.now, db_index=True)
+    partition = models.PositiveIntegerField(default=current_partition, editable=False)
+
+    all_partitions = PartitionedLogQuerySet.as_manager()
+    objects = CurrentPartitionManager()
 
     class Meta:
         ordering = ["-timestamp"]
+        default_manager_name = "all_partitions"
+        indexes = [models.Index(fields=["partition", "-timestamp"])]
 
 class ProviderConnectionLog(models.Model):
     provider = models.CharField(max_length=50, choices=PROVIDER_CHOICES, db_index=True)
     status = models.CharField(max_length=32, choices=CONNECTION_STATUS_CHOICES)
+    latency_ms = models.IntegerField(null=True, blank=True)
     details = models.JSONField(null=True, blank=True)
     timestamp = models.DateTimeField(default=timezone.now, db_index=True)
+    partition = models.PositiveIntegerField(default=current_partition, editable=False)
+
+    all_partitions = PartitionedLogQuerySet.as_manager()
+    objects = CurrentPartitionManager()
 
     class Meta:
         ordering = ["-timestamp"]
+        default_manager_name = "all_partitions"
+        indexes = [models.Index(fields=["partition", "-timestamp"])]
 
 # =============================================================
 # IDEMPOTENCY (CRITICAL FOR WEBHOOK SAFETY)
@@ -144,13 +194,16 @@ class IdempotencyKey(models.Model):
 
     @classmethod
     def acquire(cls, provider: str, transaction_id: str, user):
-        """Returns (obj, created). Safe under concurrency."""
+        """Returns (obj, created). Safe under concurrency.
+
+        ``user`` may be a user instance or a primary key.
+        """
         try:
             with transaction.atomic():
                 obj = cls.objects.create(
                     provider=provider,
                     transaction_id=transaction_id,
-                    user=user,
+                    user_id=getattr(user, "pk", user),
                 )
                 return obj, True
         except IntegrityError:
@@ -193,9 +246,47 @@ class WebhookLog(models.Model):
     reward_ugx = models.BigIntegerField(null=True, blank=True)
 
     timestamp = models.DateTimeField(default=timezone.now, db_index=True)
+    partition = models.PositiveIntegerField(default=current_partition, editable=False)
+
+    all_partitions = PartitionedLogQuerySet.as_manager()
+    objects = CurrentPartitionManager()
 
     class Meta:
         ordering = ["-timestamp"]
+        default_manager_name = "all_partitions"
+        indexes = [models.Index(fields=["partition", "-timestamp"])]
+
+# =============================================================
+# POSTBACK INGESTION QUEUE (ACCEPT-FAST STAGING)
+# =============================================================
+
+class PendingPostback(models.Model):
+    """
+    Verified, normalized postback waiting to be credited.
+    Written by the webhook view, drained in batches by Celery.
+    """
+
+    provider = models.CharField(max_length=50, choices=PROVIDER_CHOICES)
+    transaction_id = models.CharField(max_length=255)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    offer_id = models.CharField(max_length=255, blank=True, default="")
+
+    reward_ugx = models.BigIntegerField(validators=[MinValueValidator(0)])
+    payload = models.JSONField(null=True, blank=True)
+
+    status = models.CharField(max_length=16, choices=POSTBACK_STATUS_CHOICES, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    received_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ("provider", "transaction_id")
+        indexes = [models.Index(fields=["status", "id"])]
+
+    def __str__(self):
+        return f"{self.provider}:{self.transaction_id} ({self.status})"
 
 # =============================================================
 # REWARD LEDGER (SOURCE OF TRUTH)
@@ -236,9 +327,12 @@ class APIConfig(models.Model):
         return self.name
 
 class Transaction(models.Model):
+    # Null for payroll transfers, which pay external accounts
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        null=True,
+        blank=True,
         db_index=True,
         related_name="ai_transactions"
     )
@@ -255,6 +349,8 @@ class Transaction(models.Model):
     failure_reason = models.TextField(null=True, blank=True)
 
     sent_at = models.DateTimeField(null=True, blank=True)
+    # Set once the transfer task has been enqueued (payroll resume marker)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     class Meta:
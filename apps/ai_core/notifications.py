@@ -41,3 +41,10 @@ def notify_admin(title: str, message: str, category: str = "system"):
         logger.info(f"Admin notification logged: {title}")
     except Exception as e:
         logger.error(f"Failed to log admin notification: {e}")
+
+
+def notify_system_event(code: str, message: str, level: str = "info"):
+    """
+    Records a coded system event (payments, payroll, config) for admins.
+    """
+    notify_admin(title=code, message=message, category=level)
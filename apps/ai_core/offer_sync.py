@@ -0,0 +1,247 @@
+# apps/ai_core/offer_sync.py
+"""
+Offerwall catalogue refresh.
+
+Provider APIs are fetched concurrently (I/O bound, pooled sessions), so a
+refresh takes as long as the slowest provider rather than the sum of all of
+them. Results are written to the database from the calling thread as each
+fetch completes; worker threads never touch the ORM.
+
+Every provider run writes one TaskFetchLog (counts) and one
+ProviderConnectionLog (status + latency).
+"""
+import hashlib
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed
+from typing import Dict, List
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Task, TaskFetchLog, ProviderConnectionLog
+from .utils import PROVIDERS, provider_enabled, provider_supports_api, normalize_usd_to_ugx
+
+logger = logging.getLogger("ai_core.offer_sync")
+
+
+def api_providers() -> List[str]:
+    return [
+        provider for provider, cfg in PROVIDERS.items()
+        if provider_supports_api(provider) and provider_enabled(provider) and cfg.get("fetch")
+    ]
+
+
+def _provider_timeout() -> float:
+    return getattr(settings, "OFFER_REFRESH_PROVIDER_TIMEOUT", 15)
+
+
+# =====================================================
+# FETCH (WORKER THREADS)
+# =====================================================
+def _fetch(provider: str, timeout: float) -> Dict:
+    started = time.monotonic()
+    try:
+        result = PROVIDERS[provider]["fetch"](None, timeout=timeout)
+        return {"ok": True, "result": result or {}, "latency_ms": _elapsed_ms(started)}
+    except Exception as exc:
+        return {"ok": False, "error": str(exc), "latency_ms": _elapsed_ms(started)}
+
+
+def _elapsed_ms(started: float) -> int:
+    return int((time.monotonic() - started) * 1000)
+
+
+# =====================================================
+# SYNC (CALLING THREAD)
+# =====================================================
+SYNC_BATCH_SIZE = 500
+# A feed that would retire more than this share of the active catalogue is
+# treated as broken and deactivates nothing
+MAX_DEACTIVATE_FRACTION = 0.5
+SYNCED_FIELDS = ["title", "category", "provider_reward_ugx", "raw_payload"]
+
+
+def offer_hash(fields: Dict) -> str:
+    payload = json.dumps([fields[f] for f in SYNCED_FIELDS], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _normalize_offer(offer: Dict) -> Dict:
+    fields = {
+        "title": str(offer.get("title") or "Unnamed Offer")[:512],
+        "category": str(offer.get("category") or "general")[:128],
+        "provider_reward_ugx": normalize_usd_to_ugx(offer.get("payout")),
+        "raw_payload": offer,
+    }
+    fields["content_hash"] = offer_hash(fields)
+    return fields
+
+
+def sync_offers(provider: str, offers: List[Dict]) -> Dict[str, int]:
+    """
+    Diff a provider's feed against stored tasks and apply it in bulk:
+    one read of existing keys, then bulk_create / bulk_update / one UPDATE
+    to deactivate offers that left the feed.
+    Rows whose content hash is unchanged are not written.
+    admin_reward_ugx is only set on create; admins own it afterwards.
+    An empty feed, or one missing most of the active catalogue, leaves
+    existing tasks active.
+    """
+    incoming: Dict[str, Dict] = {}
+    for offer in offers:
+        if offer.get("id") is None:
+            continue
+        incoming[str(offer["id"])] = _normalize_offer(offer)
+
+    existing = {
+        provider_task_id: (pk, content_hash, is_active)
+        for pk, provider_task_id, content_hash, is_active in (
+            Task.objects
+            .filter(provider_name=provider)
+            .values_list("id", "provider_task_id", "content_hash", "is_active")
+        )
+    }
+
+    now = timezone.now()
+    to_create, to_update = [], []
+
+    for provider_task_id, fields in incoming.items():
+        current = existing.get(provider_task_id)
+        if current is None:
+            to_create.append(Task(
+                provider_name=provider,
+                provider_task_id=provider_task_id,
+                admin_reward_ugx=fields["provider_reward_ugx"],
+                is_active=True,
+                **fields,
+            ))
+            continue
+
+        pk, content_hash, is_active = current
+        if content_hash != fields["content_hash"] or not is_active:
+            to_update.append(Task(pk=pk, is_active=True, updated_at=now, **fields))
+
+    active = sum(1 for _, _, is_active in existing.values() if is_active)
+    missing = [
+        pk for provider_task_id, (pk, _, is_active) in existing.items()
+        if is_active and provider_task_id not in incoming
+    ]
+    max_fraction = getattr(settings, "OFFER_SYNC_MAX_DEACTIVATE_FRACTION", MAX_DEACTIVATE_FRACTION)
+    if missing and (not incoming or len(missing) > active * max_fraction):
+        logger.warning(
+            "Offer sync %s: feed would deactivate %s of %s active tasks; skipping deactivation",
+            provider, len(missing), active,
+        )
+        missing = []
+
+    with transaction.atomic():
+        Task.objects.bulk_create(to_create, batch_size=SYNC_BATCH_SIZE, ignore_conflicts=True)
+        # ignore_conflicts drops rows silently and returns them anyway: count what landed
+        created = (
+            Task.objects.filter(provider_name=provider).count() - len(existing)
+            if to_create else 0
+        )
+        Task.objects.bulk_update(
+            to_update,
+            SYNCED_FIELDS + ["content_hash", "is_active", "updated_at"],
+            batch_size=SYNC_BATCH_SIZE,
+        )
+
+        deactivated = 0
+        for i in range(0, len(missing), SYNC_BATCH_SIZE):
+            deactivated += (
+                Task.objects
+                .filter(pk__in=missing[i:i + SYNC_BATCH_SIZE])
+                .update(is_active=False, updated_at=now)
+            )
+
+    return {
+        "fetched": len(incoming),
+        "created": created,
+        "updated": len(to_update),
+        "unchanged": len(incoming) - len(to_create) - len(to_update),
+        "deactivated": deactivated,
+    }
+
+
+def _record(provider: str, outcome: Dict) -> Dict:
+    latency_ms = outcome["latency_ms"]
+
+    if not outcome["ok"]:
+        logger.warning("Offer refresh failed: %s (%sms) %s", provider, latency_ms, outcome["error"])
+        TaskFetchLog.objects.create(provider=provider, status="failed", message=outcome["error"][:2000])
+        ProviderConnectionLog.objects.create(
+            provider=provider,
+            status="failed",
+            latency_ms=latency_ms,
+            details={"error": outcome["error"][:500]},
+        )
+        return {"status": "failed", "latency_ms": latency_ms, "error": outcome["error"]}
+
+    result = outcome["result"]
+    offers = result.get("offers") if isinstance(result, dict) else None
+    if not isinstance(offers, list):
+        message = f"Unexpected feed shape: {type(offers if isinstance(result, dict) else result).__name__}"
+        logger.warning("Offer refresh %s: %s", provider, message)
+        TaskFetchLog.objects.create(provider=provider, status="sync_failed", message=message)
+        ProviderConnectionLog.objects.create(provider=provider, status="connected", latency_ms=latency_ms)
+        return {"status": "sync_failed", "latency_ms": latency_ms, "error": message}
+
+    try:
+        counts = sync_offers(provider, offers)
+    except Exception as exc:
+        logger.exception("Offer sync failed: %s", provider)
+        TaskFetchLog.objects.create(provider=provider, status="sync_failed", message=str(exc)[:2000])
+        ProviderConnectionLog.objects.create(provider=provider, status="connected", latency_ms=latency_ms)
+        return {"status": "sync_failed", "latency_ms": latency_ms, "error": str(exc)}
+
+    TaskFetchLog.objects.create(
+        provider=provider,
+        status="success",
+        fetched_count=counts["fetched"],
+        created_count=counts["created"],
+        updated_count=counts["updated"],
+        deleted_old_count=counts["deactivated"],
+    )
+    ProviderConnectionLog.objects.create(provider=provider, status="connected", latency_ms=latency_ms)
+    return {"status": "success", "latency_ms": latency_ms, **counts}
+
+
+# =====================================================
+# PUBLIC ENTRY POINT
+# =====================================================
+def refresh_providers(providers: List[str] = None, timeout: float = None) -> Dict[str, Dict]:
+    """
+    Refresh API offerwalls concurrently. Returns provider -> outcome.
+    A provider that exceeds its timeout is recorded as failed; its
+    late result is discarded.
+    """
+    providers = providers or api_providers()
+    timeout = timeout or _provider_timeout()
+    if not providers:
+        return {}
+
+    results: Dict[str, Dict] = {}
+    # Each fetch is bounded by its own HTTP timeout; this is the backstop
+    deadline = timeout * 2
+    executor = ThreadPoolExecutor(max_workers=len(providers), thread_name_prefix="offer-refresh")
+    futures = {executor.submit(_fetch, p, timeout): p for p in providers}
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            provider = futures[future]
+            results[provider] = _record(provider, future.result())
+    except FuturesTimeout:
+        for future, provider in futures.items():
+            if provider not in results:
+                results[provider] = _record(provider, {
+                    "ok": False,
+                    "error": f"timed out after {deadline:.0f}s",
+                    "latency_ms": int(deadline * 1000),
+                })
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results
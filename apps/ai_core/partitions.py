@@ -0,0 +1,150 @@
+# apps/ai_core/partitions.py
+"""
+Retention for the monthly-partitioned log tables.
+
+Partitions older than LOG_RETENTION_MONTHS are streamed to
+<LOG_ARCHIVE_DIR>/<table>/<YYYYMM>.ndjson.gz (when LOG_ARCHIVE_ENABLED) and
+then deleted in primary-key chunks. Every step reads one partition through
+the (partition, timestamp) index, so the cost is bounded by the partition
+being retired rather than the whole table. LOG_ARCHIVE_DIR must be
+persistent storage: the rows are gone once the archive is written.
+
+The migration that adds `partition` stamps every existing row with the
+deploy month; backfill_partitions() (manage.py backfill_log_partitions)
+recomputes it from `timestamp`.
+"""
+import gzip
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from .models import (
+    ProviderConnectionLog,
+    TaskFetchLog,
+    WebhookLog,
+    current_partition,
+)
+
+logger = logging.getLogger("ai_core.partitions")
+
+PARTITIONED_LOGS = (WebhookLog, ProviderConnectionLog, TaskFetchLog)
+ARCHIVE_CHUNK_SIZE = 2000
+DELETE_CHUNK_SIZE = 5000
+BACKFILL_CHUNK_SIZE = 10000
+
+
+def partition_shift(partition: int, months: int) -> int:
+    """YYYYMM moved by a number of months (negative goes back)."""
+    index = (partition // 100) * 12 + (partition % 100 - 1) + months
+    return (index // 12) * 100 + index % 12 + 1
+
+
+def retention_cutoff(keep_months: Optional[int] = None) -> int:
+    """Oldest partition still kept."""
+    if keep_months is None:
+        keep_months = getattr(settings, "LOG_RETENTION_MONTHS", 3)
+    return partition_shift(current_partition(), -(keep_months - 1))
+
+
+def expired_partitions(model, cutoff: int) -> List[int]:
+    return list(
+        model.all_partitions
+        .filter(partition__lt=cutoff)
+        .order_by("partition")
+        .values_list("partition", flat=True)
+        .distinct()
+    )
+
+
+def archive_dir() -> Path:
+    directory = getattr(settings, "LOG_ARCHIVE_DIR", "")
+    if not directory:
+        raise ImproperlyConfigured("LOG_ARCHIVE_ENABLED requires LOG_ARCHIVE_DIR (persistent storage)")
+    return Path(directory)
+
+
+def archive_partition(model, partition: int) -> Path:
+    """Write one partition to gzip NDJSON. The file only appears once complete."""
+    directory = archive_dir() / model._meta.db_table
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{partition}.ndjson.gz"
+    tmp = path.with_suffix(".gz.tmp")
+
+    rows = (
+        model.all_partitions
+        .in_partition(partition)
+        .order_by("pk")
+        .values()
+        .iterator(chunk_size=ARCHIVE_CHUNK_SIZE)
+    )
+    with gzip.open(tmp, "wt", encoding="utf-8") as fh:
+        for row in rows:
+            fh.write(json.dumps(row, cls=DjangoJSONEncoder))
+            fh.write("\n")
+    os.replace(tmp, path)
+    return path
+
+
+def drop_partition(model, partition: int) -> int:
+    deleted = 0
+    qs = model.all_partitions.in_partition(partition)
+    while True:
+        ids = list(qs.order_by("pk").values_list("pk", flat=True)[:DELETE_CHUNK_SIZE])
+        if not ids:
+            return deleted
+        deleted += model.all_partitions.filter(pk__in=ids).delete()[0]
+
+
+def enforce_retention(keep_months: Optional[int] = None, archive: Optional[bool] = None) -> Dict[str, Dict[int, int]]:
+    """
+    Archive (optionally) and drop every expired partition.
+    Returns {db_table: {partition: rows dropped}}.
+    """
+    if archive is None:
+        archive = getattr(settings, "LOG_ARCHIVE_ENABLED", False)
+    cutoff = retention_cutoff(keep_months)
+
+    report: Dict[str, Dict[int, int]] = {}
+    for model in PARTITIONED_LOGS:
+        table = model._meta.db_table
+        for partition in expired_partitions(model, cutoff):
+            if archive:
+                path = archive_partition(model, partition)
+                logger.info("Archived %s partition %s to %s", table, partition, path)
+            report.setdefault(table, {})[partition] = drop_partition(model, partition)
+            logger.info("Dropped %s partition %s (%s rows)", table, partition, report[table][partition])
+    return report
+
+
+def backfill_partitions(model) -> int:
+    """
+    Set `partition` from `timestamp` (UTC, as current_partition() does),
+    one primary-key range per UPDATE. Returns rows changed.
+    """
+    expected = (
+        ExtractYear("timestamp", tzinfo=dt_timezone.utc) * 100
+        + ExtractMonth("timestamp", tzinfo=dt_timezone.utc)
+    )
+    qs = model.all_partitions.order_by("pk")
+    changed = 0
+    last_pk = 0
+    while True:
+        bounds = list(qs.filter(pk__gt=last_pk).values_list("pk", flat=True)[:BACKFILL_CHUNK_SIZE])
+        if not bounds:
+            return changed
+        changed += (
+            model.all_partitions
+            .filter(pk__gte=bounds[0], pk__lte=bounds[-1])
+            .exclude(partition=expected)
+            .update(partition=expected)
+        )
+        last_pk = bounds[-1]
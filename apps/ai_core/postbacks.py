@@ -0,0 +1,219 @@
+# apps/ai_core/postbacks.py
+"""
+postbacks.py — Accept-fast postback ingestion
+=============================================
+The webhook view only verifies, de-duplicates and stages a postback.
+Crediting happens later, in batches, inside a Celery worker.
+
+Flow:
+    provider_webhook_view -> stage_postback() -> PendingPostback row
+    process_postback_queue (Celery) -> drain_postback_queue() -> apply_reward_batch()
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import (
+    Task,
+    WebhookLog,
+    PendingPostback,
+)
+from .idempotency import claim
+from .rewards import apply_reward_batch
+
+logger = logging.getLogger("ai_core.postbacks")
+
+# =====================================================
+# CONSTANTS
+# =====================================================
+
+DRAIN_SCHEDULE_KEY = "postbacks:drain_scheduled"
+DRAIN_DEBOUNCE_SECONDS = 2
+MAX_APPLY_ATTEMPTS = 5
+
+
+def _batch_size() -> int:
+    return getattr(settings, "POSTBACK_BATCH_SIZE", 200)
+
+
+# =====================================================
+# INGESTION (WEB REQUEST PATH)
+# =====================================================
+
+def stage_postback(data: Dict[str, Any], schedule: bool = True) -> Optional[PendingPostback]:
+    """
+    Claim the idempotency key (Redis, then DB) and stage a normalized postback.
+    Returns the staged row, or None if the postback is a duplicate.
+    """
+    provider, transaction_id = data["provider"], str(data["transaction_id"])
+
+    # The cache key is written on commit, so a failure here (or a killed
+    # worker) leaves nothing behind to reject the provider's retry
+    with transaction.atomic():
+        if not claim(provider, transaction_id, data["user_id"]):
+            return None
+
+        pending = PendingPostback.objects.create(
+            provider=provider,
+            transaction_id=transaction_id,
+            user_id=data["user_id"],
+            offer_id=str(data.get("offer_id") or ""),
+            reward_ugx=data["reward_ugx"],
+            payload=data.get("raw"),
+            received_at=data.get("received_at") or timezone.now(),
+        )
+
+        if schedule:
+            transaction.on_commit(schedule_drain)
+
+    return pending
+
+
+def schedule_drain() -> None:
+    """
+    Ask a worker to drain the queue soon.
+    Debounced so a burst of postbacks enqueues one Celery task, not thousands.
+    The beat schedule is the safety net if the broker is unreachable.
+    """
+    if not cache.add(DRAIN_SCHEDULE_KEY, 1, DRAIN_DEBOUNCE_SECONDS):
+        return
+
+    try:
+        from .tasks import process_postback_queue
+        process_postback_queue.apply_async(countdown=DRAIN_DEBOUNCE_SECONDS)
+    except Exception:
+        logger.exception("Failed to schedule postback drain")
+
+
+# =====================================================
+# CONSUMER (CELERY PATH)
+# =====================================================
+
+def _resolve_tasks(batch: List[PendingPostback]) -> Dict[tuple, Task]:
+    """One query for every (provider, offer_id) referenced by the batch."""
+    lookup = Q()
+    for provider, offer_id in {(p.provider, p.offer_id) for p in batch if p.offer_id}:
+        lookup |= Q(provider_name=provider, provider_task_id=offer_id)
+
+    if not lookup:
+        return {}
+
+    return {(t.provider_name, t.provider_task_id): t for t in Task.objects.filter(lookup)}
+
+
+def apply_postbacks(batch: List[PendingPostback]) -> Dict[str, int]:
+    """
+    Credit a batch of staged postbacks through the reward engine.
+    Returns the engine stats plus the total UGX credited.
+    """
+    tasks = _resolve_tasks(batch)
+    credits = []
+    webhook_logs = []
+
+    for pending in batch:
+        task = tasks.get((pending.provider, pending.offer_id))
+
+        # 🔐 Authoritative reward source
+        admin_cap = task.admin_reward_ugx if task else pending.reward_ugx
+        final_reward = min(pending.reward_ugx, admin_cap)
+
+        credits.append({
+            "user_id": pending.user_id,
+            "amount": final_reward,
+            "reference": f"{pending.provider}:{pending.transaction_id}",
+            "reason": f"{pending.provider} postback",
+            "provider": pending.provider,
+            "category": task.category if task else "other",
+            "task": task,
+            "provider_reward_ugx": pending.reward_ugx,
+            "admin_reward_ugx": admin_cap,
+        })
+        webhook_logs.append(WebhookLog(
+            provider=pending.provider,
+            payload=pending.payload or {},
+            signature_valid=True,
+            user_id=pending.user_id,
+            task=task,
+            reward_ugx=final_reward,
+        ))
+
+    result = apply_reward_batch(credits)
+    WebhookLog.objects.bulk_create(webhook_logs)
+
+    result["credited_ugx"] = sum(c["amount"] for c in credits)
+    return result
+
+
+def apply_pending_postback(pending: PendingPostback) -> int:
+    """Credit a single staged postback. Returns the reward applied (UGX)."""
+    return apply_postbacks([pending])["credited_ugx"]
+
+
+def _mark_failed(pending: PendingPostback, exc: Exception) -> None:
+    pending.attempts += 1
+    pending.last_error = str(exc)[:1000]
+    if pending.attempts >= MAX_APPLY_ATTEMPTS:
+        pending.status = "failed"
+
+
+def drain_postback_queue(batch_size: Optional[int] = None, max_batches: int = 50) -> Dict[str, int]:
+    """
+    Apply staged postbacks in batches.
+    Rows are claimed with SKIP LOCKED so several workers can drain concurrently.
+    """
+    batch_size = batch_size or _batch_size()
+    stats = {"applied": 0, "deduplicated": 0, "failed": 0, "batches": 0}
+
+    for _ in range(max_batches):
+        with transaction.atomic():
+            batch = list(
+                PendingPostback.objects
+                .select_for_update(skip_locked=True)
+                .filter(status="pending")
+                .order_by("id")[:batch_size]
+            )
+            if not batch:
+                break
+
+            now = timezone.now()
+            try:
+                with transaction.atomic():
+                    result = apply_postbacks(batch)
+                for pending in batch:
+                    pending.status = "applied"
+                    pending.last_error = ""
+                stats["applied"] += result["applied"]
+                stats["deduplicated"] += result["deduplicated"]
+            except Exception:
+                logger.exception("Postback batch failed, retrying row by row")
+                # Isolate the bad rows so one poisoned postback can't block the queue
+                for pending in batch:
+                    try:
+                        with transaction.atomic():
+                            apply_postbacks([pending])
+                        pending.status = "applied"
+                        pending.last_error = ""
+                        stats["applied"] += 1
+                    except Exception as exc:
+                        logger.exception("Failed to apply postback %s", pending.pk)
+                        _mark_failed(pending, exc)
+                        stats["failed"] += 1
+
+            for pending in batch:
+                pending.processed_at = now
+
+            PendingPostback.objects.bulk_update(
+                batch, ["status", "attempts", "last_error", "processed_at"]
+            )
+            stats["batches"] += 1
+
+        if len(batch) < batch_size:
+            break
+
+    return stats
@@ -0,0 +1,48 @@
+# apps/ai_core/ratelimit.py
+"""
+Token bucket for scheduling outbound calls without blocking.
+
+Instead of sleeping until a token is free, reserve() hands back the delay
+(in seconds) at which each call may run; callers pass it to Celery as
+apply_async(countdown=...). The bucket state is a single "theoretical
+arrival time" in the shared cache (GCRA), so every process dispatching
+through the same bucket name shares one budget.
+"""
+import time
+from contextlib import nullcontext
+from typing import List
+
+from django.core.cache import cache
+
+
+class TokenBucket:
+    def __init__(self, name: str, rate: float, burst: int = 1):
+        """rate: tokens per second; burst: tokens available at once."""
+        self.key = f"ratelimit:{name}:tat"
+        self.lock_key = f"ratelimit:{name}:lock"
+        self.interval = 1.0 / rate
+        self.burst = max(1, burst)
+
+    def _lock(self):
+        # django_redis exposes a distributed lock; other backends run unlocked
+        lock = getattr(cache, "lock", None)
+        return lock(self.lock_key, timeout=5) if lock else nullcontext()
+
+    def reserve(self, n: int = 1) -> List[float]:
+        """Reserve n tokens; returns the delay before each may be used."""
+        if n <= 0:
+            return []
+
+        with self._lock():
+            now = time.time()
+            tat = max(cache.get(self.key) or now, now)
+            # The first `burst` tokens may be spent immediately
+            allowance = (self.burst - 1) * self.interval
+
+            delays = []
+            for _ in range(n):
+                delays.append(max(0.0, tat - allowance - now))
+                tat += self.interval
+
+            cache.set(self.key, tat, int(tat - now) + 60)
+        return delays
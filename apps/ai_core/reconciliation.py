@@ -0,0 +1,197 @@
+# apps/ai_core/reconciliation.py
+"""
+Batched withdrawal reconciliation against Flutterwave.
+
+Open transfers (pending / queued / processing, older than RECONCILE_MIN_AGE_SECONDS)
+are walked in id order, RECONCILE_CHUNK_SIZE at a time. For each chunk the
+list-transfers endpoint is paged over the chunk's date window until every
+transfer is matched (by provider_reference = transfer id, or tx_ref =
+reference), and the changes are written with one bulk_update. Only the
+changed rows are locked, with skip_locked, so a concurrent webhook wins.
+
+This replaces one GET /transfers/{id} per transfer per minute with roughly
+one list call per chunk.
+"""
+import logging
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Transaction
+
+logger = logging.getLogger("ai_core.reconciliation")
+
+# "queued" covers payroll transfers handed to a worker that may have sent them
+OPEN_STATUSES = ("pending", "queued", "processing")
+PROVIDER_STATUS_MAP = {
+    "SUCCESSFUL": "success",
+    "FAILED": "failed",
+    "DECLINED": "failed",
+}
+# Safety bound on list pages fetched for one chunk
+MAX_PAGES_PER_CHUNK = 20
+
+
+def _chunk_size() -> int:
+    return getattr(settings, "RECONCILE_CHUNK_SIZE", 100)
+
+
+def _min_age() -> timedelta:
+    return timedelta(seconds=getattr(settings, "RECONCILE_MIN_AGE_SECONDS", 120))
+
+
+# =====================================================
+# PROVIDER
+# =====================================================
+
+def fetch_transfers(config: Dict[str, str], start, end, status: Optional[str] = None) -> Iterable[dict]:
+    """
+    Yield transfers created in [start, end] from the list endpoint, page by page.
+    Stops early when the caller stops iterating.
+    """
+    from .transactions import _get_headers, _http_get
+
+    page = 1
+    while page <= MAX_PAGES_PER_CHUNK:
+        query = f"page={page}&from={start:%Y-%m-%d}&to={end:%Y-%m-%d}"
+        if status:
+            query += f"&status={status}"
+        response, data = _http_get(
+            f"{config['base_url']}/transfers?{query}",
+            headers=_get_headers(config["secret_key"]),
+        )
+        if response is None or response.status_code != 200 or data.get("status") != "success":
+            logger.warning("List transfers failed (page %s): %s", page, data.get("message"))
+            return
+
+        yield from data.get("data") or []
+
+        page_info = (data.get("meta") or {}).get("page_info") or {}
+        if page >= int(page_info.get("total_pages") or 1):
+            return
+        page += 1
+
+
+# =====================================================
+# MATCHING
+# =====================================================
+
+def _match(chunk: List[Transaction], transfers: Iterable[dict]) -> Dict[int, dict]:
+    """tx id -> provider transfer, stopping once every tx is matched."""
+    by_provider_ref = {str(tx.provider_reference): tx for tx in chunk if tx.provider_reference}
+    by_tx_ref = {tx.tx_ref: tx for tx in chunk}
+
+    matched: Dict[int, dict] = {}
+    for transfer in transfers:
+        tx = by_provider_ref.get(str(transfer.get("id"))) or by_tx_ref.get(transfer.get("reference"))
+        if tx is not None:
+            matched[tx.pk] = transfer
+            if len(matched) == len(chunk):
+                break
+    return matched
+
+
+def _apply(chunk: List[Transaction], matched: Dict[int, dict]) -> List[Tuple[Transaction, str]]:
+    """Write status changes for one chunk. Returns [(tx, new_status)]."""
+    changes = {}
+    for tx in chunk:
+        transfer = matched.get(tx.pk)
+        if not transfer:
+            continue
+        new_status = PROVIDER_STATUS_MAP.get(str(transfer.get("status") or "").upper())
+        if new_status and new_status != tx.status:
+            changes[tx.pk] = (new_status, transfer)
+
+    if not changes:
+        return []
+
+    applied = []
+    with transaction.atomic():
+        locked = list(
+            Transaction.objects
+            .select_for_update(skip_locked=True)
+            .filter(pk__in=list(changes), status__in=OPEN_STATUSES)
+            .select_related("user")
+        )
+        for tx in locked:
+            new_status, transfer = changes[tx.pk]
+            tx.status = new_status
+            tx.provider_reference = tx.provider_reference or str(transfer.get("id") or "")
+            tx.raw_provider_response = transfer
+            if new_status == "failed":
+                tx.failure_reason = str(transfer.get("complete_message") or "Transfer failed")[:1000]
+            applied.append((tx, new_status))
+
+        Transaction.objects.bulk_update(
+            [tx for tx, _ in applied],
+            ["status", "provider_reference", "raw_provider_response", "failure_reason"],
+        )
+    return applied
+
+
+def _notify(applied: List[Tuple[Transaction, str]]) -> None:
+    from .transactions import _safe_notify_user, transfer_settled
+
+    for tx, status in applied:
+        transfer_settled(tx)
+        if status == "success":
+            _safe_notify_user(tx.user, "Withdrawal Successful",
+                              f"Your withdrawal of UGX {tx.amount_ugx} succeeded.", "info")
+        else:
+            _safe_notify_user(tx.user, "Withdrawal Failed",
+                              f"Your withdrawal of UGX {tx.amount_ugx} failed.", "error")
+
+
+# =====================================================
+# ENGINE
+# =====================================================
+
+def open_transfers(older_than=None, chunk_size: Optional[int] = None) -> Iterable[List[Transaction]]:
+    """Keyset-paginated chunks of open transfers."""
+    chunk_size = chunk_size or _chunk_size()
+    cutoff = older_than or (timezone.now() - _min_age())
+    last_id = 0
+
+    while True:
+        chunk = list(
+            Transaction.objects
+            .filter(status__in=OPEN_STATUSES, created_at__lt=cutoff, id__gt=last_id)
+            .exclude(tx_type="subscription")
+            .order_by("id")
+            .only("id", "user_id", "tx_ref", "provider_reference", "status", "created_at", "amount_ugx")
+            [:chunk_size]
+        )
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1].id
+
+
+def reconcile_transfers(chunk_size: Optional[int] = None) -> Dict[str, int]:
+    from .transactions import _get_flutterwave_config_cached
+
+    stats = {"checked": 0, "matched": 0, "success": 0, "failed": 0, "chunks": 0}
+
+    config = _get_flutterwave_config_cached()
+    if not config:
+        logger.error("Reconciliation skipped: missing Flutterwave config")
+        return stats
+
+    for chunk in open_transfers(chunk_size=chunk_size):
+        stats["checked"] += len(chunk)
+        stats["chunks"] += 1
+
+        start = min(tx.created_at for tx in chunk)
+        end = timezone.now()
+        matched = _match(chunk, fetch_transfers(config, start, end))
+        stats["matched"] += len(matched)
+
+        applied = _apply(chunk, matched)
+        for _, status in applied:
+            stats[status] += 1
+        _notify(applied)
+
+    return stats
@@ -0,0 +1,101 @@
+# apps/ai_core/resilience.py
+"""
+Failure handling for outbound payment calls.
+
+- CircuitBreaker: per-host failure counter shared by every worker through
+  the cache. After CIRCUIT_FAILURE_THRESHOLD transient failures inside
+  CIRCUIT_WINDOW_SECONDS the host is "open" for CIRCUIT_OPEN_SECONDS and
+  calls fail fast instead of timing out one by one.
+- retry_countdown(): exponential backoff with jitter for Celery's
+  self.retry(countdown=...), so retries wait in the broker, not in a
+  sleeping worker.
+"""
+import logging
+import random
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger("ai_core.resilience")
+
+
+class TransientPaymentError(Exception):
+    """A call that may succeed later; retry_after is a hint in seconds."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(TransientPaymentError):
+    pass
+
+
+def retry_countdown(retries: int, base: float = 10, cap: float = 600,
+                    retry_after: Optional[float] = None) -> int:
+    """Backoff for attempt `retries` (0-based): random in [base, base * 2**retries], capped."""
+    ceiling = min(cap, base * (2 ** retries))
+    countdown = random.uniform(base, max(base, ceiling))
+    if retry_after:
+        countdown = max(countdown, retry_after)
+    return int(countdown)
+
+
+class CircuitBreaker:
+    def __init__(self, host: str):
+        self.host = host
+        self.failures_key = f"circuit:{host}:failures"
+        self.open_key = f"circuit:{host}:open_until"
+
+    @classmethod
+    def for_url(cls, url: str) -> "CircuitBreaker":
+        return cls(urlsplit(url).netloc or url)
+
+    @property
+    def threshold(self) -> int:
+        return getattr(settings, "CIRCUIT_FAILURE_THRESHOLD", 5)
+
+    @property
+    def window(self) -> int:
+        return getattr(settings, "CIRCUIT_WINDOW_SECONDS", 60)
+
+    @property
+    def open_seconds(self) -> int:
+        return getattr(settings, "CIRCUIT_OPEN_SECONDS", 30)
+
+    def retry_after(self) -> Optional[float]:
+        """Seconds until the circuit closes again, or None if it is closed."""
+        try:
+            open_until = cache.get(self.open_key)
+        except Exception:
+            return None
+        if not open_until:
+            return None
+        remaining = open_until - time.time()
+        return remaining if remaining > 0 else None
+
+    def check(self) -> None:
+        remaining = self.retry_after()
+        if remaining is not None:
+            raise CircuitOpenError(f"Circuit open for {self.host}", retry_after=remaining)
+
+    def record_success(self) -> None:
+        try:
+            cache.delete(self.failures_key)
+        except Exception:
+            pass
+
+    def record_failure(self) -> None:
+        try:
+            cache.add(self.failures_key, 0, self.window)
+            failures = cache.incr(self.failures_key)
+        except Exception:
+            return
+        if failures >= self.threshold:
+            # add(): the first worker to trip the breaker sets the deadline
+            if cache.add(self.open_key, time.time() + self.open_seconds, self.open_seconds):
+                logger.warning("Circuit opened for %s after %s failures", self.host, failures)
+            cache.delete(self.failures_key)
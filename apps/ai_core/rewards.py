@@ -0,0 +1,145 @@
+# apps/ai_core/rewards.py
+"""
+rewards.py — Batched reward crediting
+=====================================
+Every reward credit (postbacks, completed tasks, RewardLog rows created
+elsewhere) goes through apply_reward_batch():
+
+- credits are de-duplicated on (user_id, reference), inside the batch and
+  against existing LedgerEntry rows, in one query
+- balances are updated with one F() UPDATE per user (no read-modify-write)
+- RewardLog / LedgerEntry rows are bulk-inserted in the same transaction
+- touched users' dashboard summaries are refreshed on commit
+
+A credit is a plain dict:
+    {
+        "user_id": 42,
+        "amount": 1500,                 # UGX
+        "reference": "adgem:tx-123",    # unique per user
+        "reason": "adgem postback",     # optional
+        "provider": "adgem",            # RewardLog only
+        "category": "survey",           # RewardLog only
+        "task": <Task> | None,          # RewardLog only
+        "provider_reward_ugx": 1800,    # RewardLog only
+        "admin_reward_ugx": 1500,       # RewardLog only
+    }
+"""
+
+import logging
+from collections import defaultdict
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List
+
+from django.db import transaction
+from django.db.models import F
+
+from apps.dashboard.models import UserProfile, LedgerEntry, default_phone_for
+from apps.dashboard.summary import schedule_summary_refresh
+from apps.dashboard.invalidation import invalidate_user_caches
+from .models import RewardLog
+
+logger = logging.getLogger("ai_core.rewards")
+
+
+def _dedupe(credits: Iterable[Dict[str, Any]]) -> tuple[List[Dict[str, Any]], int]:
+    seen = set()
+    unique = []
+    duplicates = 0
+
+    for credit in credits:
+        key = (int(credit["user_id"]), str(credit["reference"]))
+        if key in seen:
+            duplicates += 1
+            continue
+        seen.add(key)
+        unique.append(credit)
+
+    if not unique:
+        return unique, duplicates
+
+    existing = set(
+        LedgerEntry.objects.filter(
+            user_id__in={c["user_id"] for c in unique},
+            reference__in={str(c["reference"]) for c in unique},
+            entry_type="credit",
+        ).values_list("user_id", "reference")
+    )
+
+    fresh = [c for c in unique if (int(c["user_id"]), str(c["reference"])) not in existing]
+    return fresh, duplicates + (len(unique) - len(fresh))
+
+
+def _credit_wallets(totals: Dict[int, Decimal]) -> None:
+    # Stable order keeps concurrent batches from deadlocking on row locks
+    for user_id in sorted(totals):
+        amount = totals[user_id]
+        updated = UserProfile.objects.filter(user_id=user_id).update(
+            balance=F("balance") + amount,
+            today_earnings=F("today_earnings") + amount,
+        )
+        if updated:
+            continue
+
+        # Wallet rows are created lazily by the dashboard; create it now
+        UserProfile.objects.get_or_create(
+            user_id=user_id,
+            defaults={"phone": default_phone_for(user_id)},
+        )
+        UserProfile.objects.filter(user_id=user_id).update(
+            balance=F("balance") + amount,
+            today_earnings=F("today_earnings") + amount,
+        )
+
+
+def apply_reward_batch(credits: Iterable[Dict[str, Any]], write_reward_logs: bool = True) -> Dict[str, int]:
+    """
+    Apply a batch of credits atomically.
+    Returns {"applied": rows credited, "deduplicated": rows skipped, "users": wallets touched}.
+    """
+    credits = [c for c in credits if Decimal(str(c["amount"])) > 0]
+
+    with transaction.atomic():
+        fresh, deduplicated = _dedupe(credits)
+        if not fresh:
+            return {"applied": 0, "deduplicated": deduplicated, "users": 0}
+
+        totals: Dict[int, Decimal] = defaultdict(Decimal)
+        for credit in fresh:
+            totals[int(credit["user_id"])] += Decimal(str(credit["amount"]))
+
+        _credit_wallets(totals)
+        # Dashboard summaries are rebuilt once this transaction commits;
+        # bulk_create below fires no signals, so drop account caches here
+        schedule_summary_refresh(list(totals))
+        invalidate_user_caches(list(totals), ("account",))
+
+        LedgerEntry.objects.bulk_create([
+            LedgerEntry(
+                user_id=credit["user_id"],
+                amount=Decimal(str(credit["amount"])),
+                entry_type="credit",
+                reason=(credit.get("reason") or "reward")[:255],
+                reference=str(credit["reference"]),
+            )
+            for credit in fresh
+        ])
+
+        if write_reward_logs:
+            RewardLog.objects.bulk_create([
+                RewardLog(
+                    user_id=credit["user_id"],
+                    task=credit.get("task"),
+                    provider=credit.get("provider") or "system",
+                    category=credit.get("category") or "other",
+                    final_reward_ugx=int(credit["amount"]),
+                    provider_reward_ugx=int(credit.get("provider_reward_ugx", credit["amount"])),
+                    admin_reward_ugx=int(credit.get("admin_reward_ugx", credit["amount"])),
+                )
+                for credit in fresh
+            ])
+
+    logger.info(
+        "Reward batch applied: applied=%s deduplicated=%s users=%s",
+        len(fresh), deduplicated, len(totals),
+    )
+    return {"applied": len(fresh), "deduplicated": deduplicated, "users": len(totals)}
@@ -1,11 +1,14 @@
 # apps/ai_core/signals.py
 
 import logging
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import Task, RewardLog, Transaction, IdempotencyKey
+from .models import APIConfig, Task, RewardLog, Transaction, IdempotencyKey
+from .config_cache import publish_invalidation
 from .invitation_manager import reward_for_activation
+from .rewards import apply_reward_batch
 
 logger = logging.getLogger("ai_core.signals")
 User = get_user_model()
@@ -19,14 +22,18 @@ def handle_reward_log(sender, instance: RewardLog, created, **kwargs):
     if not created:
         return
 
-    # Optionally: auto-update user balance (if not handled elsewhere)
+    # Rows created outside the reward engine (which bulk-inserts and so
+    # never reaches this receiver) are credited through it here.
     try:
-        user_profile = instance.user.profile
-        user_profile.balance += instance.final_reward_ugx
-        user_profile.save(update_fields=["balance"])
-        logger.info(f"Reward applied for user {instance.user.id}: {instance.final_reward_ugx} UGX")
+        apply_reward_batch([{
+            "user_id": instance.user_id,
+            "amount": instance.final_reward_ugx,
+            "reference": f"rewardlog:{instance.pk}",
+            "reason": f"{instance.provider} reward",
+        }], write_reward_logs=False)
+        logger.info(f"Reward applied for user {instance.user_id}: {instance.final_reward_ugx} UGX")
     except Exception as e:
-        logger.exception(f"Failed to apply reward for user {instance.user.id}: {e}")
+        logger.exception(f"Failed to apply reward for user {instance.user_id}: {e}")
 
 
 # -------------------------------
@@ -53,3 +60,14 @@ def handle_transaction_completion(sender, instance: Transaction, created, **kwar
 def handle_task_completion(sender, instance: Task, **kwargs):
     if instance.is_completed:
         logger.info(f"Task marked completed: {instance.provider_name}:{instance.provider_task_id}")
+
+
+# -------------------------------
+# Provider config rotation
+# -------------------------------
+@receiver(post_save, sender=APIConfig)
+@receiver(post_delete, sender=APIConfig)
+def broadcast_api_config_change(sender, instance: APIConfig, **kwargs):
+    # After commit, so no worker reloads the old row before it is replaced
+    name = instance.name
+    transaction.on_commit(lambda: publish_invalidation(name))
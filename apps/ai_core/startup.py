@@ -0,0 +1,33 @@
+# apps/ai_core/startup.py
+"""Startup hooks for ai_core (see core/startup.py)."""
+import logging
+
+from django.conf import settings
+
+from core.startup import startup_hook
+from .models import APIConfig
+from .utils import encrypt_value
+
+logger = logging.getLogger("ai_core.startup")
+
+
+@startup_hook("seed_api_configs")
+def seed_api_configs():
+    """
+    Create the Flutterwave APIConfig from settings when it does not exist.
+    An existing row is never overwritten: rotations happen in the admin.
+    """
+    if not settings.FLUTTERWAVE_SECRET_KEY:
+        return
+
+    _, created = APIConfig.objects.get_or_create(
+        name="flutterwave",
+        defaults={
+            "base_url": settings.FLUTTERWAVE_BASE_URL,
+            "secret_key": encrypt_value(settings.FLUTTERWAVE_SECRET_KEY),
+            "public_key": encrypt_value(settings.FLUTTERWAVE_PUBLIC_KEY),
+            "webhook_secret": encrypt_value(settings.FLUTTERWAVE_WEBHOOK_SECRET),
+        },
+    )
+    if created:
+        logger.info("Seeded Flutterwave APIConfig from settings")
@@ -3,9 +3,13 @@
 import logging
 from celery import shared_task
 from django.utils import timezone
-from django.db import transaction
 
-from .utils import PROVIDERS, provider_supports_api
+from .postbacks import drain_postback_queue
+from .offer_sync import refresh_providers
+from .cache_keys import bump_catalogue_generation
+from .idempotency import idempotency_stats, reseed_idempotency_cache
+from .partitions import enforce_retention
+from .reconciliation import reconcile_transfers
 
 logger = logging.getLogger("ai_core.tasks")
 
@@ -13,32 +17,41 @@ logger = logging.getLogger("ai_core.tasks")
 # -----------------------------------------------------
 # DAILY OFFER / TASK REFRESH
 # -----------------------------------------------------
-@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=30, retry_kwargs={"max_retries": 3})
+@shared_task(bind=True)
 def scheduled_daily_task_refresh(self):
     """
     Runs once per day.
-    Refreshes API-based offerwalls (AdGem, OfferToro, etc).
+    Refreshes API-based offerwalls (AdGem, OfferToro, etc) concurrently;
+    each provider records its own TaskFetchLog / ProviderConnectionLog.
     """
     logger.info("Starting daily offer refresh")
 
-    for provider, cfg in PROVIDERS.items():
-        if not cfg.get("enabled"):
-            continue
+    results = refresh_providers()
+    bump_catalogue_generation()
 
-        if provider_supports_api(provider):
-            fetch_fn = cfg.get("fetch")
-            if not fetch_fn:
-                continue
+    logger.info(
+        "Daily offer refresh completed: %s",
+        {p: r["status"] for p, r in results.items()},
+    )
+    return {"status": "ok", "run_at": timezone.now().isoformat(), "providers": results}
 
-            try:
-                fetch_fn()  # user_id optional by design
-                logger.info("Refreshed provider: %s", provider)
-            except Exception as e:
-                logger.exception("Provider refresh failed: %s", provider)
-                raise
 
-    logger.info("Daily offer refresh completed")
-    return {"status": "ok", "run_at": timezone.now().isoformat()}
+# -----------------------------------------------------
+# POSTBACK QUEUE CONSUMER
+# -----------------------------------------------------
+@shared_task(bind=True, ignore_result=True)
+def process_postback_queue(self):
+    """
+    Applies staged offerwall postbacks in batches.
+    Triggered (debounced) by the webhook view and every minute by beat.
+    """
+    stats = drain_postback_queue()
+    if stats["applied"] or stats["failed"]:
+        logger.info(
+            "Postback queue drained: applied=%s deduplicated=%s failed=%s batches=%s",
+            stats["applied"], stats["deduplicated"], stats["failed"], stats["batches"],
+        )
+    return stats
 
 
 # -----------------------------------------------------
@@ -48,22 +61,38 @@ def scheduled_daily_task_refresh(self):
 def reconcile_pending_transactions(self):
     """
     Runs every 10 minutes.
-    Placeholder for:
-    - reconciling withdrawals
-    - fixing stuck transactions
+    Reconciles open withdrawals against Flutterwave's list-transfers
+    endpoint in chunks (see reconciliation.py).
     """
-    logger.info("Reconciling pending transactions")
+    stats = reconcile_transfers()
+    logger.info("Reconciliation completed: %s", stats)
+    return stats
 
-    # Example placeholder — adjust to your models
-    from apps.transactions.models import Transaction
 
-    with transaction.atomic():
-        pending = Transaction.objects.select_for_update().filter(status="pending")
+# -----------------------------------------------------
+# IDEMPOTENCY CACHE RESEED
+# -----------------------------------------------------
+@shared_task(bind=True, ignore_result=True)
+def reseed_idempotency_keys(self, force: bool = False):
+    """
+    Restores Redis idempotency keys from recent DB rows after a flush.
+    Cheap no-op while the seed sentinel is still present.
+    """
+    seeded = reseed_idempotency_cache(force=force)
+    stats = idempotency_stats()
+    logger.info("Idempotency stats: %s", stats)
+    return {"seeded": seeded, "stats": stats}
 
-        for tx in pending:
-            # your reconciliation logic here
-            tx.updated_at = timezone.now()
-            tx.save(update_fields=["updated_at"])
 
-    logger.info("Reconciliation completed")
-    return {"reconciled": pending.count()}
\ No newline at end of file
+# -----------------------------------------------------
+# LOG RETENTION
+# -----------------------------------------------------
+@shared_task(bind=True)
+def enforce_log_retention(self):
+    """
+    Archives and drops monthly log partitions older than LOG_RETENTION_MONTHS.
+    """
+    report = enforce_retention()
+    if report:
+        logger.info("Log retention: %s", report)
+    return report
@@ -1,7 +1,6 @@
 # apps/ai_core/transactions.py
 import json
 import uuid
-import time
 import logging
 from decimal import Decimal, ROUND_DOWN
 from functools import lru_cache
@@ -9,6 +8,7 @@ from typing import Optional, Dict, Any, Tuple
 
 import requests
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 from django.db import transaction as db_transaction
 from django.contrib.auth import get_user_model
@@ -16,19 +16,21 @@ from django.views.decorators.csrf import csrf_exempt
 from django.http import JsonResponse
 from celery import shared_task
 
-from .models import Transaction, APIConfig
-from .utils import get_logger, decrypt_value
+from .models import Transaction
+from .config_cache import get_api_config
+from .utils import get_http_session
+from .resilience import CircuitBreaker, CircuitOpenError, TransientPaymentError, retry_countdown
 from .notifications import notify_system_event, notify_user
 
 # -------------------------
 # Constants
 # -------------------------
 DEFAULT_HTTP_TIMEOUT = 20
-HTTP_RETRY_ATTEMPTS = 4
-HTTP_RETRY_BACKOFF = 2
+TRANSIENT_STATUS_CODES = (429, 500, 502, 503, 504)
 CURRENCY = "UGX"
+FLW_CONFIG_ALERT_INTERVAL = 60 * 10
 User = get_user_model()
-logger = get_logger("renocorp.transactions") or logging.getLogger("renocorp.transactions")
+logger = logging.getLogger("renocorp.transactions")
 
 
 # -------------------------
@@ -73,70 +75,95 @@ def _parse_json_response(response: Optional[requests.Response]) -> Dict[str, Any
 
 
 def _http_request(method: str, url: str, headers: Dict[str, str], json_payload: Optional[Dict[str, Any]] = None,
-                  timeout: int = DEFAULT_HTTP_TIMEOUT) -> Tuple[Optional[requests.Response], Dict[str, Any]]:
-    attempt = 0
-    last_exc = None
-    while attempt < HTTP_RETRY_ATTEMPTS:
-        try:
-            resp = requests.request(method, url, headers=headers, json=json_payload, timeout=timeout)
-            parsed = _parse_json_response(resp)
-            return resp, parsed.get("json") or {}
-        except requests.RequestException as exc:
-            last_exc = exc
-            wait = HTTP_RETRY_BACKOFF ** attempt
-            logger.warning("HTTP %s failed for %s (attempt %s/%s), retrying in %s sec. Error: %s",
-                           method, url, attempt + 1, HTTP_RETRY_ATTEMPTS, wait, str(exc))
-            time.sleep(wait)
-            attempt += 1
-        except Exception as exc:
-            last_exc = exc
-            logger.exception("Unexpected HTTP %s error for %s", method, url)
-            time.sleep(HTTP_RETRY_BACKOFF)
-            attempt += 1
-    logger.error("HTTP %s exhausted retries for %s: %s", method, url, str(last_exc))
-    return None, {}
+                  timeout: int = DEFAULT_HTTP_TIMEOUT,
+                  raise_transient: bool = False) -> Tuple[Optional[requests.Response], Dict[str, Any]]:
+    """
+    One attempt, never sleeps. Transient failures (circuit open, connection
+    errors, 429 / 5xx) trip the per-host circuit breaker; with
+    raise_transient=True they raise TransientPaymentError so a Celery task
+    can reschedule itself with self.retry(countdown=...).
+    """
+    breaker = CircuitBreaker.for_url(url)
+    try:
+        breaker.check()
+    except CircuitOpenError:
+        logger.warning("HTTP %s to %s skipped: circuit open", method, url)
+        if raise_transient:
+            raise
+        return None, {}
+
+    session = get_http_session("payments")
+    try:
+        resp = session.request(method, url, headers=headers, json=json_payload, timeout=timeout)
+    except requests.RequestException as exc:
+        breaker.record_failure()
+        logger.warning("HTTP %s failed for %s: %s", method, url, str(exc))
+        if raise_transient:
+            raise TransientPaymentError(str(exc)) from exc
+        return None, {}
+    except Exception:
+        logger.exception("Unexpected HTTP %s error for %s", method, url)
+        return None, {}
+
+    if resp.status_code in TRANSIENT_STATUS_CODES:
+        breaker.record_failure()
+        if raise_transient:
+            retry_after = resp.headers.get("Retry-After")
+            raise TransientPaymentError(
+                f"HTTP {resp.status_code} from {url}",
+                retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+            )
+    else:
+        breaker.record_success()
 
+    parsed = _parse_json_response(resp)
+    return resp, parsed.get("json") or {}
 
-def _http_post(url: str, headers: Dict[str, str], json_payload: Dict[str, Any], timeout: int = DEFAULT_HTTP_TIMEOUT):
-    return _http_request("POST", url, headers, json_payload, timeout)
 
+def _http_post(url: str, headers: Dict[str, str], json_payload: Dict[str, Any], timeout: int = DEFAULT_HTTP_TIMEOUT,
+               raise_transient: bool = False):
+    return _http_request("POST", url, headers, json_payload, timeout, raise_transient)
 
-def _http_get(url: str, headers: Dict[str, str], timeout: int = DEFAULT_HTTP_TIMEOUT):
-    return _http_request("GET", url, headers, None, timeout)
+
+def _http_get(url: str, headers: Dict[str, str], timeout: int = DEFAULT_HTTP_TIMEOUT,
+              raise_transient: bool = False):
+    return _http_request("GET", url, headers, None, timeout, raise_transient)
 
 
 # -------------------------
 # Flutterwave Config
 # -------------------------
-@lru_cache(maxsize=2)
 def _get_flutterwave_config_cached() -> Optional[Dict[str, str]]:
-    return _get_flutterwave_config()
-
-
-def _get_flutterwave_config() -> Optional[Dict[str, str]]:
+    """
+    Decrypted Flutterwave credentials, or None. Cached per process with a
+    TTL and dropped on every APIConfig save (see config_cache), so rotated
+    keys are picked up without a restart.
+    """
     try:
-        config = APIConfig.objects.get(name__iexact="flutterwave")
-        base_url = (getattr(config, "base_url", "") or "").rstrip("/")
-        secret_key = decrypt_value(getattr(config, "secret_key", None)) if getattr(config, "secret_key", None) else None
-        public_key = decrypt_value(getattr(config, "public_key", None)) if getattr(config, "public_key", None) else None
-        webhook_secret = decrypt_value(getattr(config, "webhook_secret", None)) if getattr(config, "webhook_secret", None) else None
-
-        if not base_url or not secret_key:
-            logger.error("Flutterwave configuration missing base_url or secret_key")
-            _safe_notify_system_event("FLW_CONFIG_ERROR", "Missing Flutterwave API credentials", "error")
-            return None
-
-        return {"base_url": base_url, "secret_key": secret_key, "public_key": public_key, "webhook_secret": webhook_secret}
-
-    except APIConfig.DoesNotExist:
-        logger.error("Flutterwave configuration not found in DB.")
-        _safe_notify_system_event("FLW_CONFIG_ERROR", "Missing Flutterwave API credentials", "error")
-        return None
+        config = get_api_config("flutterwave")
     except Exception as exc:
         logger.exception("Error retrieving Flutterwave APIConfig: %s", str(exc))
-        _safe_notify_system_event("FLW_CONFIG_ERROR", str(exc), "error")
+        _report_flutterwave_config_error(str(exc))
         return None
 
+    if not config or not config["base_url"] or not config["secret_key"]:
+        logger.error("Flutterwave configuration missing, inactive or without base_url/secret_key")
+        _report_flutterwave_config_error("Missing Flutterwave API credentials")
+        return None
+
+    return {
+        "base_url": config["base_url"],
+        "secret_key": config["secret_key"],
+        "public_key": config["public_key"],
+        "webhook_secret": config["webhook_secret"],
+    }
+
+
+def _report_flutterwave_config_error(message: str) -> None:
+    # Every payment call hits this while the config is broken: alert once per window
+    if cache.add("flw_config_error_notified", 1, FLW_CONFIG_ALERT_INTERVAL):
+        _safe_notify_system_event("FLW_CONFIG_ERROR", message, "error")
+
 
 def _get_headers(secret_key: str) -> Dict[str, str]:
     return {"Authorization": f"Bearer {secret_key}", "Content-Type": "application/json"}
@@ -155,9 +182,47 @@ def _notify_failure(tx: Optional[Transaction], message: str, event_code: str):
                 tx.save(update_fields=["status", "failure_reason"])
     except Exception:
         logger.exception("Failed to mark transaction %s failed", getattr(tx, "id", "<unknown>"))
+    if tx:
+        transfer_settled(tx)
     _safe_notify_system_event(event_code, message, "error")
 
 
+def _await_reconciliation(tx: Transaction, message: str, event_code: str):
+    """
+    A request for this transfer may have reached the provider, so failing it
+    (and refunding a withdrawal) could pay the user twice. Leave it open as
+    "processing"; the webhook or the reconciler settles it.
+    """
+    try:
+        Transaction.objects.filter(pk=tx.pk, status__in=("pending", "queued")).update(
+            status="processing", failure_reason=str(message)[:1000]
+        )
+    except Exception:
+        logger.exception("Failed to leave transaction %s for reconciliation", tx.pk)
+    _safe_notify_system_event(event_code, f"{message} (left for reconciliation)", "warning")
+
+
+def _fail_unless_sent(tx: Transaction, sent: bool, message: str, event_code: str) -> Dict[str, Any]:
+    if sent:
+        _await_reconciliation(tx, message, event_code)
+        return {"status": "processing", "message": message}
+    _notify_failure(tx, message, event_code)
+    return {"status": "failed", "message": message}
+
+
+def transfer_settled(tx: Transaction) -> None:
+    """Propagate a transfer's final status to whatever issued it."""
+    try:
+        if tx.tx_type == "payroll":
+            from apps.admin_panel.payroll import note_transfer_result
+            note_transfer_result(tx.tx_ref)
+        elif tx.tx_type == "withdrawal":
+            from apps.dashboard.withdrawals import settle_withdrawal
+            settle_withdrawal(tx)
+    except Exception:
+        logger.exception("Failed to propagate final status of transaction %s", tx.id)
+
+
 # -------------------------
 # Wallet / Balance Helpers
 # -------------------------
@@ -169,7 +234,7 @@ def _get_wallet_model_cached() -> Tuple[Optional[type], Optional[str]]:
     except Exception:
         try:
             from apps.dashboard.models import UserProfile
-            return UserProfile, "balance_ugx"
+            return UserProfile, "balance"
         except Exception:
             logger.warning("No wallet model found (apps.wallets or apps.dashboard).")
             return None, None
@@ -186,7 +251,8 @@ def _to_minor_units(amount: Any) -> int:
         raise ValueError("invalid_amount")
 
 
-def _deduct_user_balance_atomic(user, amount: Any) -> None:
+def _deduct_user_balance_atomic(user, amount: Any, reason: str, reference: str) -> None:
+    """Debit the wallet; the dashboard wallet is journalled in the same transaction."""
     Model, field = _get_wallet_model_cached()
     if not Model:
         raise Exception("no_wallet_model_found")
@@ -204,6 +270,11 @@ def _deduct_user_balance_atomic(user, amount: Any) -> None:
             raise ValueError("insufficient_balance")
         setattr(obj, field, current_int - amount_int)
         obj.save(update_fields=[field])
+        if Model._meta.label == "dashboard.UserProfile":
+            from apps.dashboard.models import LedgerEntry
+            LedgerEntry.objects.create(
+                user=user, amount=amount_int, entry_type="debit", reason=reason, reference=reference
+            )
 
 
 # -------------------------
@@ -219,18 +290,28 @@ def celery_enabled() -> bool:
 # Celery Tasks
 # -------------------------
 @shared_task(bind=True, max_retries=4, default_retry_delay=10)
-def celery_process_withdrawal(self, tx_id: int, account_bank: str, account_number: str, amount: Any):
-    from .transactions import confirm_withdrawal_status_task
+def celery_process_withdrawal(self, tx_id: int, account_bank: str, account_number: str, amount: Any,
+                              circuit_waits: int = 0, sent: bool = False):
+    """
+    Send one transfer. `sent` is carried across retries once any attempt may
+    have reached Flutterwave; from then on a failure is not final (the
+    provider may have accepted it) and the transfer is left "processing"
+    for the reconciler instead of being failed and refunded.
+    """
     try:
         tx = Transaction.objects.select_related("user").get(pk=tx_id)
     except Transaction.DoesNotExist:
         logger.error("celery_process_withdrawal: transaction %s not found", tx_id)
         return {"status": "failed", "message": "tx_not_found"}
 
+    if tx.status not in ("pending", "queued"):
+        # Re-sent after a resumed payroll run; never overwrite a settled transfer
+        logger.info("celery_process_withdrawal: transaction %s already %s", tx_id, tx.status)
+        return {"status": tx.status, "message": "already_processed"}
+
     config = _get_flutterwave_config_cached()
     if not config or not config.get("secret_key"):
-        _notify_failure(tx, "Missing flutterwave config", "WITHDRAWAL_CONFIG_MISSING")
-        return {"status": "failed", "message": "missing_config"}
+        return _fail_unless_sent(tx, sent, "Missing flutterwave config", "WITHDRAWAL_CONFIG_MISSING")
 
     reference = tx.tx_ref or _generate_reference()
     payload = {
@@ -243,7 +324,37 @@ def celery_process_withdrawal(self, tx_id: int, account_bank: str, account_numbe
     }
     url = f"{config['base_url']}/transfers"
 
-    response, data = _http_post(url, headers=_get_headers(config["secret_key"]), json_payload=payload, timeout=30)
+    try:
+        response, data = _http_post(url, headers=_get_headers(config["secret_key"]), json_payload=payload,
+                                    timeout=30, raise_transient=True)
+    except CircuitOpenError as exc:
+        # Nothing was sent: wait the outage out on a separate budget instead of
+        # spending max_retries, keeping the retry count for real failures
+        if circuit_waits < getattr(settings, "WITHDRAWAL_CIRCUIT_MAX_WAITS", 240):
+            countdown = retry_countdown(0, retry_after=exc.retry_after)
+            logger.warning("Withdrawal %s deferred %ss: circuit open", tx_id, countdown)
+            self.apply_async(
+                (tx_id, account_bank, account_number, amount),
+                {"circuit_waits": circuit_waits + 1, "sent": sent},
+                countdown=countdown,
+                retries=self.request.retries,
+            )
+            return {"status": "deferred", "message": "circuit_open"}
+        return _fail_unless_sent(tx, sent, f"Provider unavailable: {exc}", "WITHDRAWAL_FAIL")
+    except TransientPaymentError as exc:
+        # The request may have been accepted before the failure was observed.
+        # tx_ref is the transfer reference on every attempt, so Flutterwave
+        # de-duplicates a retry; the outcome is unknown until it is reconciled.
+        if self.request.retries < self.max_retries:
+            countdown = retry_countdown(self.request.retries, retry_after=exc.retry_after)
+            logger.warning("Withdrawal %s transient failure (%s), retrying in %ss", tx_id, exc, countdown)
+            raise self.retry(
+                exc=exc,
+                countdown=countdown,
+                kwargs={"circuit_waits": circuit_waits, "sent": True},
+            )
+        return _fail_unless_sent(tx, True, f"Provider unavailable: {exc}", "WITHDRAWAL_FAIL")
+
     status_code = getattr(response, "status_code", None) if response else None
     success = (status_code in (200, 201)) and isinstance(data, dict) and data.get("status") == "success"
 
@@ -261,36 +372,30 @@ def celery_process_withdrawal(self, tx_id: int, account_bank: str, account_numbe
                     tx.tx_ref = reference
                 tx.save(update_fields=["provider_reference", "raw_provider_response", "status", "sent_at", "tx_ref"])
         except Exception:
+            # Accepted by the provider: never fail (and refund) it from here
             logger.exception("Failed updating tx after provider accepted transfer for tx %s", tx_id)
-            _notify_failure(tx, "DB update error after transfer initiation", "WITHDRAWAL_DB_ERROR")
-            return {"status": "failed", "message": "db_error"}
+            _await_reconciliation(tx, "DB update error after transfer initiation", "WITHDRAWAL_DB_ERROR")
+            return {"status": "processing", "message": "db_error"}
 
         _safe_notify_user(tx.user, "Withdrawal Processing", f"Your withdrawal of UGX {amount} is being processed.", "info")
         _safe_notify_system_event("WITHDRAWAL_INITIATED",
                                   f"Withdrawal started for {getattr(tx.user, 'username', tx.user_id)}", "info")
 
-        try:
-            confirm_withdrawal_status_task.apply_async(
-                (provider_ref,),
-                countdown=getattr(settings, "WITHDRAWAL_STATUS_POLL_DELAY", 30)
-            )
-        except Exception:
-            logger.exception("Failed to schedule confirm_withdrawal_status_task for provider_ref %s", provider_ref)
+        # Final status arrives via webhook or the batched reconciler
+        # (reconcile_pending_transactions), not per-transfer polling
 
         return {"status": "processing", "provider_ref": provider_ref}
     else:
         msg = (data.get("message") or data.get("error") or "Withdraw initiation failed") if isinstance(data, dict) else "Withdraw initiation failed"
-        _notify_failure(tx, msg, "WITHDRAWAL_FAIL")
-        return {"status": "failed", "message": msg}
+        # A rejection is definitive only if no earlier attempt may have landed
+        # (a re-sent reference is rejected as a duplicate of an accepted one)
+        return _fail_unless_sent(tx, sent, msg, "WITHDRAWAL_FAIL")
 
 
-@shared_task(bind=True, max_retries=4, default_retry_delay=15)
+@shared_task(bind=True)
 def confirm_withdrawal_status_task(self, reference: str):
-    from .transactions import confirm_withdrawal_status
-    result = confirm_withdrawal_status(reference)
-    if result and result.get("status") == "processing":
-        raise self.retry(countdown=getattr(settings, "WITHDRAWAL_STATUS_POLL_DELAY", 60))
-    return result
+    """One-off status check (manual / admin use); routine checks are batched."""
+    return confirm_withdrawal_status(reference)
 
 
 # -------------------------
@@ -298,13 +403,14 @@ def confirm_withdrawal_status_task(self, reference: str):
 # -------------------------
 def initiate_subscription(user, package_id, amount):
     try:
-        _deduct_user_balance_atomic(user, amount)
+        tx_ref = _generate_reference("SUB")
+        _deduct_user_balance_atomic(user, amount, "subscription", tx_ref)
         tx = Transaction.objects.create(
             user=user,
             tx_type="subscription",
             amount=amount,
             status="processing",
-            tx_ref=_generate_reference("SUB")
+            tx_ref=tx_ref
         )
         _safe_notify_user(user, "Subscription Initiated", f"Subscription payment of UGX {amount} started.", "info")
         _safe_notify_system_event("SUB_INIT", f"User {user.id} started subscription {tx.id}", "info")
@@ -342,13 +448,14 @@ def verify_transaction(tx_ref: str):
 
 def initiate_withdrawal(user, amount, account_bank, account_number):
     try:
-        _deduct_user_balance_atomic(user, amount)
+        tx_ref = _generate_reference("WD")
+        _deduct_user_balance_atomic(user, amount, "withdrawal", tx_ref)
         tx = Transaction.objects.create(
             user=user,
             tx_type="withdrawal",
             amount=amount,
             status="pending",
-            tx_ref=_generate_reference("WD")
+            tx_ref=tx_ref
         )
         celery_process_withdrawal.apply_async((tx.id, account_bank, account_number, amount))
         return tx
@@ -375,11 +482,13 @@ def confirm_withdrawal_status(reference: str):
         if status == "SUCCESSFUL":
             tx.status = "success"
             tx.save(update_fields=["status"])
+            transfer_settled(tx)
             _safe_notify_user(tx.user, "Withdrawal Successful", f"Your withdrawal of UGX {tx.amount} succeeded.", "info")
             return {"status": "success"}
         elif status in ["FAILED", "DECLINED"]:
             tx.status = "failed"
             tx.save(update_fields=["status"])
+            transfer_settled(tx)
             _safe_notify_user(tx.user, "Withdrawal Failed", f"Your withdrawal of UGX {tx.amount} failed.", "error")
             return {"status": "failed"}
         else:
@@ -420,10 +529,12 @@ def handle_flutterwave_webhook(request):
         if status == "successful":
             tx.status = "success"
             tx.save(update_fields=["status"])
+            transfer_settled(tx)
             _safe_notify_user(tx.user, "Payment Successful", f"Payment UGX {tx.amount} completed.", "info")
         elif status in ["failed", "declined"]:
             tx.status = "failed"
             tx.save(update_fields=["status"])
+            transfer_settled(tx)
             _safe_notify_user(tx.user, "Payment Failed", f"Payment UGX {tx.amount} failed.", "error")
         else:
             tx.status = "processing"
@@ -436,55 +547,3 @@ def handle_flutterwave_webhook(request):
 # -------------------------
 # Payroll: Automatic Sunday Payout
 # -------------------------
-from django.db.models import Q
-from .models import PayrollEntry
-
-@shared_task
-def run_sunday_payroll():
-    """
-    Pay all enabled payroll users every Sunday at 00:00
-    """
-    admin_user = User.objects.filter(is_superuser=True).first()  # notify first admin
-    today = timezone.now().date()
-
-    # Fetch entries enabled for auto pay and not already paid today
-    payroll_entries = PayrollEntry.objects.filter(
-        enabled=True,
-        auto_withdraw=True
-    ).exclude(last_paid_at=today)
-
-    for entry in payroll_entries:
-        try:
-            # Create Transaction for payroll
-            tx = Transaction.objects.create(
-                user=None,
-                tx_type="payroll",
-                amount=Decimal(entry.amount),
-                status="pending",
-                tx_ref=_generate_reference("PAY")
-            )
-
-            # Initiate withdrawal via existing celery_process_withdrawal
-            celery_process_withdrawal.apply_async(
-                (tx.id, entry.bank_code or "000", entry.account_number, entry.amount)
-            )
-
-            # Update last_paid_at to prevent double payout
-            entry.last_paid_at = today
-            entry.save(update_fields=["last_paid_at"])
-
-            _safe_notify_system_event(
-                "PAYROLL_INITIATED",
-                f"Payroll for {entry.name} ({_mask_sensitive(entry.account_number)}) initiated.",
-                level="info"
-            )
-
-        except Exception as exc:
-            _safe_notify_system_event(
-                "PAYROLL_FAILED",
-                f"Failed to initiate payroll for {entry.name} ({_mask_sensitive(entry.account_number)}): {exc}",
-                level="error"
-            )
-            if admin_user:
-                _safe_notify_user(admin_user, "Payroll Failure",
-                                  f"Failed to pay {entry.name}: {exc}", level="error")        
@@ -19,7 +19,10 @@ Designed for Django + Celery at scale.
 import hmac
 import hashlib
 import logging
+import os
+import threading
 from decimal import Decimal, ROUND_DOWN, InvalidOperation
+from functools import lru_cache
 from typing import Dict, Any, Optional
 from ipaddress import ip_address, ip_network
 
@@ -27,6 +30,7 @@ from ipaddress import ip_address, ip_network
 # Third‑Party
 # =========================
 import requests
+from cryptography.fernet import Fernet, InvalidToken
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
@@ -34,6 +38,7 @@ from urllib3.util.retry import Retry
 # Django
 # =========================
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from django.utils import timezone
 
 logger = logging.getLogger("ai_core.utils")
@@ -45,20 +50,47 @@ logger = logging.getLogger("ai_core.utils")
 HTTP_TIMEOUT = 10
 
 # =====================================================
-# HTTP SESSION (SAFE, SHARED)
+# HTTP CLIENT REGISTRY (POOLED, PROCESS-WIDE)
 # =====================================================
+# One requests.Session per client name per process. Each session keeps a
+# urllib3 pool per host, so TLS connections are reused across calls.
+# Sessions are dropped in forked children (Celery prefork) because pooled
+# sockets must never be shared between processes.
+
+RETRY_STATUS_FORCELIST = (429, 500, 502, 503, 504)
+
+_http_sessions: Dict[str, requests.Session] = {}
+_http_sessions_pid: Optional[int] = None
+_http_sessions_lock = threading.Lock()
+
+
+def _build_retry(policy: Dict[str, Any]) -> Retry:
+    if not policy["in_process"]:
+        # One immediate reconnect (stale keep-alive socket), never a sleep;
+        # real retries are rescheduled by the caller (Celery countdown)
+        return Retry(total=1, connect=1, read=0, status=0, other=0,
+                     backoff_factor=0, respect_retry_after_header=False,
+                     raise_on_status=False)
+
+    return Retry(
+        total=getattr(settings, "HTTP_RETRY_TOTAL", 3),
+        connect=getattr(settings, "HTTP_RETRY_TOTAL", 3),
+        backoff_factor=getattr(settings, "HTTP_RETRY_BACKOFF", 0.5),
+        status_forcelist=RETRY_STATUS_FORCELIST,
+        allowed_methods=frozenset(policy["status_methods"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
 
-def get_http_session() -> requests.Session:
+def _build_session(policy: Dict[str, Any]) -> requests.Session:
     session = requests.Session()
 
-    retries = Retry(
-        total=3,
-        backoff_factor=0.5,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=["GET", "POST"],
+    adapter = HTTPAdapter(
+        pool_connections=getattr(settings, "HTTP_POOL_CONNECTIONS", 10),
+        pool_maxsize=getattr(settings, "HTTP_POOL_MAXSIZE", 20),
+        max_retries=_build_retry(policy),
     )
-
-    adapter = HTTPAdapter(max_retries=retries)
     session.mount("https://", adapter)
     session.mount("http://", adapter)
 
@@ -69,6 +101,51 @@ def get_http_session() -> requests.Session:
 
     return session
 
+
+# client name -> retry policy.
+# status_methods: methods retried on a retryable status.
+# in_process: False means the adapter never backs off; callers reschedule
+# instead (see resilience.py) so Celery workers never sleep.
+HTTP_CLIENTS = {
+    "default": {"status_methods": ("GET", "HEAD", "OPTIONS"), "in_process": True},
+    "payments": {"status_methods": (), "in_process": False},
+}
+
+
+def reset_http_sessions() -> None:
+    """Drop every pooled session (called in forked children)."""
+    global _http_sessions_pid
+    for session in list(_http_sessions.values()):
+        try:
+            session.close()
+        except Exception:
+            pass
+    _http_sessions.clear()
+    _http_sessions_pid = os.getpid()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_http_sessions)
+
+
+def get_http_session(client: str = "default") -> requests.Session:
+    """
+    Shared, pooled session for a client name. Safe to call per request.
+    """
+    if _http_sessions_pid != os.getpid():
+        with _http_sessions_lock:
+            if _http_sessions_pid != os.getpid():
+                reset_http_sessions()
+
+    session = _http_sessions.get(client)
+    if session is None:
+        with _http_sessions_lock:
+            session = _http_sessions.get(client)
+            if session is None:
+                session = _build_session(HTTP_CLIENTS.get(client, HTTP_CLIENTS["default"]))
+                _http_sessions[client] = session
+    return session
+
 # =====================================================
 # CURRENCY NORMALIZATION (USD → UGX INTEGER)
 # =====================================================
@@ -96,6 +173,54 @@ def verify_md5(user_id: str, transaction_id: str, reward: str, secret: str, sign
     return expected == signature
 
 
+@lru_cache(maxsize=4)
+def _fernet(key: str) -> Fernet:
+    return Fernet(key.encode())
+
+
+def validate_encryption_key() -> None:
+    """Fail at startup, not on the first payout, if the key is unusable."""
+    key = getattr(settings, "API_CONFIG_ENCRYPTION_KEY", "")
+    if not key:
+        return
+    try:
+        _fernet(key)
+    except (ValueError, TypeError) as exc:
+        raise ImproperlyConfigured(
+            "API_CONFIG_ENCRYPTION_KEY must be a Fernet key "
+            f"(32 url-safe base64-encoded bytes, see Fernet.generate_key()): {exc}"
+        )
+
+
+def encrypt_value(value: Optional[str]) -> Optional[str]:
+    """Inverse of decrypt_value; a no-op without API_CONFIG_ENCRYPTION_KEY."""
+    if not value:
+        return value
+    key = getattr(settings, "API_CONFIG_ENCRYPTION_KEY", "")
+    if not key:
+        return value
+    return _fernet(key).encrypt(value.encode()).decode()
+
+
+def decrypt_value(value: Optional[str]) -> Optional[str]:
+    """
+    Decrypt a Fernet token stored in APIConfig. With no
+    API_CONFIG_ENCRYPTION_KEY configured values are stored in plaintext
+    and returned unchanged. Callers should go through config_cache rather
+    than decrypting per request.
+    """
+    if not value:
+        return value
+    key = getattr(settings, "API_CONFIG_ENCRYPTION_KEY", "")
+    if not key:
+        return value
+    try:
+        return _fernet(key).decrypt(value.encode()).decode()
+    except InvalidToken:
+        logger.error("Could not decrypt APIConfig value (wrong key or plaintext value)")
+        return None
+
+
 def verify_ip(request_ip: str, allowed_ranges: list[str]) -> bool:
     try:
         ip = ip_address(request_ip)
@@ -134,7 +259,7 @@ def iframe_adscend(uid: str) -> str:
 # PROVIDER‑SPECIFIC API FETCHERS (CELERY ONLY)
 # =====================================================
 
-def fetch_adgem(user_id: Optional[str] = None) -> dict:
+def fetch_adgem(user_id: Optional[str] = None, timeout: float = HTTP_TIMEOUT) -> dict:
     session = get_http_session()
     headers = {"Authorization": f"Bearer {settings.ADGEM_API_TOKEN}"}
     params = {"user_id": user_id} if user_id else {}
@@ -144,7 +269,7 @@ def fetch_adgem(user_id: Optional[str] = None) -> dict:
             settings.ADGEM_API_BASE_URL,
             headers=headers,
             params=params,
-            timeout=HTTP_TIMEOUT,
+            timeout=timeout,
         )
         r.raise_for_status()
         return r.json()
@@ -153,18 +278,17 @@ def fetch_adgem(user_id: Optional[str] = None) -> dict:
         raise
 
 
-def fetch_offertoro(user_id: str) -> dict:
+def fetch_offertoro(user_id: Optional[str] = None, timeout: float = HTTP_TIMEOUT) -> dict:
     session = get_http_session()
-    params = {
-        "api_key": settings.OFFERTORO_API_KEY,
-        "uid": user_id,
-    }
+    params = {"api_key": settings.OFFERTORO_API_KEY}
+    if user_id:
+        params["uid"] = user_id
 
     try:
         r = session.get(
             settings.OFFERTORO_API_BASE_URL,
             params=params,
-            timeout=HTTP_TIMEOUT,
+            timeout=timeout,
         )
         r.raise_for_status()
         return r.json()
@@ -195,7 +319,7 @@ PROVIDERS: Dict[str, Dict[str, Any]] = {
         "iframe": iframe_wannads,
         "postback": {
             "method": "md5",
-            "secret": settings.WANNADS_API_SECRET,
+            "secret_setting": "WANNADS_API_SECRET",
         },
     },
     "adscend": {
@@ -210,7 +334,7 @@ PROVIDERS: Dict[str, Dict[str, Any]] = {
         "fetch": fetch_adgem,
         "postback": {
             "method": "hmac",
-            "secret": settings.ADGEM_POSTBACK_KEY,
+            "secret_setting": "ADGEM_POSTBACK_KEY",
         },
     },
     "offertoro": {
@@ -242,6 +366,22 @@ def get_iframe_url(provider: str, user_uid: str) -> Optional[str]:
 def provider_supports_api(provider: str) -> bool:
     return provider in PROVIDERS and PROVIDERS[provider]["mode"] == "api"
 
+
+def postback_secret(provider: str) -> Optional[str]:
+    """
+    Postback signing secret, resolved per call so a rotation takes effect
+    without a restart: an active APIConfig named after the provider (its
+    webhook_secret) wins over the settings value.
+    """
+    from .config_cache import get_api_config
+
+    config = get_api_config(provider)
+    if config and config.get("webhook_secret"):
+        return config["webhook_secret"]
+
+    setting = PROVIDERS.get(provider, {}).get("postback", {}).get("secret_setting")
+    return getattr(settings, setting, None) if setting else None
+
 # =====================================================
 # POSTBACK NORMALIZATION (PROVIDER‑AGNOSTIC)
 # =====================================================
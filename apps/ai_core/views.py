@@ -18,24 +18,22 @@ from django.views.decorators.http import require_http_methods
 from django.core.cache import cache
 from django.db import transaction, IntegrityError
 from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404
 from django.conf import settings
+from django.utils import timezone
 
 # =========================
 # Local
 # =========================
-from .models import (
-    Task,
-    RewardLog,
-    WebhookLog,
-    IdempotencyKey,
-)
+from .models import Task
+from .postbacks import stage_postback, apply_pending_postback
+from .offer_sync import refresh_providers
+from .cache_keys import api_tasks_key, bump_catalogue_generation
 from .utils import (
     PROVIDERS,
     get_iframe_url,
     provider_enabled,
     normalize_postback,
-    normalize_usd_to_ugx,
+    postback_secret,
     verify_hmac,
     verify_md5,
     verify_ip,
@@ -52,7 +50,7 @@ CACHE_TIMEOUT = 60 * 5
 @require_http_methods(["GET"])
 def api_task_list_view(request):
     provider = request.GET.get("provider")
-    cache_key = f"api_tasks:{provider or 'all'}"
+    cache_key = api_tasks_key(provider)
 
     cached = cache.get(cache_key)
     if cached:
@@ -106,39 +104,12 @@ def iframe_offerwalls_view(request):
 # =====================================================
 @require_http_methods(["POST"])
 def refresh_api_tasks_view(request):
-    created = 0
-
-    for provider, cfg in PROVIDERS.items():
-        if cfg["mode"] != "api" or not provider_enabled(provider):
-            continue
-
-        fetcher = cfg.get("fetch")
-        if not fetcher:
-            continue
-
-        try:
-            result = fetcher(None)
-        except Exception:
-            logger.exception("Provider fetch failed", extra={"provider": provider})
-            continue
+    results = refresh_providers()
+    created = sum(r.get("created", 0) for r in results.values())
 
-        for offer in result.get("offers", []):
-            _, was_created = Task.objects.update_or_create(
-                provider_name=provider,
-                provider_task_id=str(offer.get("id")),
-                defaults={
-                    "title": offer.get("title", "Unnamed Offer"),
-                    "reward_ugx": normalize_usd_to_ugx(offer.get("payout")),
-                    "category": offer.get("category", "general"),
-                    "is_active": True,
-                    "source": "api",
-                },
-            )
-            if was_created:
-                created += 1
-
-    cache.clear()
-    return JsonResponse({"status": "ok", "new_tasks": created})
+    # New generation: catalogue keys miss from now on, old ones age out
+    bump_catalogue_generation()
+    return JsonResponse({"status": "ok", "new_tasks": created, "providers": results})
 
 
 # =====================================================
@@ -169,9 +140,14 @@ def provider_webhook_view(request, provider: str):
     postback_cfg = cfg.get("postback", {})
     method = postback_cfg.get("method")
 
+    secret = postback_secret(provider) if method in ("hmac", "md5") else None
+    if method in ("hmac", "md5") and not secret:
+        logger.error("Postback secret not configured", extra={"provider": provider})
+        return HttpResponse(status=403)
+
     if method == "hmac":
         sig = request.headers.get("X-Signature")
-        if not sig or not verify_hmac(raw_body, postback_cfg["secret"], sig):
+        if not sig or not verify_hmac(raw_body, secret, sig):
             return HttpResponse(status=403)
 
     elif method == "md5":
@@ -179,7 +155,7 @@ def provider_webhook_view(request, provider: str):
             payload.get("user_id"),
             payload.get("transaction_id"),
             payload.get("reward"),
-            postback_cfg["secret"],
+            secret,
             payload.get("signature"),
         ):
             return HttpResponse(status=403)
@@ -194,59 +170,44 @@ def provider_webhook_view(request, provider: str):
     # -----------------------------
     data = normalize_postback(provider, payload)
 
-    user_id = data.get("user_id")
     tx_id = data.get("transaction_id")
     reward = data.get("reward_ugx", 0)
 
-    if not user_id or not tx_id or reward <= 0:
+    try:
+        user_id = int(data.get("user_id"))
+    except (TypeError, ValueError):
         return HttpResponse(status=400)
 
-    user = get_object_or_404(User.objects.select_related("profile"), pk=user_id)
-
-    task = Task.objects.filter(
-        provider_name=provider,
-        provider_task_id=data.get("offer_id"),
-    ).first()
+    if not tx_id or reward <= 0:
+        return HttpResponse(status=400)
 
-    category_code = task.category if task else "other"
+    if not User.objects.filter(pk=user_id).exists():
+        return HttpResponse(status=404)
 
-    # 🔐 Authoritative reward source
-    admin_cap = task.admin_reward_ugx if task else reward
-    final_reward = min(reward, admin_cap)
+    data["user_id"] = user_id
 
     # -----------------------------
-    # ATOMIC + IDEMPOTENT
+    # IDEMPOTENT STAGING
     # -----------------------------
-    try:
-        with transaction.atomic():
-            IdempotencyKey.objects.create(
-                provider=provider,
-                unique_hash=tx_id,
-                user=user,
-            )
-
-            user.profile.balance += final_reward
-            user.profile.save(update_fields=["balance"])
-
-            RewardLog.objects.create(
-                user=user,
-                task=task,
-                provider=provider,
-                final_reward_ugx=final_reward,
-                raw_payload=data["raw"],
-                category=category_code,
-            )
-
-            WebhookLog.objects.create(
-                provider=provider,
-                user=user,
-                tx_id=tx_id,
-                reward_ugx=final_reward,
-                status="success",
-                raw_payload=data["raw"],
-            )
+    accept_fast = getattr(settings, "POSTBACK_ACCEPT_FAST", True)
 
+    try:
+        pending = stage_postback(data, schedule=accept_fast)
     except IntegrityError:
+        pending = None
+
+    if pending is None:
         return JsonResponse({"status": "duplicate"})
 
+    # ⚡ Accept-fast: crediting happens in the Celery consumer
+    if accept_fast:
+        return JsonResponse({"status": "accepted"})
+
+    # Synchronous fallback: credit inside the request
+    with transaction.atomic():
+        final_reward = apply_pending_postback(pending)
+        pending.status = "applied"
+        pending.processed_at = timezone.now()
+        pending.save(update_fields=["status", "processed_at"])
+
     return JsonResponse({"status": "ok", "reward_ugx": final_reward})
@@ -0,0 +1,79 @@
+# apps/dashboard/feeds.py
+"""
+Per-user task feed.
+
+Each task type keeps one global, reward-sorted candidate list in the cache,
+keyed by the catalogue generation (see apps.ai_core.cache_keys), so it is
+built once for everyone rather than once per user.
+
+Serving a user is one indexed lookup: which of those candidate ids has the
+user already completed. CompletedTask's unique (user, task_id, provider)
+index covers the (user_id, task_id) prefix. If a heavy user has completed
+most of the candidates, the feed falls back to a NOT EXISTS anti-join
+against the live table instead of shipping an IN list of every task the
+user has ever done.
+"""
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+
+from apps.ai_core.cache_keys import catalogue_generation
+from .models import AppTest, CompletedTask, SurveyTask, VideoTask
+
+CANDIDATES_TTL = 300
+# Candidates cached per type = limit * factor + pad
+CANDIDATE_FACTOR = 4
+CANDIDATE_PAD = 20
+
+FEED_TYPES = {
+    "videos": (VideoTask, ["task_id", "title", "thumbnail", "video_url", "reward"]),
+    "surveys": (SurveyTask, ["task_id", "title", "iframe_url", "provider_url", "reward"]),
+    "app_tests": (AppTest, ["task_id", "title", "description", "download_url", "reward"]),
+}
+
+
+def _active(model):
+    return model.objects.filter(active=True).order_by("-reward", "-id")
+
+
+def candidates(feed_type: str, limit: int) -> tuple:
+    """
+    (rows, exhaustive) for a feed type. exhaustive is True when the list
+    holds every active task, so no fallback query can find more.
+    """
+    model, fields = FEED_TYPES[feed_type]
+    size = limit * CANDIDATE_FACTOR + CANDIDATE_PAD
+    key = f"feed:{catalogue_generation()}:{feed_type}:{size}"
+
+    cached = cache.get(key)
+    if cached is None:
+        rows = list(_active(model).values(*fields)[:size + 1])
+        cached = (rows[:size], len(rows) <= size)
+        cache.set(key, cached, CANDIDATES_TTL)
+    return cached
+
+
+def _not_completed(model, fields, user_id, limit):
+    done = CompletedTask.objects.filter(user_id=user_id, task_id=OuterRef("task_id"))
+    return list(_active(model).filter(~Exists(done)).values(*fields)[:limit])
+
+
+def user_feed(user_id: int, feed_type: str, limit: int) -> list:
+    """Top `limit` active tasks of a type the user has not completed."""
+    if limit <= 0:
+        return []
+
+    rows, exhaustive = candidates(feed_type, limit)
+    if not rows:
+        return []
+
+    completed = set(
+        CompletedTask.objects
+        .filter(user_id=user_id, task_id__in=[r["task_id"] for r in rows])
+        .values_list("task_id", flat=True)
+    )
+    feed = [r for r in rows if r["task_id"] not in completed][:limit]
+
+    if len(feed) < limit and not exhaustive:
+        model, fields = FEED_TYPES[feed_type]
+        return _not_completed(model, fields, user_id, limit)
+    return feed
@@ -0,0 +1,109 @@
+# apps/dashboard/invalidation.py
+"""
+Per-user cache invalidation.
+
+USER_CACHE_KEYS names every per-user dashboard cache entry; MODEL_CACHE_KEYS
+says which of them a model's writes make stale. post_save receivers (see
+signals.py) and bulk writers call invalidate_user_caches(); keys collected
+during a transaction are deleted with one delete_many once it commits, and
+dropped if it rolls back.
+"""
+import logging
+import threading
+from typing import Iterable, Optional
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from apps.ai_core.cache_keys import user_tasks_key
+from .summary import summary_key
+
+logger = logging.getLogger("dashboard.invalidation")
+
+# name -> key builder
+USER_CACHE_KEYS = {
+    "account": lambda user_id: f"account_{user_id}",
+    "tasks": lambda user_id: user_tasks_key(user_id, timezone.localdate()),
+    "summary": summary_key,
+}
+
+# model label -> cache names made stale by a write
+MODEL_CACHE_KEYS = {
+    "dashboard.UserProfile": ("account", "summary"),
+    "dashboard.LedgerEntry": ("account", "summary"),
+    "dashboard.Transaction": ("account",),
+    "dashboard.CompletedTask": ("tasks", "summary"),
+    # Notifications refresh the summary through schedule_summary_refresh
+}
+
+_local = threading.local()
+
+
+class _PendingDelete:
+    """One on_commit callback per transaction, accumulating keys."""
+
+    def __init__(self):
+        self.keys = set()
+
+    def __call__(self):
+        if _local.__dict__.get("pending") is self:
+            _local.pending = None
+        if not self.keys:
+            return
+        try:
+            cache.delete_many(list(self.keys))
+        except Exception:
+            logger.exception("Cache invalidation failed for %s keys", len(self.keys))
+
+
+def _pending() -> _PendingDelete:
+    """
+    The callback registered for the current transaction. Django clears
+    run_on_commit on rollback, so a callback that is no longer queued
+    is replaced rather than reused.
+    """
+    connection = transaction.get_connection()
+    pending = getattr(_local, "pending", None)
+    if pending is not None and any(func is pending for _, func, _ in connection.run_on_commit):
+        return pending
+
+    pending = _PendingDelete()
+    _local.pending = pending
+    transaction.on_commit(pending)
+    return pending
+
+
+def user_cache_key(name: str, user_id: int) -> str:
+    return USER_CACHE_KEYS[name](user_id)
+
+
+def user_cache_keys(user_id: int, names: Optional[Iterable[str]] = None) -> list:
+    names = USER_CACHE_KEYS if names is None else names
+    return [user_cache_key(name, user_id) for name in names]
+
+
+def invalidate_user_caches(user_ids, names: Optional[Iterable[str]] = None) -> None:
+    """
+    Delete the named per-user caches (all of them by default) after commit.
+    Outside a transaction the delete happens immediately.
+    """
+    if isinstance(user_ids, int):
+        user_ids = [user_ids]
+    names = tuple(USER_CACHE_KEYS if names is None else names)
+    keys = {key for user_id in set(user_ids) for key in user_cache_keys(user_id, names)}
+    if not keys:
+        return
+
+    if not transaction.get_connection().in_atomic_block:
+        cache.delete_many(list(keys))
+        return
+
+    _pending().keys.update(keys)
+
+
+def invalidate_for_instance(instance) -> None:
+    names = MODEL_CACHE_KEYS.get(instance._meta.label)
+    user_id = getattr(instance, "user_id", None)
+    if names and user_id:
+        invalidate_user_caches(user_id, names)
@@ -0,0 +1,238 @@
+# apps/dashboard/ledger.py
+"""
+Ledger-backed balances.
+
+LedgerEntry is the journal; BalanceCheckpoint stores the balance folded up to
+a ledger id. A read is:
+
+    checkpoint.balance + sum(entries with id > checkpoint.last_ledger_id)
+
+so its cost is O(entries since checkpoint), served by the (user, id) index.
+
+Ledger ids are allocated before commit, so a slow transaction can commit an id
+*below* one we already folded. Checkpoints therefore only advance over entries
+older than LEDGER_SETTLE_SECONDS; younger entries are still counted in the
+returned balance, just not persisted into the checkpoint yet.
+
+UserProfile.balance stays the guard for debits (conditional UPDATE), and
+every writer moves it and journals the same amount in one transaction:
+rewards, withdrawals and refunds, subscriptions paid from the wallet and
+admin adjustments (post_adjustment). Balances from before the ledger are
+journalled once as "opening_balance" entries (journal_opening_balances, run
+by the journal_opening_balances startup hook on deploy), so the ledger total
+equals the profile balance. Until that has completed, ledger_reads_enabled()
+is False and the dashboard summary keeps serving UserProfile.balance.
+"""
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, DecimalField, F, Max, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import BalanceCheckpoint, LedgerEntry, UserProfile
+
+logger = logging.getLogger("dashboard.ledger")
+
+ZERO = Decimal("0")
+OPENING_DONE_KEY = "ledger:opening_balances:done"
+OPENING_CHUNK_SIZE = 1000
+
+
+def settle_cutoff():
+    seconds = getattr(settings, "LEDGER_SETTLE_SECONDS", 60)
+    return timezone.now() - timedelta(seconds=seconds)
+
+
+def ledger_aggregates(cutoff):
+    """Aggregate expressions shared by single-user reads and bulk rebuilds."""
+    settled = Q(created_at__lt=cutoff)
+    return {
+        "credits": Sum("amount", filter=Q(entry_type="credit")),
+        "debits": Sum("amount", filter=Q(entry_type="debit")),
+        "settled_credits": Sum("amount", filter=settled & Q(entry_type="credit")),
+        "settled_debits": Sum("amount", filter=settled & Q(entry_type="debit")),
+        "settled_last_id": Max("id", filter=settled),
+    }
+
+
+def _net(credits, debits) -> Decimal:
+    return (credits or ZERO) - (debits or ZERO)
+
+
+def ledger_balance(user_id: int, advance: bool = True) -> Decimal:
+    """
+    Current ledger balance for a user.
+    Two queries: read the checkpoint, fold the newer entries.
+    """
+    checkpoint = (
+        BalanceCheckpoint.objects
+        .filter(user_id=user_id)
+        .values_list("balance", "last_ledger_id")
+        .first()
+    )
+    base, last_id = checkpoint if checkpoint else (ZERO, 0)
+
+    agg = (
+        LedgerEntry.objects
+        .filter(user_id=user_id, id__gt=last_id)
+        .aggregate(**ledger_aggregates(settle_cutoff()))
+    )
+
+    balance = base + _net(agg["credits"], agg["debits"])
+
+    if advance and agg["settled_last_id"]:
+        settled_balance = base + _net(agg["settled_credits"], agg["settled_debits"])
+        _advance_checkpoint(user_id, checkpoint is not None, last_id,
+                            settled_balance, agg["settled_last_id"])
+
+    return balance
+
+
+def _advance_checkpoint(user_id, exists, from_id, balance, to_id) -> None:
+    if exists:
+        # Compare-and-set: a concurrent reader may have advanced it already
+        BalanceCheckpoint.objects.filter(
+            user_id=user_id, last_ledger_id=from_id
+        ).update(balance=balance, last_ledger_id=to_id, updated_at=timezone.now())
+        return
+
+    BalanceCheckpoint.objects.bulk_create(
+        [BalanceCheckpoint(user_id=user_id, balance=balance, last_ledger_id=to_id)],
+        ignore_conflicts=True,
+    )
+
+
+def post_adjustment(user_id: int, delta: Decimal, reason: str, reference: str) -> None:
+    """
+    Move a wallet balance by `delta` (either sign) and journal it.
+    Runs in the caller's transaction.
+    """
+    if not delta:
+        return
+    LedgerEntry.objects.create(
+        user_id=user_id,
+        amount=abs(delta),
+        entry_type="credit" if delta > 0 else "debit",
+        reason=reason,
+        reference=reference,
+    )
+    UserProfile.objects.filter(user_id=user_id).update(balance=F("balance") + delta)
+
+
+def journal_opening_balances(user_ids) -> int:
+    """
+    Journal the part of each UserProfile.balance the ledger does not explain
+    (balances credited before the ledger existed) as one opening_balance
+    entry per user. Returns the number of users adjusted.
+
+    Balance and ledger total are read in one statement, i.e. one snapshot.
+    Every writer changes both in the same transaction, so a concurrent write
+    never shows up as a difference, and running it again journals nothing.
+    """
+    net = Subquery(
+        LedgerEntry.objects
+        .filter(user_id=OuterRef("user_id"))
+        .order_by()
+        .values("user_id")
+        .annotate(net=Sum(Case(
+            When(entry_type="credit", then=F("amount")),
+            default=-F("amount"),
+        )))
+        .values("net")[:1]
+    )
+    rows = (
+        UserProfile.objects
+        .filter(user_id__in=user_ids)
+        .annotate(ledger=Coalesce(net, Value(ZERO), output_field=DecimalField(max_digits=14, decimal_places=2)))
+        .values_list("user_id", "balance", "ledger")
+    )
+
+    entries = []
+    for user_id, balance, ledger in rows:
+        diff = (balance or ZERO) - ledger
+        if diff:
+            entries.append(LedgerEntry(
+                user_id=user_id,
+                amount=abs(diff),
+                entry_type="credit" if diff > 0 else "debit",
+                reason="opening_balance",
+                reference=f"opening:{user_id}",
+            ))
+
+    LedgerEntry.objects.bulk_create(entries)
+    return len(entries)
+
+
+def journal_all_opening_balances(chunk_size: int = OPENING_CHUNK_SIZE) -> int:
+    """Journal every user's opening balance in chunks, then enable ledger reads."""
+    from .summary import schedule_summary_refresh
+
+    user_ids = UserProfile.objects.order_by("user_id").values_list("user_id", flat=True)
+    adjusted = 0
+    last_id = 0
+    while True:
+        chunk = list(user_ids.filter(user_id__gt=last_id)[:chunk_size])
+        if not chunk:
+            break
+        journalled = journal_opening_balances(chunk)
+        if journalled:
+            adjusted += journalled
+            schedule_summary_refresh(chunk)
+        last_id = chunk[-1]
+
+    cache.set(OPENING_DONE_KEY, True, None)
+    return adjusted
+
+
+def ledger_reads_enabled() -> bool:
+    """True once opening balances are journalled (ledger total == profile balance)."""
+    try:
+        return bool(cache.get(OPENING_DONE_KEY))
+    except Exception:
+        return False
+
+
+def rebuild_checkpoints(user_ids, cutoff=None) -> int:
+    """
+    Recompute checkpoints from scratch for a chunk of users.
+    One grouped aggregate, one upsert and one delete per chunk; users with
+    no settled entries lose their checkpoint instead of keeping a stale one.
+    """
+    cutoff = cutoff or settle_cutoff()
+    settled = Q(created_at__lt=cutoff)
+
+    rows = (
+        LedgerEntry.objects
+        .filter(settled, user_id__in=user_ids)
+        .order_by()
+        .values("user_id")
+        .annotate(
+            credits=Sum("amount", filter=Q(entry_type="credit")),
+            debits=Sum("amount", filter=Q(entry_type="debit")),
+            last_id=Max("id"),
+        )
+    )
+
+    checkpoints = [
+        BalanceCheckpoint(
+            user_id=row["user_id"],
+            balance=_net(row["credits"], row["debits"]),
+            last_ledger_id=row["last_id"],
+        )
+        for row in rows
+    ]
+
+    BalanceCheckpoint.objects.bulk_create(
+        checkpoints,
+        update_conflicts=True,
+        unique_fields=["user"],
+        update_fields=["balance", "last_ledger_id", "updated_at"],
+    )
+    BalanceCheckpoint.objects.filter(user_id__in=user_ids).exclude(
+        user_id__in=[checkpoint.user_id for checkpoint in checkpoints]
+    ).delete()
+    return len(checkpoints)
@@ -0,0 +1,54 @@
+# apps/dashboard/management/commands/rebuild_balance_checkpoints.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from apps.dashboard.ledger import journal_all_opening_balances, rebuild_checkpoints, settle_cutoff
+
+
+class Command(BaseCommand):
+    help = "Rebuild every ledger balance checkpoint, streaming users in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--user", type=int, help="Rebuild a single user id")
+        parser.add_argument(
+            "--opening-balances", action="store_true",
+            help="First journal balances the ledger does not explain (also a deploy startup hook).",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+
+        if options["opening_balances"]:
+            adjusted = journal_all_opening_balances(chunk_size)
+            self.stdout.write(f"Journalled {adjusted} opening balance(s)")
+
+        # One cutoff for the whole run so every chunk folds the same horizon.
+        # Opening entries are younger than it: the next rebuild folds them.
+        cutoff = settle_cutoff()
+
+        if options["user"]:
+            count = rebuild_checkpoints([options["user"]], cutoff)
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} checkpoint(s)"))
+            return
+
+        user_ids = (
+            get_user_model().objects
+            .order_by("id")
+            .values_list("id", flat=True)
+            .iterator(chunk_size=chunk_size)
+        )
+
+        total = 0
+        chunk = []
+        for user_id in user_ids:
+            chunk.append(user_id)
+            if len(chunk) >= chunk_size:
+                total += rebuild_checkpoints(chunk, cutoff)
+                self.stdout.write(f"... {total} checkpoints rebuilt")
+                chunk = []
+
+        if chunk:
+            total += rebuild_checkpoints(chunk, cutoff)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} checkpoint(s)"))
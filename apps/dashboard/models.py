@@ -3,8 +3,8 @@ import uuid
 from django.db import models
 from django.utils import timezone
 from django.conf import settings
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+
+from apps.accounts.invite_codes import allocate_invite_code
 
 # ------------------------------
 # Helper functions
@@ -13,14 +13,14 @@ def generate_reference():
     """Generate a random unique reference for transactions."""
     return uuid.uuid4().hex
 
-def generate_invite_code():
-    """Generate a random invitation code (safe, no DB query)."""
-    return uuid.uuid4().hex[:10].upper()
-
 def today_date():
     """Return today's date."""
     return timezone.localdate()
 
+def default_phone_for(user_id):
+    """Placeholder phone for lazily created profiles (phone is unique)."""
+    return f"0{user_id}{uuid.uuid4().hex[:6]}"
+
 
 # ---------- USER PROFILE ----------
 class UserProfile(models.Model):
@@ -32,7 +32,7 @@ class UserProfile(models.Model):
     invitation_code = models.CharField(
         max_length=10,
         unique=True,
-        default=generate_invite_code,
+        default=allocate_invite_code,
         db_index=True
     )
     balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
@@ -56,22 +56,6 @@ class UserProfile(models.Model):
         ordering = ['-joined_at']
 
 
-# ---------- POST-SAVE SIGNAL TO ENSURE UNIQUE INVITE CODE ----------
-@receiver(post_save, sender=UserProfile)
-def assign_unique_invite_code(sender, instance, created, **kwargs):
-    """
-    Ensure that invitation_code is unique even if two users
-    accidentally get the same default code.
-    """
-    if created and instance.invitation_code:
-        code = instance.invitation_code
-        while UserProfile.objects.filter(invitation_code=code).exclude(id=instance.id).exists():
-            code = generate_invite_code()
-        if code != instance.invitation_code:
-            instance.invitation_code = code
-            instance.save(update_fields=['invitation_code'])
-
-
 # ---------- TASK MODELS ----------
 class BaseTask(models.Model):
     """Abstract base model for all task types."""
@@ -232,3 +216,26 @@ class LedgerEntry(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'reference']),
+            models.Index(fields=['user', 'id']),
+        ]
+
+
+# ---------- BALANCE CHECKPOINT ----------
+class BalanceCheckpoint(models.Model):
+    """
+    Ledger-derived balance folded up to (and including) last_ledger_id.
+    Reads fold forward from here, so they only touch newer LedgerEntry rows.
+    """
+    user = models.OneToOneField(
+        "accounts.User",
+        on_delete=models.CASCADE,
+        related_name="balance_checkpoint"
+    )
+    balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    last_ledger_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Checkpoint({self.user_id}: UGX {self.balance} @ {self.last_ledger_id})"
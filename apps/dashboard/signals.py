@@ -1,29 +1,22 @@
 #apps/dashboard/signals.py
 import logging
 from datetime import timedelta
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from .models import UserProfile, CompletedTask, Transaction, LedgerEntry, TaskProgress
+from apps.ai_core.cache_keys import bump_catalogue_generation
+from .models import (
+    UserProfile, CompletedTask, Transaction, LedgerEntry, TaskProgress,
+    VideoTask, SurveyTask, AppTest, Notification,
+)
+from .summary import schedule_summary_refresh
+from .invalidation import invalidate_for_instance
 
 logger = logging.getLogger("dashboard.signals")
 User = get_user_model()
 
 
-# -------------------------------
-# Automatically create UserProfile when a new User is created
-# -------------------------------
-@receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
-    if created:
-        try:
-            UserProfile.objects.get_or_create(user=instance)
-            logger.info(f"UserProfile created for user {instance.id}")
-        except Exception as e:
-            logger.exception(f"Failed to create UserProfile for user {instance.id}: {e}")
-
-
 # -------------------------------
 # Update user balance and ledger on task completion
 # -------------------------------
@@ -33,22 +26,19 @@ def update_balance_on_task_completion(sender, instance, created, **kwargs):
         return
 
     try:
-        profile = instance.user.userprofile
-        profile.balance += instance.reward
-        profile.today_earnings += instance.reward
-        profile.save(update_fields=['balance', 'today_earnings'])
+        from apps.ai_core.rewards import apply_reward_batch
 
-        LedgerEntry.objects.create(
-            user=instance.user,
-            amount=instance.reward,
-            entry_type="credit",
-            reason=f"Completed {instance.task_type}",
-            reference=str(instance.task_id),
-        )
+        result = apply_reward_batch([{
+            "user_id": instance.user_id,
+            "amount": instance.reward,
+            "reference": str(instance.task_id),
+            "reason": f"Completed {instance.task_type}",
+        }], write_reward_logs=False)
 
-        logger.info(f"Added {instance.reward} to user {instance.user.id} for task {instance.task_type}")
+        if result["applied"]:
+            logger.info(f"Added {instance.reward} to user {instance.user_id} for task {instance.task_type}")
     except Exception as e:
-        logger.exception(f"Failed to update balance for user {instance.user.id}: {e}")
+        logger.exception(f"Failed to update balance for user {instance.user_id}: {e}")
 
 
 # -------------------------------
@@ -56,11 +46,15 @@ def update_balance_on_task_completion(sender, instance, created, **kwargs):
 # -------------------------------
 @receiver(post_save, sender=Transaction)
 def update_ledger_on_transaction(sender, instance, created, **kwargs):
-    if not created:
+    # Writers that record their own ledger row (see withdrawals.py) opt out.
+    # Subscriptions are paid through Flutterwave and never touch the wallet.
+    if not created or getattr(instance, "_ledger_recorded", False):
+        return
+    if instance.transaction_type == "subscription":
         return
 
     try:
-        entry_type = "credit" if instance.transaction_type in ["deposit", "reward", "subscription"] else "debit"
+        entry_type = "credit" if instance.transaction_type in ["deposit", "reward"] else "debit"
         LedgerEntry.objects.create(
             user=instance.user,
             amount=instance.amount,
@@ -108,3 +102,36 @@ def update_subscription_status(sender, instance, **kwargs):
             instance.is_subscribed = instance.subscription_expiry >= timezone.localdate()
     except Exception as e:
         logger.exception(f"Failed to update subscription status for user {instance.user.id}: {e}")
+
+
+# -------------------------------
+# Task catalogue edits invalidate the cached feed candidates
+# -------------------------------
+@receiver(post_save, sender=VideoTask)
+@receiver(post_save, sender=SurveyTask)
+@receiver(post_save, sender=AppTest)
+@receiver(post_delete, sender=VideoTask)
+@receiver(post_delete, sender=SurveyTask)
+@receiver(post_delete, sender=AppTest)
+def invalidate_task_feed(sender, **kwargs):
+    bump_catalogue_generation()
+
+
+# -------------------------------
+# New notifications are written through to the dashboard summary
+# -------------------------------
+@receiver(post_save, sender=Notification)
+def refresh_summary_on_notification(sender, instance, created, **kwargs):
+    if created:
+        schedule_summary_refresh(instance.user_id)
+
+
+# -------------------------------
+# Per-user cache invalidation (deleted in one batch on commit)
+# -------------------------------
+@receiver(post_save, sender=UserProfile)
+@receiver(post_save, sender=LedgerEntry)
+@receiver(post_save, sender=Transaction)
+@receiver(post_save, sender=CompletedTask)
+def invalidate_user_cache(sender, instance, **kwargs):
+    invalidate_for_instance(instance)
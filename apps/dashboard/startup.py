@@ -0,0 +1,22 @@
+# apps/dashboard/startup.py
+"""Startup hooks for the dashboard (see core/startup.py)."""
+from apps.admin_panel.models import TaskControl
+from core.startup import startup_hook
+from .feeds import candidates
+from .ledger import journal_all_opening_balances, ledger_reads_enabled
+
+
+@startup_hook("warm_task_feeds")
+def warm_task_feeds():
+    """Build the shared feed candidate lists before the first user asks for them."""
+    task_control = TaskControl.objects.last()
+    candidates("videos", task_control.videos_count if task_control else 20)
+    candidates("surveys", task_control.surveys_count if task_control else 6)
+    candidates("app_tests", 1)
+
+
+@startup_hook("journal_opening_balances")
+def journal_opening_balances():
+    """Journal pre-ledger balances, then let the dashboard read balances from the ledger."""
+    if not ledger_reads_enabled():
+        journal_all_opening_balances()
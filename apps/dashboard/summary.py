@@ -0,0 +1,181 @@
+# apps/dashboard/summary.py
+"""
+Dashboard home summary.
+
+The summary (balance, today's earnings, commission, invites, latest
+notifications, unread count) is computed in one query and cached. The cache
+is write-through: code that changes any of these values calls
+schedule_summary_refresh() and the entry is rebuilt once its transaction
+commits. The TTL is only a safety net, not the freshness mechanism.
+
+Once opening balances are journalled (ledger.ledger_reads_enabled) the
+balance comes from the ledger (ledger.ledger_balance), which may advance the
+user's balance checkpoint; before that it is UserProfile.balance. Nothing
+else is written on a read. Marking
+notifications read is an explicit action handled by the
+mark_notifications_read task.
+"""
+import logging
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .ledger import ledger_balance, ledger_reads_enabled
+from .models import Notification, UserProfile, default_phone_for
+
+logger = logging.getLogger("dashboard.summary")
+User = get_user_model()
+
+SUMMARY_TTL = 60 * 10
+NOTIFICATIONS_SHOWN = 8
+# Above this many users a refresh is handed to Celery instead of run inline
+INLINE_REFRESH_LIMIT = 20
+
+ZERO = Decimal("0")
+
+
+def summary_key(user_id: int) -> str:
+    return f"dashboard:summary:{user_id}"
+
+
+def _profile_field(field: str) -> Subquery:
+    return Subquery(
+        UserProfile.objects.filter(user_id=OuterRef("pk")).values(field)[:1]
+    )
+
+
+def _latest_notifications():
+    return (
+        Notification.objects
+        .filter(user_id=OuterRef("pk"))
+        .order_by("-created_at", "-id")
+        .values("message")[:NOTIFICATIONS_SHOWN]
+    )
+
+
+def compute_summary(user_id: int) -> Optional[dict]:
+    """
+    One round trip on PostgreSQL (notifications folded in via ArraySubquery),
+    two on other backends, plus the two of ledger_balance() once enabled.
+    """
+    unread = Subquery(
+        Notification.objects
+        .filter(user_id=OuterRef("pk"), is_read=False)
+        .order_by()
+        .values("user_id")
+        .annotate(c=Count("id"))
+        .values("c"),
+        output_field=IntegerField(),
+    )
+
+    annotations = {
+        "profile_id": _profile_field("id"),
+        "balance": _profile_field("balance"),
+        "today_earnings": _profile_field("today_earnings"),
+        "commission": _profile_field("commission"),
+        "unread_count": Coalesce(unread, 0),
+        "last_notification_id": Subquery(
+            Notification.objects.filter(user_id=OuterRef("pk")).order_by("-id").values("id")[:1]
+        ),
+    }
+
+    postgres = connection.vendor == "postgresql"
+    if postgres:
+        from django.contrib.postgres.expressions import ArraySubquery
+        annotations["notifications"] = ArraySubquery(_latest_notifications())
+
+    row = (
+        User.objects
+        .filter(pk=user_id)
+        .annotate(**annotations)
+        .values("invites", *annotations)
+        .first()
+    )
+    if row is None:
+        return None
+
+    if row["profile_id"] is None:
+        UserProfile.objects.get_or_create(
+            user_id=user_id, defaults={"phone": default_phone_for(user_id)}
+        )
+
+    if postgres:
+        notifications = list(row["notifications"] or [])
+    else:
+        notifications = list(
+            Notification.objects
+            .filter(user_id=user_id)
+            .order_by("-created_at", "-id")
+            .values_list("message", flat=True)[:NOTIFICATIONS_SHOWN]
+        )
+
+    return {
+        "today_earnings": row["today_earnings"] or ZERO,
+        "balance": ledger_balance(user_id) if ledger_reads_enabled() else (row["balance"] or ZERO),
+        "commission": row["commission"] or ZERO,
+        "invites": row["invites"],
+        "notifications": notifications,
+        "unread_count": row["unread_count"],
+        "last_notification_id": row["last_notification_id"],
+    }
+
+
+def get_dashboard_summary(user_id: int) -> Optional[dict]:
+    key = summary_key(user_id)
+    summary = cache.get(key)
+    if summary is None:
+        summary = compute_summary(user_id)
+        if summary is not None:
+            cache.set(key, summary, SUMMARY_TTL)
+    return summary
+
+
+def refresh_dashboard_summary(user_id: int) -> None:
+    """Recompute and overwrite the cached summary."""
+    try:
+        summary = compute_summary(user_id)
+    except Exception:
+        # Never keep a stale value around if the rebuild failed
+        logger.exception("Summary refresh failed for user %s", user_id)
+        cache.delete(summary_key(user_id))
+        return
+    if summary is None:
+        cache.delete(summary_key(user_id))
+    else:
+        cache.set(summary_key(user_id), summary, SUMMARY_TTL)
+
+
+def refresh_dashboard_summaries(user_ids: Iterable[int]) -> None:
+    for user_id in user_ids:
+        refresh_dashboard_summary(user_id)
+
+
+def schedule_summary_refresh(user_ids) -> None:
+    """
+    Write-through hook for balance / notification writers.
+    Runs after the surrounding transaction commits (immediately outside one).
+    """
+    if isinstance(user_ids, int):
+        user_ids = [user_ids]
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return
+
+    def _refresh():
+        if len(user_ids) <= INLINE_REFRESH_LIMIT:
+            refresh_dashboard_summaries(user_ids)
+            return
+        # Drop the entries now so nobody reads a stale balance meanwhile
+        cache.delete_many([summary_key(uid) for uid in user_ids])
+        try:
+            from .tasks import refresh_summaries_task
+            refresh_summaries_task.delay(user_ids)
+        except Exception:
+            logger.exception("Could not enqueue summary refresh for %s users", len(user_ids))
+
+    transaction.on_commit(_refresh)
@@ -0,0 +1,39 @@
+# apps/dashboard/tasks.py
+import logging
+
+from celery import shared_task
+
+from .models import Notification
+from .summary import refresh_dashboard_summary, refresh_dashboard_summaries
+
+logger = logging.getLogger("dashboard.tasks")
+
+MARK_READ_BATCH_SIZE = 500
+
+
+@shared_task(bind=True, ignore_result=True)
+def mark_notifications_read(self, user_id: int, up_to_id: int = None):
+    """
+    Marks a user's unread notifications read in id-ordered batches,
+    then refreshes their dashboard summary.
+    up_to_id bounds the run to what the user actually saw.
+    """
+    qs = Notification.objects.filter(user_id=user_id, is_read=False)
+    if up_to_id:
+        qs = qs.filter(id__lte=up_to_id)
+
+    total = 0
+    while True:
+        ids = list(qs.order_by("id").values_list("id", flat=True)[:MARK_READ_BATCH_SIZE])
+        if not ids:
+            break
+        total += Notification.objects.filter(id__in=ids).update(is_read=True)
+
+    if total:
+        refresh_dashboard_summary(user_id)
+    return total
+
+
+@shared_task(bind=True, ignore_result=True)
+def refresh_summaries_task(self, user_ids):
+    refresh_dashboard_summaries(user_ids)
@@ -0,0 +1,153 @@
+# apps/dashboard/tests.py
+import threading
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+
+from apps.accounts.models import User
+from apps.accounts.signup import create_account
+from apps.ai_core.models import Transaction as PayoutTransaction
+from apps.ai_core.resilience import TransientPaymentError
+from apps.ai_core.transactions import celery_process_withdrawal
+
+from .models import LedgerEntry, Transaction, UserProfile
+from .withdrawals import InsufficientBalance, request_withdrawal, settle_withdrawal
+
+
+def _make_user(balance: Decimal) -> User:
+    user = create_account(
+        User(
+            username="withdrawer",
+            email="withdrawer@example.invalid",
+            account_number="+256700000001",
+            gender="other",
+        ),
+        "withdraw-password",
+    )
+    UserProfile.objects.filter(user=user).update(balance=balance)
+    return user
+
+
+# Threads need their own connections to one database (not in-memory SQLite)
+@skipUnlessDBFeature("test_db_allows_multiple_connections")
+@mock.patch("apps.ai_core.transactions.celery_process_withdrawal.apply_async")
+class ConcurrentWithdrawalTests(TransactionTestCase):
+    """Parallel withdrawals against one balance, each on its own connection."""
+
+    THREADS = 8
+    AMOUNT = Decimal("3000")
+
+    def setUp(self):
+        # Room for three withdrawals, not four
+        self.user = _make_user(Decimal("10000"))
+
+    def _withdraw_in_parallel(self):
+        barrier = threading.Barrier(self.THREADS)
+        outcomes = []
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                barrier.wait()
+                request_withdrawal(self.user, self.AMOUNT)
+                outcome = "ok"
+            except InsufficientBalance:
+                outcome = "insufficient"
+            except Exception as exc:
+                outcome = repr(exc)
+            finally:
+                connection.close()
+            with lock:
+                outcomes.append(outcome)
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_parallel_withdrawals_never_overdraw(self, apply_async):
+        outcomes = self._withdraw_in_parallel()
+
+        self.assertEqual(outcomes.count("ok"), 3, outcomes)
+        self.assertEqual(outcomes.count("insufficient"), self.THREADS - 3, outcomes)
+
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual(profile.balance, Decimal("1000"))
+        self.assertEqual(apply_async.call_count, 3)
+
+    def test_one_ledger_row_per_withdrawal(self, apply_async):
+        self._withdraw_in_parallel()
+
+        withdrawals = Transaction.objects.filter(user=self.user, transaction_type="withdraw")
+        self.assertEqual(withdrawals.count(), 3)
+
+        debits = LedgerEntry.objects.filter(user=self.user, entry_type="debit", reason="withdrawal")
+        self.assertEqual(debits.count(), 3)
+        self.assertEqual(
+            sorted(debits.values_list("reference", flat=True)),
+            sorted(withdrawals.values_list("reference", flat=True)),
+        )
+
+
+@mock.patch("apps.ai_core.transactions._get_flutterwave_config_cached",
+            return_value={"secret_key": "test", "base_url": "https://flutterwave.invalid"})
+class PayoutFailureTests(TestCase):
+    """Only a transfer Flutterwave cannot hold is refunded."""
+
+    AMOUNT = Decimal("3000")
+
+    def setUp(self):
+        self.user = _make_user(Decimal("10000"))
+        self.withdrawal = request_withdrawal(self.user, self.AMOUNT)
+        self.payout = PayoutTransaction.objects.get(tx_ref=f"WD-{self.withdrawal.reference}")
+
+    def _send(self, **options):
+        return celery_process_withdrawal.apply(
+            (self.payout.pk, "MPS", self.user.account_number, int(self.AMOUNT)), **options
+        )
+
+    def _refunds(self):
+        return LedgerEntry.objects.filter(user=self.user, reason="withdrawal_refund")
+
+    def test_timed_out_transfer_is_not_refunded(self, _config):
+        with mock.patch("apps.ai_core.transactions._http_post",
+                        side_effect=TransientPaymentError("read timeout")):
+            # Last allowed attempt: the retries are exhausted by this failure
+            self._send(retries=celery_process_withdrawal.max_retries)
+
+        self.payout.refresh_from_db()
+        self.withdrawal.refresh_from_db()
+        self.assertEqual(self.payout.status, "processing")
+        self.assertEqual(self.withdrawal.status, "pending")
+        self.assertFalse(self._refunds().exists())
+        self.assertEqual(UserProfile.objects.get(user=self.user).balance, Decimal("7000"))
+
+    def test_rejection_after_a_timeout_is_not_refunded(self, _config):
+        rejected = mock.Mock(status_code=400)
+        with mock.patch("apps.ai_core.transactions._http_post",
+                        return_value=(rejected, {"status": "error", "message": "Duplicate reference"})):
+            self._send(kwargs={"sent": True})
+
+        self.payout.refresh_from_db()
+        self.assertEqual(self.payout.status, "processing")
+        self.assertFalse(self._refunds().exists())
+
+    def test_definitive_rejection_is_refunded_once(self, _config):
+        rejected = mock.Mock(status_code=400)
+        with mock.patch("apps.ai_core.transactions._http_post",
+                        return_value=(rejected, {"status": "error", "message": "Invalid account"})):
+            self._send()
+
+        self.payout.refresh_from_db()
+        self.withdrawal.refresh_from_db()
+        self.assertEqual(self.payout.status, "failed")
+        self.assertEqual(self.withdrawal.status, "failed")
+        self.assertEqual(self._refunds().count(), 1)
+        self.assertEqual(UserProfile.objects.get(user=self.user).balance, Decimal("10000"))
+
+        settle_withdrawal(self.payout)
+        self.assertEqual(self._refunds().count(), 1)
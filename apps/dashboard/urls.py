@@ -22,4 +22,5 @@ urlpatterns = [
     path('account/change_password/', views.change_password_view, name='change_password'),
     path("logout/", views.logout_view, name="logout"), 
     path("api/gifts/", gifts_data_api, name="gifts_data_api"),
+    path("notifications/read/", views.mark_notifications_read_view, name="mark_notifications_read"),
 ]
@@ -3,16 +3,21 @@ from django.core.cache import cache
 from apps.admin_panel.models import TaskControl 
 from django.contrib.auth import logout
 from apps.ai_core.models import Offerwall
+from .feeds import user_feed
+from .summary import get_dashboard_summary
+from .invalidation import user_cache_key
+from .tasks import mark_notifications_read
+from apps.accounts import reauth
+from .withdrawals import WithdrawalError, request_withdrawal
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_POST
 from django.contrib import messages
 from django.contrib.auth import get_user_model, update_session_auth_hash
 from django.http import JsonResponse
 from django.utils import timezone
 from django.conf import settings
 from decimal import Decimal
-from django.db import transaction as db_transaction
-from django.db.models import F
 from django.urls import reverse
 import uuid
 import json
@@ -24,14 +29,11 @@ logger = logging.getLogger(__name__)
 from .models import (
     UserProfile,
     VideoTask,
-    SurveyTask,
-    AppTest,
     GiftOffer,
     Transaction,
-    Notification,
     TaskProgress,
-    LedgerEntry,
     CompletedTask,
+    default_phone_for,
 )
 User = get_user_model()
 
@@ -42,7 +44,7 @@ User = get_user_model()
 def get_or_create_profile(user: User) -> UserProfile:
     profile, created = UserProfile.objects.get_or_create(
         user=user,
-        defaults={"phone": f"0{user.id}{uuid.uuid4().hex[:6]}"}
+        defaults={"phone": default_phone_for(user.id)}
     )
     return profile
 
@@ -83,34 +85,28 @@ def gifts_data_api(request):
 # ===========================
 @login_required
 def home_view(request):
-    user = request.user
-    cache_key = f"home_dashboard_{user.id}"
+    summary = get_dashboard_summary(request.user.id) or {}
+    return render(request, "home.html", {**summary, "current_page": "home"})
 
-    data = cache.get(cache_key)
-    if data:
-        return render(request, "home.html", data)
 
-    profile = get_or_create_profile(user)
+@login_required
+@require_POST
+def mark_notifications_read_view(request):
+    try:
+        data = json.loads(request.body or b"{}")
+        up_to_id = int(data.get("up_to_id") or 0) or None
+    except (json.JSONDecodeError, TypeError, ValueError):
+        return json_error("Invalid JSON", 400)
 
-    notifications = list(
-        Notification.objects.filter(user=user)
-        .order_by("-created_at")
-        .values_list("message", flat=True)[:8]
-    )
+    try:
+        mark_notifications_read.delay(request.user.id, up_to_id)
+    except Exception:
+        logger.exception("Could not enqueue mark-read for user %s", request.user.id)
+        mark_notifications_read(request.user.id, up_to_id)
 
-    Notification.objects.filter(user=user, is_read=False).update(is_read=True)
+    return JsonResponse({"ok": True})
 
-    data = {
-        "today_earnings": profile.today_earnings,
-        "balance": profile.balance,
-        "commission": profile.commission,
-        "invites": user.invites,
-        "notifications": notifications,
-        "current_page": "home",
-    }
 
-    cache.set(cache_key, data, 15)  # 15 seconds realtime
-    return render(request, "home.html", data)
 # ===========================
 # TASKS
 # ===========================
@@ -118,7 +114,7 @@ def home_view(request):
 def tasks_view(request):
     user = request.user
     today = timezone.localdate()
-    cache_key = f"tasks_{user.id}_{today}"
+    cache_key = user_cache_key("tasks", user.id)
 
     cached = cache.get(cache_key)
     if cached:
@@ -139,38 +135,20 @@ def tasks_view(request):
         progress.last_reset = today
         progress.save()
 
-    completed_ids = set(
-        CompletedTask.objects.filter(user=user)
-        .values_list("task_id", flat=True)
-    )
-
-    videos = list(
-        VideoTask.objects.filter(active=True)
-        .exclude(task_id__in=completed_ids)
-        .order_by("-reward")[:videos_limit]
-        .values("task_id", "title", "thumbnail", "video_url", "reward")
-    )
-
-    surveys = list(
-        SurveyTask.objects.filter(active=True)
-        .exclude(task_id__in=completed_ids)
-        .order_by("-reward")[:surveys_limit]
-        .values("task_id", "title", "iframe_url", "provider_url", "reward")
-    )
+    videos = user_feed(user.id, "videos", videos_limit)
+    surveys = user_feed(user.id, "surveys", surveys_limit)
 
     app_test = None
     if app_tests_limit:
-        app = AppTest.objects.filter(active=True)\
-            .exclude(task_id__in=completed_ids)\
-            .order_by("-reward")\
-            .first()
-        if app:
+        app_tests = user_feed(user.id, "app_tests", 1)
+        if app_tests:
+            app = app_tests[0]
             app_test = {
-                "id": app.task_id,
-                "name": app.title,
-                "description": app.description,
-                "download_url": app.download_url,
-                "reward": float(app.reward),
+                "id": app["task_id"],
+                "name": app["title"],
+                "description": app["description"],
+                "download_url": app["download_url"],
+                "reward": float(app["reward"]),
             }
 
     completed_today = CompletedTask.objects.filter(
@@ -235,7 +213,7 @@ def tasks_view(request):
 @login_required
 def account_view(request):
     user = request.user
-    cache_key = f"account_{user.id}"
+    cache_key = user_cache_key("account", user.id)
 
     cached = cache.get(cache_key)
     if cached:
@@ -278,7 +256,7 @@ def subscribe_view(request):
     password = data.get("password")
     user = request.user
 
-    if not user.check_password(password):
+    if not reauth.confirm_password(request, password):
         return json_error("Incorrect password", 403)
 
     amount = Decimal(getattr(settings, "SUBSCRIPTION_FEE", "10000"))
@@ -316,52 +294,18 @@ def withdraw_view(request):
     except json.JSONDecodeError:
         return json_error("Invalid JSON", 400)
 
-    user = request.user
-    profile = get_or_create_profile(user)
-
-    amount = Decimal(str(data.get("amount", 0)))
     password = data.get("password")
 
-    if not user.check_password(password):
+    if not reauth.confirm_password(request, password):
         return json_error("Incorrect password", 403)
 
-    if amount <= 0 or amount > profile.balance:
-        return json_error("Invalid amount", 400)
-
-    with db_transaction.atomic():
-        profile = UserProfile.objects.select_for_update().get(pk=profile.pk)
-
-        tx = Transaction.objects.create(
-            user=user,
-            amount=amount,
-            transaction_type="withdraw",
-            status="pending",
-            reference=uuid.uuid4().hex,
-        )
-
-        LedgerEntry.objects.create(
-            user=user,
-            amount=amount,
-            entry_type="debit",
-            reason="withdrawal",
-            reference=tx.reference,
-        )
-
-        profile.balance = F("balance") - amount
-        profile.save(update_fields=["balance"])
-
     try:
-        from apps.ai_core.tasks import execute_withdrawal
-        execute_withdrawal.delay(tx.id)
-    except Exception:
-        tx.status = "manual"
-        tx.save(update_fields=["status"])
+        request_withdrawal(request.user, data.get("amount", 0))
+    except WithdrawalError as exc:
+        return json_error(str(exc), 400)
 
     return JsonResponse({"ok": True, "message": "Withdrawal processing"})
 
-cache.delete(f"home_dashboard_{user.id}")
-cache.delete(f"account_{user.id}")
-cache.delete(f"tasks_{user.id}_{timezone.localdate()}")
 # ===========================
 # GIFTS  (FAST VERSION)
 # ===========================
@@ -0,0 +1,178 @@
+# apps/dashboard/withdrawals.py
+"""
+Withdrawal debit, ledger first.
+
+request_withdrawal() runs one short transaction:
+
+1. INSERT the withdrawal Transaction (flagged _ledger_recorded, so the
+   update_ledger_on_transaction receiver stays out) and its single debit
+   LedgerEntry, plus the ai_core transfer row the payout worker reads.
+2. UPDATE userprofile SET balance = balance - x WHERE user = u AND balance >= x.
+   Zero rows means insufficient funds: raise, and the inserts roll back.
+
+No SELECT ... FOR UPDATE is taken and no Python runs between reading and
+writing the balance; the only row lock is the UPDATE's own, held from the
+last statement to COMMIT. Concurrent withdrawals serialise on that UPDATE
+and re-check the condition against the committed balance, so the balance
+can never go negative. The transfer is enqueued on_commit, so a rolled-back
+withdrawal never reaches Flutterwave.
+
+The payout row (ai_core Transaction, tx_ref "WD-<reference>") is the one the
+worker, webhook and reconciler update. settle_withdrawal() mirrors its final
+status onto the dashboard row; a failed payout, including one that could not
+be enqueued, credits the amount back with a matching ledger row. A payout is
+only failed when Flutterwave cannot hold the transfer: one whose request may
+have reached it stays "processing" until the webhook or reconciler settles it. The
+dashboard row is locked and only moves out of an open status once, so a
+refund is never applied twice.
+"""
+import logging
+import uuid
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import LedgerEntry, Transaction, UserProfile
+from .summary import schedule_summary_refresh
+
+logger = logging.getLogger("dashboard.withdrawals")
+
+
+class WithdrawalError(Exception):
+    pass
+
+
+class InsufficientBalance(WithdrawalError):
+    pass
+
+
+# Final payout statuses -> dashboard statuses
+PAYOUT_STATUS_MAP = {"success": "completed", "failed": "failed"}
+OPEN_STATUSES = ("pending", "initiated", "processing", "queued_for_manual")
+
+
+def parse_amount(value) -> Decimal:
+    """Whole, positive UGX amount, or WithdrawalError."""
+    try:
+        amount = Decimal(str(value))
+    except (InvalidOperation, TypeError, ValueError):
+        raise WithdrawalError("Invalid amount")
+    if not amount.is_finite() or amount <= 0 or amount != amount.to_integral_value():
+        raise WithdrawalError("Invalid amount")
+    return amount
+
+
+def settle_withdrawal(payout) -> None:
+    """Mirror a final payout status onto its dashboard withdrawal; refund on failure."""
+    if not (payout.tx_ref or "").startswith("WD-"):
+        return
+    status = PAYOUT_STATUS_MAP.get(payout.status)
+    if status is None:
+        return
+    reference = payout.tx_ref[len("WD-"):]
+
+    with db_transaction.atomic():
+        tx = (
+            Transaction.objects
+            .select_for_update()
+            .filter(reference=reference, transaction_type="withdraw", status__in=OPEN_STATUSES)
+            .first()
+        )
+        if tx is None:
+            return
+
+        tx.status = status
+        tx.provider_reference = payout.provider_reference or tx.provider_reference
+        if status == "completed":
+            tx.confirmed_at = timezone.now()
+        else:
+            tx.failure_reason = payout.failure_reason or "Transfer failed"
+            LedgerEntry.objects.create(
+                user_id=tx.user_id,
+                amount=tx.amount,
+                entry_type="credit",
+                reason="withdrawal_refund",
+                reference=reference,
+            )
+            UserProfile.objects.filter(user_id=tx.user_id).update(balance=F("balance") + tx.amount)
+            schedule_summary_refresh(tx.user_id)
+        tx.save(update_fields=["status", "provider_reference", "confirmed_at", "failure_reason"])
+
+    if status == "failed":
+        logger.info("Refunded failed withdrawal %s", reference)
+
+
+def _enqueue_transfer(tx_pk: int, payout_pk: int, account_number: str, amount: int) -> None:
+    from apps.ai_core.models import Transaction as PayoutTransaction
+    from apps.ai_core.transactions import celery_process_withdrawal
+
+    try:
+        celery_process_withdrawal.apply_async(
+            (payout_pk, getattr(settings, "WITHDRAWAL_ACCOUNT_BANK", "MPS"), account_number, amount)
+        )
+    except Exception:
+        logger.exception("Could not enqueue transfer for withdrawal %s", tx_pk)
+        # Nothing was sent: fail the payout row and refund through the usual path
+        PayoutTransaction.objects.filter(pk=payout_pk, status="pending").update(
+            status="failed", failure_reason="Could not enqueue transfer"
+        )
+        payout = PayoutTransaction.objects.filter(pk=payout_pk).first()
+        if payout is not None:
+            settle_withdrawal(payout)
+
+
+def request_withdrawal(user, amount) -> Transaction:
+    """
+    Debit `amount` from the user's balance and queue the payout.
+    Raises WithdrawalError / InsufficientBalance; nothing is written then.
+    """
+    from apps.ai_core.models import Transaction as PayoutTransaction
+
+    amount = parse_amount(amount)
+    if not user.account_number:
+        raise WithdrawalError("No withdrawal phone number on file")
+
+    reference = uuid.uuid4().hex
+
+    with db_transaction.atomic():
+        tx = Transaction(
+            user=user,
+            amount=amount,
+            transaction_type="withdraw",
+            status="pending",
+            reference=reference,
+        )
+        tx._ledger_recorded = True
+        tx.save()
+
+        LedgerEntry.objects.create(
+            user=user,
+            amount=amount,
+            entry_type="debit",
+            reason="withdrawal",
+            reference=reference,
+        )
+
+        payout = PayoutTransaction.objects.create(
+            user=user,
+            tx_type="withdrawal",
+            amount_ugx=int(amount),
+            status="pending",
+            tx_ref=f"WD-{reference}",
+        )
+
+        debited = UserProfile.objects.filter(user=user, balance__gte=amount).update(
+            balance=F("balance") - amount
+        )
+        if not debited:
+            raise InsufficientBalance("Insufficient balance")
+
+        schedule_summary_refresh(user.id)
+        db_transaction.on_commit(
+            lambda: _enqueue_transfer(tx.pk, payout.pk, user.account_number, int(amount))
+        )
+
+    return tx
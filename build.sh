@@ -5,4 +5,5 @@ set -e
 pip install -r requirements.txt
 python manage.py makemigrations
 python manage.py migrate
+python manage.py run_startup_hooks
 python manage.py collectstatic --noinput
@@ -12,12 +12,56 @@ app.autodiscover_tasks()
 
 app.conf.timezone = "UTC"
 
+# The only beat schedule: CELERY_BEAT_SCHEDULE in settings would be
+# overridden by this assignment, so every periodic task is listed here.
 app.conf.beat_schedule = {
+    # ----------------------------------
+    # Offer catalogue
+    # ----------------------------------
+    "daily-task-refresh": {
+        "task": "apps.ai_core.tasks.scheduled_daily_task_refresh",
+        "schedule": crontab(hour=0, minute=0),
+    },
+    # ----------------------------------
+    # Postbacks: drain staged rows if the debounced task never ran
+    # ----------------------------------
+    "drain-postback-queue-every-minute": {
+        "task": "apps.ai_core.tasks.process_postback_queue",
+        "schedule": crontab(minute="*"),
+    },
+    # ----------------------------------
+    # Transfers: final status for those that missed their webhook
+    # ----------------------------------
+    "reconcile-withdrawals-every-10min": {
+        "task": "apps.ai_core.tasks.reconcile_pending_transactions",
+        "schedule": crontab(minute="*/10"),
+    },
+    # ----------------------------------
+    # Admin graphs: hourly metric rollups
+    # ----------------------------------
+    "rollup-metrics-every-10min": {
+        "task": "apps.admin_panel.tasks.rollup_metrics",
+        "schedule": crontab(minute="*/10"),
+    },
+    # ----------------------------------
+    # Postback idempotency: restore Redis keys after a flush
+    # ----------------------------------
+    "reseed-idempotency-keys-every-5min": {
+        "task": "apps.ai_core.tasks.reseed_idempotency_keys",
+        "schedule": crontab(minute="*/5"),
+    },
+    # ----------------------------------
+    # Log retention: archive / drop expired monthly partitions
+    # ----------------------------------
+    "enforce-log-retention-daily": {
+        "task": "apps.ai_core.tasks.enforce_log_retention",
+        "schedule": crontab(hour=3, minute=30),
+    },
     # ----------------------------------
     # Sunday Payroll
     # ----------------------------------
     "payroll-every-sunday-midnight": {
-        "task": "transactions.run_sunday_payroll",
+        "task": "apps.admin_panel.tasks.run_sunday_payroll",
         "schedule": crontab(hour=0, minute=0, day_of_week="sun"),
         "options": {"queue": "high_priority"},
     },
@@ -41,6 +41,14 @@ CSRF_COOKIE_SECURE = not DEBUG
 
 ADMIN_USERNAME = env('ADMIN_USERNAME', default='')
 ADMIN_PASSWORD = env('ADMIN_PASSWORD', default='')
+ADMIN_EMAIL = env('ADMIN_EMAIL', default='')
+ADMIN_PHONE = env('ADMIN_PHONE', default='')
+# Keys the invitation code permutation (apps/accounts/invite_codes.py).
+# Never change it once codes have been issued.
+INVITE_CODE_SECRET = env('INVITE_CODE_SECRET', default='')
+
+# Identifies a deploy so startup hooks (core/startup.py) run once per deploy
+DEPLOY_ID = env('DEPLOY_ID', default=env('RENDER_GIT_COMMIT', default=''))
 
 # -----------------------------------------------------------------------------
 # CSP
@@ -89,6 +97,31 @@ AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend'
 ]
 
+# Login throttle (apps/accounts/throttle.py): failures per sliding window
+LOGIN_THROTTLE_WINDOW = env.int('LOGIN_THROTTLE_WINDOW', default=300)
+LOGIN_THROTTLE_IP_LIMIT = env.int('LOGIN_THROTTLE_IP_LIMIT', default=20)
+LOGIN_THROTTLE_IDENTIFIER_LIMIT = env.int('LOGIN_THROTTLE_IDENTIFIER_LIMIT', default=5)
+# Proxies in front of the app that append to X-Forwarded-For. The client IP is
+# the entry this many places from the right; entries further left are client
+# supplied and ignored. Render runs one proxy hop (REMOTE_ADDR is that proxy),
+# so the default is 1; set 0 when the app is reached directly.
+LOGIN_THROTTLE_PROXY_HOPS = env.int('LOGIN_THROTTLE_PROXY_HOPS', default=1)
+
+# Step-up re-auth grant lifetime for sensitive actions (apps/accounts/reauth.py)
+REAUTH_GRANT_SECONDS = env.int('REAUTH_GRANT_SECONDS', default=300)
+
+# Optional cheaper PBKDF2 (apps/accounts/hashers.py); users are rehashed on login
+PASSWORD_TUNED_HASHER = env.bool('PASSWORD_TUNED_HASHER', default=False)
+PASSWORD_PBKDF2_ITERATIONS = env.int('PASSWORD_PBKDF2_ITERATIONS', default=600_000)
+if PASSWORD_TUNED_HASHER:
+    PASSWORD_HASHERS = [
+        'apps.accounts.hashers.TunedPBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'django.contrib.auth.hashers.Argon2PasswordHasher',
+        'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+        'django.contrib.auth.hashers.ScryptPasswordHasher',
+    ]
+
 LOGIN_URL = "/login/"
 LOGOUT_REDIRECT_URL = "/login/"
 
@@ -187,20 +220,9 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "Africa/Kampala"
-
-if os.getenv("RUN_MAIN") == "true":
-    from celery.schedules import crontab
-
-    CELERY_BEAT_SCHEDULE = {
-        'daily_task_refresh': {
-            'task': 'apps.ai_core.tasks.scheduled_daily_task_refresh',
-            'schedule': crontab(hour=0, minute=0),
-        },
-        'reconcile_withdrawals_every_10min': {
-            'task': 'apps.ai_core.tasks.reconcile_pending_transactions',
-            'schedule': crontab(minute='*/10'),
-        },
-    }
+# Task modules outside the autodiscovered tasks.py files
+CELERY_IMPORTS = ("apps.ai_core.transactions",)
+# Periodic tasks: app.conf.beat_schedule in core/celery.py (the only schedule)
 
 # -----------------------------------------------------------------------------
 # REST
@@ -218,8 +240,39 @@ REST_FRAMEWORK = {
 # -----------------------------------------------------------------------------
 FLUTTERWAVE_PUBLIC_KEY = env('FLUTTERWAVE_PUBLIC_KEY', default='')
 FLUTTERWAVE_SECRET_KEY = env('FLUTTERWAVE_SECRET_KEY', default='')
+FLUTTERWAVE_WEBHOOK_SECRET = env('FLUTTERWAVE_WEBHOOK_SECRET', default='')
+FLUTTERWAVE_BASE_URL = env('FLUTTERWAVE_BASE_URL', default='https://api.flutterwave.com/v3')
 FLUTTERWAVE_ENCRYPTION_KEY = env('FLUTTERWAVE_ENCRYPTION_KEY', default='')
+# Fernet key for APIConfig secrets (Fernet.generate_key()); empty means they
+# are stored in plaintext. Not FLUTTERWAVE_ENCRYPTION_KEY, which is a 3DES key.
+API_CONFIG_ENCRYPTION_KEY = env('API_CONFIG_ENCRYPTION_KEY', default='')
+# Decrypted APIConfig cache (apps/ai_core/config_cache.py), seconds
+API_CONFIG_CACHE_TTL = env.int('API_CONFIG_CACHE_TTL', default=300)
+API_CONFIG_NEGATIVE_TTL = env.int('API_CONFIG_NEGATIVE_TTL', default=30)
 USD_TO_UGX_RATE = env.int('USD_TO_UGX_RATE', default=3800)
+# Batched withdrawal reconciliation (apps/ai_core/reconciliation.py)
+RECONCILE_CHUNK_SIZE = env.int('RECONCILE_CHUNK_SIZE', default=100)
+RECONCILE_MIN_AGE_SECONDS = env.int('RECONCILE_MIN_AGE_SECONDS', default=120)
+# Transfer dispatch budget shared by payroll runs (token bucket)
+FLUTTERWAVE_TRANSFERS_PER_SECOND = env.float('FLUTTERWAVE_TRANSFERS_PER_SECOND', default=2)
+FLUTTERWAVE_TRANSFER_BURST = env.int('FLUTTERWAVE_TRANSFER_BURST', default=5)
+PAYROLL_ACCOUNT_BANK = env('PAYROLL_ACCOUNT_BANK', default='MPS')  # Flutterwave UG mobile money
+WITHDRAWAL_ACCOUNT_BANK = env('WITHDRAWAL_ACCOUNT_BANK', default='MPS')
+# Per-host circuit breaker for payment calls (apps/ai_core/resilience.py)
+CIRCUIT_FAILURE_THRESHOLD = env.int('CIRCUIT_FAILURE_THRESHOLD', default=5)
+CIRCUIT_WINDOW_SECONDS = env.int('CIRCUIT_WINDOW_SECONDS', default=60)
+CIRCUIT_OPEN_SECONDS = env.int('CIRCUIT_OPEN_SECONDS', default=30)
+# Times a transfer waits out an open circuit before it is failed (and refunded);
+# kept apart from the task's max_retries. 240 waits of >= 30s is about two hours.
+WITHDRAWAL_CIRCUIT_MAX_WAITS = env.int('WITHDRAWAL_CIRCUIT_MAX_WAITS', default=240)
+
+# -----------------------------------------------------------------------------
+# OUTBOUND HTTP (shared pooled clients, see apps/ai_core/utils.py)
+# -----------------------------------------------------------------------------
+HTTP_POOL_CONNECTIONS = env.int('HTTP_POOL_CONNECTIONS', default=10)  # hosts kept per client
+HTTP_POOL_MAXSIZE = env.int('HTTP_POOL_MAXSIZE', default=20)  # keep-alive sockets per host
+HTTP_RETRY_TOTAL = env.int('HTTP_RETRY_TOTAL', default=3)
+HTTP_RETRY_BACKOFF = env.float('HTTP_RETRY_BACKOFF', default=0.5)
 
 # -----------------------------------------------------------------------------
 # OFFERWALLS
@@ -246,12 +299,32 @@ ADD_SECRET_KEY = env('ADD_SECRET_KEY', default='')
 CPALEAD_API_KEY = env('CPALEAD_API_KEY', default='')
 CPALEAD_SECRET_KEY = env('CPALEAD_SECRET_KEY', default='')
 
+# Postbacks are staged and credited by Celery unless disabled
+POSTBACK_ACCEPT_FAST = env.bool('POSTBACK_ACCEPT_FAST', default=True)
+POSTBACK_BATCH_SIZE = env.int('POSTBACK_BATCH_SIZE', default=200)
+# Lifetime of the Redis fast-path idempotency keys (DB rows are permanent)
+IDEMPOTENCY_CACHE_TTL = env.int('IDEMPOTENCY_CACHE_TTL', default=60 * 60 * 24 * 7)
+# Monthly log partitions kept online (WebhookLog, ProviderConnectionLog, TaskFetchLog);
+# older ones are dropped, after being archived as gzip NDJSON under
+# LOG_ARCHIVE_DIR when enabled. The directory must be persistent (a mounted
+# disk, not the service's ephemeral filesystem).
+LOG_RETENTION_MONTHS = env.int('LOG_RETENTION_MONTHS', default=3)
+LOG_ARCHIVE_ENABLED = env.bool('LOG_ARCHIVE_ENABLED', default=False)
+LOG_ARCHIVE_DIR = env('LOG_ARCHIVE_DIR', default='')
+# Per-provider fetch timeout (seconds) for the concurrent offer refresh
+OFFER_REFRESH_PROVIDER_TIMEOUT = env.int('OFFER_REFRESH_PROVIDER_TIMEOUT', default=15)
+# A feed missing more than this share of a provider's active offers deactivates none
+OFFER_SYNC_MAX_DEACTIVATE_FRACTION = env.float('OFFER_SYNC_MAX_DEACTIVATE_FRACTION', default=0.5)
+
 # -----------------------------------------------------------------------------
 # FINANCIAL
 # -----------------------------------------------------------------------------
 MAX_SINGLE_WITHDRAWAL = env.int('MAX_SINGLE_WITHDRAWAL', default=100000)
 DAILY_WITHDRAWAL_LIMIT = env.int('DAILY_WITHDRAWAL_LIMIT', default=400000)
 
+# Ledger entries younger than this are not folded into balance checkpoints
+LEDGER_SETTLE_SECONDS = env.int('LEDGER_SETTLE_SECONDS', default=60)
+
 DEFAULT_CURRENCY = "UGX"
 EXCHANGE_RATES = {"USD": 3800.0, "KES": 30.0, "UGX": 1.0, "EUR": 4100.0}
 
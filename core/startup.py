@@ -0,0 +1,106 @@
+# core/startup.py
+"""
+One-shot startup hooks.
+
+Bootstrap work (admin account, APIConfig seeding, cache warm-ups) used to
+run at WSGI import time, in every worker on every boot. It now lives in
+`startup.py` modules of the installed apps, registered with
+@startup_hook, and runs once per deploy:
+
+    python manage.py run_startup_hooks       # release / build step
+    gunicorn core.wsgi                       # gunicorn.conf.py on_starting
+
+run_startup_hooks() serialises runners with a Postgres advisory lock and
+records DEPLOY_ID in the cache when done, so concurrent or repeated calls
+within the same deploy are no-ops. Without a DEPLOY_ID nothing is recorded
+and the hooks run on every call. Hooks must be idempotent regardless.
+"""
+import logging
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils.module_loading import autodiscover_modules
+
+logger = logging.getLogger("core.startup")
+
+_hooks: Dict[str, Callable[[], None]] = {}
+
+LOCK_ID = zlib.crc32(b"core.startup")
+DONE_KEY = "startup:done:{}"
+DONE_TTL = 60 * 60 * 24 * 30
+
+
+def startup_hook(name: str):
+    """Register fn as a startup hook; hooks run in registration order."""
+    def decorator(fn: Callable[[], None]) -> Callable[[], None]:
+        _hooks[name] = fn
+        return fn
+    return decorator
+
+
+def registered_hooks() -> Dict[str, Callable[[], None]]:
+    autodiscover_modules("startup")
+    return dict(_hooks)
+
+
+@contextmanager
+def _advisory_lock():
+    """Session-level lock so only one process runs hooks; others wait for it."""
+    if connection.vendor != "postgresql":
+        yield
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_lock(%s)", [LOCK_ID])
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [LOCK_ID])
+
+
+def run_startup_hooks(only: Optional[List[str]] = None, force: bool = False) -> Dict[str, float]:
+    """
+    Run every registered hook (or just `only`) once for this deploy.
+    Returns {hook name: seconds}; empty if this deploy already ran them.
+    A failing hook is logged and the others still run; the deploy is then
+    not marked done, so the next boot tries again.
+    """
+    hooks = registered_hooks()
+    if only:
+        unknown = set(only) - set(hooks)
+        if unknown:
+            raise KeyError(f"Unknown startup hooks: {', '.join(sorted(unknown))}")
+        hooks = {name: fn for name, fn in hooks.items() if name in only}
+
+    deploy_id = getattr(settings, "DEPLOY_ID", "")
+    # No deploy id, no way to tell deploys apart: run every time
+    done_key = DONE_KEY.format(deploy_id) if deploy_id else None
+    timings: Dict[str, float] = {}
+
+    with _advisory_lock():
+        # Checked under the lock: a waiter sees the marker the holder just set
+        if not force and not only and done_key and cache.get(done_key):
+            logger.info("Startup hooks already ran for this deploy")
+            return timings
+
+        failed = False
+        for name, fn in hooks.items():
+            started = time.perf_counter()
+            try:
+                fn()
+            except Exception:
+                failed = True
+                logger.exception("Startup hook %s failed", name)
+            timings[name] = time.perf_counter() - started
+            logger.info("Startup hook %s finished in %.3fs", name, timings[name])
+
+        if done_key and not only and not failed:
+            cache.set(done_key, True, DONE_TTL)
+
+    return timings
@@ -0,0 +1,23 @@
+# gunicorn.conf.py
+# Loaded automatically by `gunicorn core.wsgi` from the project root.
+
+
+def on_starting(server):
+    """Run startup hooks once in the master, before any worker is forked."""
+    import os
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+    import django
+    django.setup()
+
+    from django.db import connections
+    from core.startup import run_startup_hooks
+
+    try:
+        run_startup_hooks()
+    except Exception:
+        server.log.exception("Startup hooks failed; serving anyway")
+    finally:
+        # Workers must not inherit the master's database sockets
+        connections.close_all()